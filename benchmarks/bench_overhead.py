@@ -0,0 +1,295 @@
+# Measures the overhead of this plugin on synthetic sessions, relative to running the same sessions without the plugin
+# loaded at all through -p no:dynamicrerun. Every scenario generates a test module, runs it in a pytest subprocess
+# with and without the plugin and reports the difference per item. Run from the repository root:
+#
+#     python benchmarks/bench_overhead.py                  # the quick scenarios, compared against the baseline
+#     python benchmarks/bench_overhead.py --full           # every scenario, up to 100k items and 10 MB of output
+#     python benchmarks/bench_overhead.py --save-baseline  # record the results as the new baseline
+#
+# Failing items fail on every attempt and are rerun once with no delay, so their rerun counts towards the overhead
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import namedtuple
+
+import pytest
+
+BASELINE_FILE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "baseline.json"
+)
+DEFAULT_REPEATS = 3
+PLUGIN_NAME = "dynamicrerun"
+
+# a scenario regresses once its per item overhead grows by more than this share and this amount of microseconds.
+# Both are needed since small overheads are noisy in relative terms, and large ones in absolute terms
+REGRESSION_SHARE = 0.25
+REGRESSION_MICROSECONDS = 50
+
+KB = 1024
+MB = 1024 * KB
+
+Scenario = namedtuple(
+    "Scenario",
+    "name num_items num_triggers literal_triggers output_size failure_rate scan_window full_only",
+)
+
+# each group varies one dimension, keeping the others at 1k items, 1 trigger, 1 KB of output and no failures.
+# The amount of items shrinks as the output per item grows, to keep the output of a session at 100 MB at most.
+# Triggers are half literal and half regex triggers, unless the scenario asks for literal triggers only
+SCENARIOS = [
+    Scenario("items-1k", 1000, 1, False, KB, 0, None, False),
+    Scenario("items-10k", 10000, 1, False, KB, 0, None, False),
+    Scenario("items-100k", 100000, 1, False, KB, 0, None, True),
+    Scenario("triggers-50", 1000, 50, False, KB, 0, None, False),
+    Scenario("triggers-500", 1000, 500, False, KB, 0, None, False),
+    Scenario("triggers-50-literal", 1000, 50, True, KB, 0, None, False),
+    Scenario("triggers-500-literal", 1000, 500, True, KB, 0, None, False),
+    Scenario("output-100kb", 1000, 1, False, 100 * KB, 0, None, False),
+    Scenario("output-1mb", 100, 1, False, MB, 0, None, False),
+    Scenario("output-10mb", 10, 1, False, 10 * MB, 0, None, True),
+    Scenario("failures-10pct", 1000, 1, False, KB, 0.1, None, False),
+    Scenario("failures-50pct", 1000, 1, False, KB, 0.5, None, False),
+    # scanning large outputs for many triggers is the most expensive part of the plugin
+    Scenario("output-1mb-triggers-50", 10, 50, False, MB, 0, None, True),
+    Scenario("failures-50pct-triggers-500", 1000, 500, False, KB, 0.5, None, True),
+    # the same sessions, only scanning the end of each section through --dynamic-rerun-scan-window
+    Scenario("output-10mb-window-64kb", 10, 1, False, 10 * MB, 0, 64, True),
+    Scenario("output-1mb-triggers-50-window-64kb", 10, 50, False, MB, 0, 64, False),
+]
+
+TEST_MODULE = """
+import sys
+
+import pytest
+
+OUTPUT_LINE = "benchmark output line that does not match any trigger\\n"
+OUTPUT = (OUTPUT_LINE * ({output_size} // len(OUTPUT_LINE) + 1))[:{output_size}]
+
+# spreads failing items over the session instead of failing the first ones
+FAILURE_PERMILLE = {failure_permille}
+
+
+@pytest.mark.parametrize("i", range({num_items}))
+def test_item(i):
+    sys.stdout.write(OUTPUT)
+    if (i * 7919) % 1000 < FAILURE_PERMILLE:
+        print("RERUN_ME")
+        assert False
+"""
+
+INI_FILE = """
+[pytest]
+dynamic_rerun_attempts = 1
+dynamic_rerun_schedule = delay:0s
+{scan_window}
+dynamic_rerun_triggers =
+{triggers}
+"""
+
+
+def _get_triggers(num_triggers, literal_triggers):
+    # literal triggers, or a mix of literal and regex triggers, that never match, followed by the one failing
+    # items print
+    triggers = []
+    for i in range(num_triggers - 1):
+        if i % 2 or literal_triggers:
+            triggers.append(
+                "ConnectionResetError: peer {} reset the connection".format(i)
+            )
+        else:
+            triggers.append(r"Timeout after \d+s waiting for service-{}".format(i))
+    triggers.append("RERUN_ME")
+    return triggers
+
+
+def _write_session(directory, scenario):
+    with open(os.path.join(directory, "test_benchmark.py"), "w") as test_module:
+        test_module.write(
+            TEST_MODULE.format(
+                num_items=scenario.num_items,
+                output_size=scenario.output_size,
+                failure_permille=int(scenario.failure_rate * 1000),
+            )
+        )
+
+    scan_window = ""
+    if scenario.scan_window is not None:
+        scan_window = "dynamic_rerun_scan_window = {}".format(scenario.scan_window)
+
+    with open(os.path.join(directory, "pytest.ini"), "w") as ini_file:
+        ini_file.write(
+            INI_FILE.format(
+                scan_window=scan_window,
+                triggers="\n".join(
+                    "    {}".format(trigger)
+                    for trigger in _get_triggers(
+                        scenario.num_triggers, scenario.literal_triggers
+                    )
+                ),
+            )
+        )
+
+
+def _time_session(directory, plugin_disabled):
+    args = [
+        sys.executable,
+        "-m",
+        "pytest",
+        "-q",
+        "-p",
+        "no:cacheprovider",
+        "-p",
+        "no:randomly",
+    ]
+    if plugin_disabled:
+        # --dynamic-rerun-disabled would still run the plugin's hooks, which are part of its overhead
+        args.extend(["-p", "no:{}".format(PLUGIN_NAME)])
+
+    start_time = time.perf_counter()
+    subprocess.run(
+        args, cwd=directory, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    return time.perf_counter() - start_time
+
+
+def _run_scenario(scenario, repeats):
+    directory = tempfile.mkdtemp(prefix="dynamicrerun-benchmark-")
+    try:
+        _write_session(directory, scenario)
+
+        # alternate the runs so that both are equally affected by load changes on the machine
+        disabled_times = []
+        enabled_times = []
+        for _ in range(repeats):
+            disabled_times.append(_time_session(directory, plugin_disabled=True))
+            enabled_times.append(_time_session(directory, plugin_disabled=False))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    disabled_seconds = min(disabled_times)
+    enabled_seconds = min(enabled_times)
+    return {
+        "disabled_seconds": round(disabled_seconds, 3),
+        "enabled_seconds": round(enabled_seconds, 3),
+        "overhead_per_item_us": round(
+            (enabled_seconds - disabled_seconds) / scenario.num_items * 1000000, 1
+        ),
+        "overhead_share": round(enabled_seconds / disabled_seconds - 1, 3),
+    }
+
+
+def _load_baseline():
+    if not os.path.exists(BASELINE_FILE_PATH):
+        return {}
+
+    with open(BASELINE_FILE_PATH) as baseline_file:
+        return json.load(baseline_file)
+
+
+def _save_baseline(results):
+    baseline = {
+        "environment": {
+            "machine": platform.machine(),
+            "python": platform.python_version(),
+            "pytest": pytest.__version__,
+        },
+        "scenarios": results,
+    }
+
+    with open(BASELINE_FILE_PATH, "w") as baseline_file:
+        json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+        baseline_file.write("\n")
+
+
+def _is_regression(result, baseline_result):
+    overhead = result["overhead_per_item_us"]
+    baseline_overhead = baseline_result["overhead_per_item_us"]
+    return (
+        overhead > baseline_overhead * (1 + REGRESSION_SHARE)
+        and overhead > baseline_overhead + REGRESSION_MICROSECONDS
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure the overhead of pytest-dynamicrerun"
+    )
+    parser.add_argument(
+        "--full", action="store_true", help="also run the slow scenarios"
+    )
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        default=DEFAULT_REPEATS,
+        help="runs per scenario, the fastest counts",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="record the results as the new baseline",
+    )
+    parser.add_argument(
+        "scenarios",
+        nargs="*",
+        help="names of the scenarios to run, defaults to all of them",
+    )
+    args = parser.parse_args()
+
+    scenarios = [
+        scenario
+        for scenario in SCENARIOS
+        if (args.full or not scenario.full_only)
+        and (not args.scenarios or scenario.name in args.scenarios)
+    ]
+    baseline_results = _load_baseline().get("scenarios", {})
+
+    print(
+        "{:<36} {:>10} {:>10} {:>14} {:>10} {:>14}".format(
+            "scenario", "disabled", "enabled", "per item", "share", "baseline"
+        )
+    )
+
+    results = {}
+    regressions = []
+    for scenario in scenarios:
+        result = _run_scenario(scenario, args.repeats)
+        results[scenario.name] = result
+
+        baseline_result = baseline_results.get(scenario.name)
+        baseline_text = "-"
+        if baseline_result is not None:
+            baseline_text = "{:.1f}us".format(baseline_result["overhead_per_item_us"])
+            if _is_regression(result, baseline_result):
+                baseline_text += " !"
+                regressions.append(scenario.name)
+
+        print(
+            "{:<36} {:>9.3f}s {:>9.3f}s {:>12.1f}us {:>9.1%} {:>14}".format(
+                scenario.name,
+                result["disabled_seconds"],
+                result["enabled_seconds"],
+                result["overhead_per_item_us"],
+                result["overhead_share"],
+                baseline_text,
+            )
+        )
+
+    if args.save_baseline:
+        # keep the baseline of scenarios that weren't run this time
+        baseline_results.update(results)
+        _save_baseline(baseline_results)
+    elif regressions:
+        print("Overhead regressed in: {}".format(", ".join(regressions)))
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,24 +8,111 @@
 #           Alternatively the warnings should be populated on the 'item' object which would be preferred.
 #           This would need an upstream patch though the benefit of this approach is that we can neatly access
 #           the warnings without checking pytest warning recorded
+import argparse
+import copy
+import functools
+import hashlib
+import heapq
+import importlib
+import json
+import os
+import random
 import re
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
 import time
 import warnings
+from collections import namedtuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from datetime import timedelta
 from distutils.util import strtobool
 
+import pytest
+from _pytest.outcomes import Exit
+from _pytest.python import Package
+from _pytest.runner import CallInfo
 from _pytest.runner import runtestprotocol
 from croniter import croniter
 
+try:
+    from xdist.scheduler import LoadScheduling
+except ImportError:
+    # pytest-xdist is optional. DynamicRerunXdistScheduling is only ever created by pytest-xdist hooks
+    LoadScheduling = object
+
+try:
+    import tomllib
+except ImportError:
+    # TOML trigger files need Python 3.11 or later, or the toml package on older versions
+    try:
+        import toml as tomllib
+    except ImportError:
+        tomllib = None
+
 DEFAULT_RERUN_ATTEMPTS = 1
+DEFAULT_RERUN_MODE = "deferred"
 DEFAULT_RERUN_SCHEDULE = "* * * * * *"
+DEFAULT_RERUN_WORKERS = 1
+IMMEDIATE_RERUN_MODE = "immediate"
 MARKER_NAME = "dynamicrerun"
 PLUGIN_NAME = "dynamicrerun"
+EVENT_LOG_PLUGIN_NAME = "dynamicrerun-event-log"
+XDIST_FLUSH_ITEM_NAME = "dynamicrerun-xdist-flush"
+XDIST_SCHEDULING_PLUGIN_NAME = "dynamicrerun-xdist-scheduling"
+
+RERUN_MODES = (DEFAULT_RERUN_MODE, IMMEDIATE_RERUN_MODE)
+
+# worker processes run a single node id without the cache provider, and get a base temporary directory of their own
+WORKER_PROCESS_DROPPED_OPTIONS = (
+    "--basetemp",
+    "--cache-clear",
+    "--cache-show",
+    "--failed-first",
+    "--ff",
+    "--last-failed",
+    "--last-failed-no-failures",
+    "--lf",
+    "--lfnf",
+    "--new-first",
+    "--nf",
+    "--stepwise",
+    "--stepwise-reset",
+    "--stepwise-skip",
+    "--sw",
+    "--sw-reset",
+    "--sw-skip",
+)
+
+# worker processes match exception triggers against the exceptions they see, so they need every trigger
+WORKER_PROCESS_FORWARDED_OPTIONS = (
+    "--dynamic-rerun-trigger-file",
+    "--dynamic-rerun-triggers",
+)
 
 DYNAMIC_RERUN_ATTEMPTS_DEST_VAR_NAME = "dynamic_rerun_attempts"
 DYNAMIC_RERUN_DISABLED_DEST_VAR_NAME = "dynamic_rerun_disabled"
+DYNAMIC_RERUN_FRONT_LOAD_DEST_VAR_NAME = "dynamic_rerun_front_load"
+DYNAMIC_RERUN_HISTORY_FILE_DEST_VAR_NAME = "dynamic_rerun_history_file"
+DYNAMIC_RERUN_INTERLEAVE_DEST_VAR_NAME = "dynamic_rerun_interleave"
+DYNAMIC_RERUN_LOG_DEST_VAR_NAME = "dynamic_rerun_log"
+DYNAMIC_RERUN_MODE_DEST_VAR_NAME = "dynamic_rerun_mode"
+DYNAMIC_RERUN_SCAN_WINDOW_DEST_VAR_NAME = "dynamic_rerun_scan_window"
 DYNAMIC_RERUN_SCHEDULE_DEST_VAR_NAME = "dynamic_rerun_schedule"
+DYNAMIC_RERUN_SUPPRESS_DETERMINISTIC_DEST_VAR_NAME = (
+    "dynamic_rerun_suppress_deterministic"
+)
+DYNAMIC_RERUN_TIME_BUDGET_DEST_VAR_NAME = "dynamic_rerun_time_budget"
+DYNAMIC_RERUN_TRIGGER_FILE_DEST_VAR_NAME = "dynamic_rerun_trigger_file"
 DYNAMIC_RERUN_TRIGGERS_DEST_VAR_NAME = "dynamic_rerun_triggers"
+DYNAMIC_RERUN_WORKER_REPORT_FILE_DEST_VAR_NAME = "dynamic_rerun_worker_report_file"
+DYNAMIC_RERUN_WORKERS_DEST_VAR_NAME = "dynamic_rerun_workers"
+DYNAMIC_RERUN_XDIST_SCHEDULING_WORKER_INPUT_NAME = "dynamic_rerun_xdist_scheduling"
 
 
 class ArgumentValue:
@@ -59,391 +146,2821 @@ class ArgumentValue:
     def create_ini_level_argument(cls, argument_value):
         return ArgumentValue(cls.INI, argument_value)
 
-    @classmethod
-    def create_marker_level_argument(cls, argument_value):
-        return ArgumentValue(cls.MARKER, argument_value)
+    @classmethod
+    def create_marker_level_argument(cls, argument_value):
+        return ArgumentValue(cls.MARKER, argument_value)
+
+
+class DynamicRerunBackoffSchedule:
+    # A rerun schedule computed from the amount of reruns already kicked off instead of a cron expression.
+    # Supports a fixed delay ( e.g. 'delay:500ms' ) and exponential backoff with optional jitter
+    # ( e.g. 'backoff:exp(base=1s,max=60s,factor=2,jitter=0.2)' ). Delays are measured from the start of the
+    # previous attempt
+    DELAY_PREFIX = "delay:"
+    EXPONENTIAL_BACKOFF_REGEX = re.compile(r"^backoff:exp(?:\((?P<arguments>.*)\))?$")
+    DURATION_REGEX = re.compile(r"^(?P<amount>\d+(?:\.\d+)?)(?P<unit>ms|s|m|h)?$")
+    DURATION_UNIT_SECONDS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    # keeps unbounded exponential backoffs from overflowing timedelta
+    MAX_DELAY = timedelta(days=365)
+
+    def __init__(self, base, factor=1, max_delay=None, jitter=0):
+        self._base = base
+        self._factor = factor
+        self._max_delay = max_delay
+        self._jitter = jitter
+        self._random = random.Random()
+
+    @property
+    def base(self):
+        return self._base
+
+    @property
+    def factor(self):
+        return self._factor
+
+    @property
+    def jitter(self):
+        return self._jitter
+
+    @property
+    def max_delay(self):
+        return self._max_delay
+
+    @classmethod
+    def _parse_duration(cls, duration):
+        # durations without a unit are in seconds
+        match = cls.DURATION_REGEX.match(duration.strip())
+        if not match:
+            raise ValueError("Invalid duration '{}'".format(duration))
+
+        unit_seconds = cls.DURATION_UNIT_SECONDS[match.group("unit") or "s"]
+        return timedelta(seconds=float(match.group("amount")) * unit_seconds)
+
+    @classmethod
+    def parse(cls, schedule):
+        # returns None for schedules that are not backoff schedules, and raises ValueError for invalid ones
+        if not isinstance(schedule, str):
+            return None
+        schedule = schedule.strip()
+
+        if schedule.startswith(cls.DELAY_PREFIX):
+            delay_offset = len(cls.DELAY_PREFIX)
+            return cls(cls._parse_duration(schedule[delay_offset:]))
+
+        match = cls.EXPONENTIAL_BACKOFF_REGEX.match(schedule)
+        if not match:
+            if schedule.startswith("backoff:"):
+                raise ValueError("Invalid backoff schedule '{}'".format(schedule))
+            return None
+
+        arguments = {}
+        for argument in (match.group("arguments") or "").split(","):
+            if not argument.strip():
+                continue
+
+            name, separator, value = argument.partition("=")
+            if not separator:
+                raise ValueError("Invalid backoff argument '{}'".format(argument))
+            arguments[name.strip()] = value.strip()
+
+        base = cls._parse_duration(arguments.pop("base", "1s"))
+        factor = float(arguments.pop("factor", 2))
+        max_delay = arguments.pop("max", None)
+        if max_delay is not None:
+            max_delay = cls._parse_duration(max_delay)
+        jitter = float(arguments.pop("jitter", 0))
+
+        if arguments:
+            raise ValueError(
+                "Unknown backoff arguments '{}'".format(", ".join(sorted(arguments)))
+            )
+        if factor < 1 or not 0 <= jitter <= 1:
+            raise ValueError("Invalid backoff schedule '{}'".format(schedule))
+
+        return cls(base, factor=factor, max_delay=max_delay, jitter=jitter)
+
+    def get_delay(self, attempt):
+        # attempt is the amount of reruns already kicked off, so the first rerun waits for the base delay
+        try:
+            delay_seconds = self._base.total_seconds() * self._factor ** attempt
+        except OverflowError:
+            delay_seconds = float("inf")
+        if self._jitter:
+            delay_seconds *= 1 + self._random.uniform(-self._jitter, self._jitter)
+
+        max_delay = self._max_delay if self._max_delay is not None else self.MAX_DELAY
+        return timedelta(seconds=min(delay_seconds, max_delay.total_seconds()))
+
+    def get_next_fire_time(self, anchor_time, attempt):
+        return anchor_time + self.get_delay(attempt)
+
+
+class DynamicRerunEventLog:
+    # Writes one JSON line per rerun decision to the --dynamic-rerun-log file. Events are buffered and serialized
+    # in batches, so that logging them doesn't slow down running tests
+    MAX_BUFFERED_EVENTS = 1000
+
+    def __init__(self, path):
+        self._events = []
+        self._log_file = open(path, "a")
+
+    def close(self):
+        self.flush()
+        self._log_file.close()
+
+    def flush(self):
+        if not self._events:
+            return
+
+        self._log_file.write(
+            "".join(
+                json.dumps(event, separators=(",", ":")) + "\n"
+                for event in self._events
+            )
+        )
+        self._log_file.flush()
+        self._events = []
+
+    def log(self, event, nodeid, **fields):
+        logged_event = {"event": event, "nodeid": nodeid, "time": time.time()}
+        logged_event.update(fields)
+
+        self._events.append(logged_event)
+        if len(self._events) >= self.MAX_BUFFERED_EVENTS:
+            self.flush()
+
+
+class DynamicRerunHistory:
+    # Per test history of dynamic reruns, kept across sessions in the pytest cache. Entries are sharded by test
+    # module, so a session only reads and rewrites the shards of the modules it collected instead of one blob
+    # holding every test ever run
+    CACHE_KEY_PREFIX = "dynamicrerun/history/"
+    MAX_DURATIONS = 20
+    MAX_RECENT_OUTCOMES = 20
+
+    def __init__(self, cache):
+        self._cache = cache
+        self._shards = {}
+        self._changed_shard_keys = set()
+
+    @classmethod
+    def _get_shard_key(cls, nodeid):
+        module_path = nodeid.split("::", 1)[0]
+        module_hash = hashlib.sha1(module_path.encode("utf-8")).hexdigest()
+        return cls.CACHE_KEY_PREFIX + module_hash[:16]
+
+    def _get_shard(self, nodeid):
+        shard_key = self._get_shard_key(nodeid)
+        shard = self._shards.get(shard_key)
+        if shard is None:
+            shard = self._cache.get(shard_key, {})
+            if not isinstance(shard, dict):
+                shard = {}
+            self._shards[shard_key] = shard
+
+        return shard_key, shard
+
+    @classmethod
+    def load(cls, cache, nodeids):
+        history = cls(cache)
+        for nodeid in nodeids:
+            history._get_shard(nodeid)
+
+        return history
+
+    def get(self, nodeid):
+        # returns the history entry of nodeid, or None if it has no history yet
+        shard_key, shard = self._get_shard(nodeid)
+        return shard.get(nodeid)
+
+    def get_pass_after_rerun_rate(self, nodeid):
+        # the share of sessions with reruns in which the test eventually passed, or None if it was never rerun
+        entry = self.get(nodeid)
+        if entry is None or not entry["rerun_sessions"]:
+            return None
+
+        return entry["passed_after_rerun"] / entry["rerun_sessions"]
+
+    def is_deterministic_failure(self, nodeid, num_sessions):
+        # whether the test failed in each of its last num_sessions sessions, and was rerun in vain in at least one
+        entry = self.get(nodeid)
+        if entry is None:
+            return False
+
+        recent_outcomes = entry.get("recent_outcomes", [])
+        if len(recent_outcomes) < num_sessions:
+            return False
+
+        num_sessions_offset = -num_sessions
+        recent_outcomes = recent_outcomes[num_sessions_offset:]
+        return "failed_after_rerun" in recent_outcomes and all(
+            outcome in ("failed", "failed_after_rerun") for outcome in recent_outcomes
+        )
+
+    def record(self, nodeid, run_time, attempts, passed, trigger, durations):
+        shard_key, shard = self._get_shard(nodeid)
+        entry = shard.setdefault(
+            nodeid,
+            {
+                "sessions": 0,
+                "attempts": 0,
+                "rerun_sessions": 0,
+                "passed_after_rerun": 0,
+                "failed_sessions": 0,
+                "last_trigger": None,
+                "last_run_time": None,
+                "durations": [],
+                "recent_outcomes": [],
+            },
+        )
+
+        entry["sessions"] += 1
+        entry["attempts"] += attempts
+        if attempts > 1:
+            entry["rerun_sessions"] += 1
+            if passed:
+                entry["passed_after_rerun"] += 1
+        if not passed:
+            entry["failed_sessions"] += 1
+        if trigger is not None:
+            entry["last_trigger"] = trigger
+        entry["last_run_time"] = run_time
+
+        max_durations_offset = -self.MAX_DURATIONS
+        entry["durations"] = (entry["durations"] + durations)[max_durations_offset:]
+
+        outcome = "passed" if passed else "failed"
+        if attempts > 1:
+            outcome += "_after_rerun"
+        max_recent_outcomes_offset = -self.MAX_RECENT_OUTCOMES
+        entry["recent_outcomes"] = (entry.get("recent_outcomes", []) + [outcome])[
+            max_recent_outcomes_offset:
+        ]
+
+        self._changed_shard_keys.add(shard_key)
+
+    def save(self):
+        for shard_key in sorted(self._changed_shard_keys):
+            self._cache.set(shard_key, self._shards[shard_key])
+        self._changed_shard_keys.clear()
+
+
+class DynamicRerunScheduleCache:
+    # Parses every schedule expression once, and memoizes cron next fire times per schedule and anchor second.
+    # Cron schedules can't fire more often than once a second, so every anchor within the same second
+    # shares the same next fire time.
+    # Reruns are scheduled on the monotonic clock using get_delay, so wall clock adjustments made while
+    # waiting on a rerun don't shift it
+    MAX_MEMOIZED_FIRE_TIMES = 4096
+
+    def __init__(self):
+        self._backoff_schedules = {}
+        self._time_iterators = {}
+        self._next_fire_times = OrderedDict()
+
+    def get_backoff_schedule(self, schedule):
+        # returns the parsed backoff schedule, or None for cron schedules
+        if schedule not in self._backoff_schedules:
+            self._backoff_schedules[schedule] = DynamicRerunBackoffSchedule.parse(
+                schedule
+            )
+        return self._backoff_schedules[schedule]
+
+    def get_delay(self, schedule, anchor_time, attempt=0):
+        # the time to wait after anchor_time, a wall clock time, for the schedule to fire next
+        return self.get_next_fire_time(schedule, anchor_time, attempt) - anchor_time
+
+    def get_next_fire_time(self, schedule, anchor_time, attempt=0):
+        # backoff schedules depend on the attempt and may be jittered, so they are computed every time
+        backoff_schedule = self.get_backoff_schedule(schedule)
+        if backoff_schedule is not None:
+            return backoff_schedule.get_next_fire_time(anchor_time, attempt)
+
+        anchor_second = anchor_time.replace(microsecond=0)
+        fire_time_key = (schedule, anchor_second)
+
+        next_fire_time = self._next_fire_times.get(fire_time_key)
+        if next_fire_time is not None:
+            self._next_fire_times.move_to_end(fire_time_key)
+            return next_fire_time
+
+        time_iterator = self._time_iterators.get(schedule)
+        if time_iterator is None:
+            time_iterator = croniter(schedule, anchor_second)
+            self._time_iterators[schedule] = time_iterator
+        else:
+            time_iterator.set_current(anchor_second)
+        next_fire_time = time_iterator.get_next(datetime)
+
+        self._next_fire_times[fire_time_key] = next_fire_time
+        if len(self._next_fire_times) > self.MAX_MEMOIZED_FIRE_TIMES:
+            self._next_fire_times.popitem(last=False)
+
+        return next_fire_time
+
+
+class DynamicRerunScheduler:
+    # A priority queue of the items waiting to be dynamically rerun, keyed on their next fire time.
+    # Items due at the same time are ordered by the order they are scheduled with, which is the priority of their
+    # last trigger followed by the order they were first scheduled in.
+    # Once due, entries move to a second heap keyed on that order. Time only moves forward, so each entry moves at
+    # most once, and popping a few due items at a time never re-sorts the rest.
+    # Removed items are only marked as such, and are skipped once they reach the top of either heap
+    def __init__(self):
+        self._heap = []
+        self._due_heap = []
+        self._entries = {}
+        self._entry_count = 0
+
+    def __contains__(self, item):
+        return item in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _discard_removed_entries(self):
+        while self._heap and self._heap[0][-1] is None:
+            heapq.heappop(self._heap)
+        while self._due_heap and self._due_heap[0][-1][-1] is None:
+            heapq.heappop(self._due_heap)
+
+    def _move_due_entries(self, current_time):
+        self._discard_removed_entries()
+        while self._heap and self._heap[0][0] <= current_time:
+            entry = heapq.heappop(self._heap)
+            heapq.heappush(self._due_heap, (entry[1], entry[2], entry))
+            self._discard_removed_entries()
+
+    def get_fire_time(self, item):
+        return self._entries[item][0]
+
+    def get_next_fire_time(self):
+        next_entry = self.peek()
+        if next_entry is None:
+            return None
+        return next_entry[0]
+
+    def peek(self):
+        # returns the next fire time and the item due at it, or None if no item is scheduled.
+        # Items already found due come first, in their order
+        self._discard_removed_entries()
+        if self._due_heap:
+            entry = self._due_heap[0][-1]
+        elif self._heap:
+            entry = self._heap[0]
+        else:
+            return None
+        return entry[0], entry[-1]
+
+    def pop_due_items(self, current_time, max_items=None):
+        # returns the items due at current_time in their order. With max_items, the due items that come last in
+        # that order are left scheduled
+        self._move_due_entries(current_time)
+        due_items = []
+        while self._due_heap and (max_items is None or len(due_items) < max_items):
+            entry = heapq.heappop(self._due_heap)[-1]
+            if entry[-1] is None:
+                continue
+            del self._entries[entry[-1]]
+            due_items.append(entry[-1])
+        return due_items
+
+    def remove(self, item):
+        entry = self._entries.pop(item, None)
+        if entry is not None:
+            entry[-1] = None
+
+    def schedule(self, item, fire_time, order):
+        self.remove(item)
+
+        # the entry count breaks ties so that items themselves are never compared
+        self._entry_count += 1
+        entry = [fire_time, order, self._entry_count, item]
+        self._entries[item] = entry
+        heapq.heappush(self._heap, entry)
+
+
+class DynamicRerunSettings:
+    # NOTE: Instances of this class are resolved once per distinct marker, flag and INI combination
+    #       and shared between all items resolving to that combination. Please do not mutate them
+    def __init__(
+        self,
+        attempts,
+        disabled,
+        mode,
+        parallel_safe,
+        schedule,
+        triggers,
+        trigger_matcher,
+    ):
+        self._attempts = attempts
+        self._disabled = disabled
+        self._mode = mode
+        self._parallel_safe = parallel_safe
+        self._schedule = schedule
+        self._triggers = triggers
+        self._trigger_matcher = trigger_matcher
+
+    @property
+    def attempts(self):
+        return self._attempts
+
+    @property
+    def disabled(self):
+        return self._disabled
+
+    @property
+    def mode(self):
+        return self._mode
+
+    @property
+    def parallel_safe(self):
+        return self._parallel_safe
+
+    @property
+    def schedule(self):
+        return self._schedule
+
+    @property
+    def triggers(self):
+        return self._triggers
+
+    @property
+    def trigger_matcher(self):
+        return self._trigger_matcher
+
+    @property
+    def is_enabled(self):
+        # don't apply the plugin if required arguments are missing or if the user requested not to run it
+        return bool(self._schedule and self._attempts and not self._disabled)
+
+
+class DynamicRerunTriggerFile:
+    # The trigger signatures read from --dynamic-rerun-trigger-file, each with its own rerun policy. Signatures are
+    # indexed by their trigger, so the policy of the trigger a report matched is found in a single lookup.
+    # Parsed signatures are kept in the pytest cache along with the file's modification time and size, so that large
+    # files are only parsed again once they change instead of by every session and every xdist worker
+    CACHE_KEY_PREFIX = "dynamicrerun/trigger-files/"
+
+    def __init__(self, signatures):
+        self._signatures = OrderedDict()
+        for signature in signatures:
+            # the first signature of a trigger wins, same as the first matching trigger of a report
+            self._signatures.setdefault(signature.trigger, signature)
+
+    @property
+    def triggers(self):
+        return list(self._signatures)
+
+    @classmethod
+    def _get_cache_key(cls, path):
+        path_hash = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()
+        return "{}{}".format(cls.CACHE_KEY_PREFIX, path_hash)
+
+    @staticmethod
+    def _parse_signature(entry):
+        # returns None for entries that aren't a valid signature
+        if not isinstance(entry, dict) or not isinstance(entry.get("trigger"), str):
+            return None
+
+        attempts = entry.get("attempts")
+        if attempts is not None and (
+            not isinstance(attempts, int) or isinstance(attempts, bool) or attempts <= 0
+        ):
+            return None
+
+        schedule = entry.get("schedule")
+        if schedule is not None and (
+            not isinstance(schedule, str) or not _is_valid_schedule(schedule)
+        ):
+            return None
+
+        priority = entry.get("priority", 0)
+        if not isinstance(priority, int) or isinstance(priority, bool):
+            return None
+
+        return DynamicRerunTriggerSignature(
+            entry["trigger"], attempts, schedule, priority
+        )
+
+    @classmethod
+    def _parse_signatures(cls, path):
+        # JSON and TOML files hold a list of signature tables under "signatures". Any other file holds a trigger
+        # per line, without a policy of their own. Raises ValueError if the file can't be parsed
+        with open(path, encoding="utf-8") as trigger_file:
+            text = trigger_file.read()
+
+        extension = os.path.splitext(path)[1].lower()
+        if extension not in (".json", ".toml"):
+            lines = (line.strip() for line in text.splitlines())
+            return [
+                DynamicRerunTriggerSignature(line, None, None, 0)
+                for line in lines
+                if line and not line.startswith("#")
+            ]
+
+        if extension == ".json":
+            data = json.loads(text)
+        elif tomllib is None:
+            raise ValueError("reading TOML files needs Python 3.11 or the toml package")
+        else:
+            data = tomllib.loads(text)
+
+        entries = data.get("signatures") if isinstance(data, dict) else None
+        if not isinstance(entries, list):
+            raise ValueError("expected a list of signatures under 'signatures'")
+
+        signatures = []
+        for entry in entries:
+            signature = cls._parse_signature(entry)
+            if signature is None:
+                warnings.warn(
+                    "Ignoring invalid signature {!r} in dynamic rerun trigger file '{}'".format(
+                        entry, path
+                    )
+                )
+            else:
+                signatures.append(signature)
+
+        return signatures
+
+    def get_signature(self, trigger):
+        # returns the signature of a trigger, or None if the trigger doesn't come from this file
+        return self._signatures.get(trigger)
+
+    @classmethod
+    def load(cls, path, cache=None):
+        # returns None if the file can't be read
+        try:
+            file_stat = os.stat(path)
+            file_version = [file_stat.st_mtime_ns, file_stat.st_size]
+            if cache is not None:
+                cached_value = cache.get(cls._get_cache_key(path), None)
+                if (
+                    isinstance(cached_value, dict)
+                    and cached_value.get("file_version") == file_version
+                ):
+                    return cls(
+                        DynamicRerunTriggerSignature(*fields)
+                        for fields in cached_value["signatures"]
+                    )
+
+            signatures = cls._parse_signatures(path)
+        except (OSError, ValueError) as error:
+            warnings.warn(
+                "Can't read dynamic rerun trigger file '{}': {}. Ignoring it".format(
+                    path, error
+                )
+            )
+            return None
+
+        if cache is not None:
+            cache.set(
+                cls._get_cache_key(path),
+                {
+                    "file_version": file_version,
+                    "signatures": [list(signature) for signature in signatures],
+                },
+            )
+        return cls(signatures)
+
+
+class DynamicRerunTriggerMatcher:
+    # Matches a set of rerun triggers against a piece of text in a single pass per kind of trigger.
+    # Literal triggers ( no regex metacharacters, or an explicit "literal:" prefix ) are merged into a prefix tree
+    # that is compiled once into a regex without capture groups, which re scans at C speed however many literals
+    # there are. Regex triggers are combined into one pattern of named groups, except for those that can't be
+    # safely combined ( back references, numbered conditionals, global inline flags ) which are kept aside and
+    # searched on their own.
+    # Exception triggers ( "exc:module.Class" ) never match text. They are resolved to their class once, and
+    # matched against raised exceptions with isinstance instead, see search_exception
+    CHUNK_OVERLAP = 4 * 1024
+    CHUNK_SIZE = 64 * 1024
+    EXCEPTION_TRIGGER_PREFIX = "exc:"
+    GROUP_NAME_PREFIX = "dynamic_rerun_trigger_"
+    LITERAL_TRIGGER_PREFIX = "literal:"
+    _REGEX_METACHARACTERS_REGEX = re.compile(r"[.^$*+?{}\[\]\\|()]")
+    _UNCOMBINABLE_TRIGGER_REGEX = re.compile(r"\\\d|\(\?P=|\(\?\(\d|^\(\?[aiLmsux]+\)")
+
+    def __init__(self, triggers):
+        self._triggers = [str(trigger) for trigger in triggers]
+
+        combinable_triggers = []
+        self._exception_triggers = []
+        self._literal_to_trigger = {}
+        self._separate_regexes = []
+        for trigger in self._triggers:
+            if trigger.startswith(self.EXCEPTION_TRIGGER_PREFIX):
+                exception_class = self._resolve_exception_class(trigger)
+                if exception_class is not None:
+                    self._exception_triggers.append((trigger, exception_class))
+                continue
+
+            literal = self._get_literal(trigger)
+            if literal is not None:
+                self._literal_to_trigger.setdefault(literal, trigger)
+                continue
+
+            regex = self._compile_trigger(trigger)
+            if regex is None:
+                self._literal_to_trigger.setdefault(trigger, trigger)
+            elif self._UNCOMBINABLE_TRIGGER_REGEX.search(regex.pattern):
+                self._separate_regexes.append((trigger, regex))
+            else:
+                combinable_triggers.append((trigger, regex))
+
+        self._combined_regex = None
+        self._group_name_to_trigger = {}
+        if combinable_triggers:
+            alternatives = []
+            for i, (trigger, regex) in enumerate(combinable_triggers):
+                group_name = "{}{}".format(self.GROUP_NAME_PREFIX, i)
+                self._group_name_to_trigger[group_name] = trigger
+                alternatives.append("(?P<{}>{})".format(group_name, regex.pattern))
+
+            try:
+                self._combined_regex = re.compile("|".join(alternatives))
+            except re.error:
+                # e.g. two triggers define the same named group. Fall back to searching them one by one
+                self._group_name_to_trigger = {}
+                self._separate_regexes = combinable_triggers + self._separate_regexes
+
+        # lets exceptions that match no trigger at all be ruled out with a single isinstance call
+        self._exception_classes = tuple(
+            exception_class for trigger, exception_class in self._exception_triggers
+        )
+
+        self._literal_regex = None
+        if self._literal_to_trigger:
+            self._literal_regex = re.compile(
+                self._get_prefix_tree_pattern(self._literal_to_trigger)
+            )
+
+    @property
+    def triggers(self):
+        return self._triggers
+
+    @staticmethod
+    def _compile_trigger(trigger):
+        # returns None for invalid regexes, which are matched as literals instead
+        try:
+            return re.compile(trigger)
+        except re.error:
+            warnings.warn(
+                "Can't compile invalid dynamic rerun trigger '{}'. "
+                "Matching it as plain text instead".format(trigger)
+            )
+            return None
+
+    @classmethod
+    def _get_literal(cls, trigger):
+        # returns the text a literal trigger matches, or None if the trigger is a regex
+        if trigger.startswith(cls.LITERAL_TRIGGER_PREFIX):
+            prefix_length = len(cls.LITERAL_TRIGGER_PREFIX)
+            return trigger[prefix_length:]
+        if not cls._REGEX_METACHARACTERS_REGEX.search(trigger):
+            return trigger
+        return None
+
+    @classmethod
+    def _get_prefix_tree_pattern(cls, literals):
+        # Builds a prefix tree of literals and turns it into a regex such as "Conn(?:ectionResetError|Refused)".
+        # Each branching point becomes a non-capturing group and each chain of single children a plain string.
+        # Capture groups would stop re from skipping ahead to the possible first characters of a match, so the
+        # matched literal is recovered from the whole match instead. Longer literals win over their own prefixes
+        prefix_tree = {}
+        for literal in literals:
+            node = prefix_tree
+            for character in literal:
+                node = node.setdefault(character, {})
+            # the empty key marks the end of a literal, as no character is empty
+            node[""] = {}
+
+        return cls._get_prefix_tree_node_pattern(prefix_tree)
+
+    @classmethod
+    def _get_prefix_tree_node_pattern(cls, node):
+        alternatives = []
+        for character in sorted(key for key in node if key):
+            child = node[character]
+            chain = re.escape(character)
+            while len(child) == 1 and "" not in child:
+                ((character, child),) = child.items()
+                chain += re.escape(character)
+            alternatives.append(chain + cls._get_prefix_tree_node_pattern(child))
+
+        if not alternatives:
+            return ""
+        pattern = (
+            alternatives[0]
+            if len(alternatives) == 1
+            else "(?:{})".format("|".join(alternatives))
+        )
+        if "" in node:
+            pattern = "(?:{})?".format(pattern)
+        return pattern
+
+    @classmethod
+    def _resolve_exception_class(cls, trigger):
+        # resolves "exc:package.module.Class" to its class, importing its module. Names without a module are looked
+        # up in builtins. Returns None if the name doesn't resolve to an exception class
+        prefix_length = len(cls.EXCEPTION_TRIGGER_PREFIX)
+        name_parts = trigger[prefix_length:].strip().split(".")
+
+        # the module is the longest importable prefix of the name, the rest are attributes ( e.g. nested classes )
+        for num_module_parts in range(len(name_parts) - 1, -1, -1):
+            module_name = ".".join(name_parts[:num_module_parts]) or "builtins"
+            try:
+                value = importlib.import_module(module_name)
+                for attribute_name in name_parts[num_module_parts:]:
+                    value = getattr(value, attribute_name)
+            except Exception:
+                # besides missing modules and attributes, importing a module runs its code, which may raise anything
+                continue
+
+            if isinstance(value, type) and issubclass(value, BaseException):
+                return value
+            break
+
+        warnings.warn(
+            "Can't resolve dynamic rerun trigger '{}' to an exception class. "
+            "Ignoring it".format(trigger)
+        )
+        return None
+
+    def search(self, text):
+        # returns the trigger that matched text, or None if nothing matched. When both a literal and a regex trigger
+        # match, the one matching earliest in text wins
+        matches = []
+        if self._literal_regex is not None:
+            match = self._literal_regex.search(text)
+            if match:
+                matches.append((match.start(), self._literal_to_trigger[match.group()]))
+        if self._combined_regex is not None:
+            match = self._combined_regex.search(text)
+            if match:
+                matches.append(
+                    (match.start(), self._group_name_to_trigger[match.lastgroup])
+                )
+        if matches:
+            return min(matches, key=lambda start_and_trigger: start_and_trigger[0])[1]
+
+        for trigger, regex in self._separate_regexes:
+            if regex.search(text):
+                return trigger
+
+        return None
+
+    def search_exception(self, exception):
+        # returns the first exception trigger that exception, or any exception it was raised from or while handling,
+        # is an instance of. Exceptions are checked from the outermost one inwards, following __cause__ and
+        # __context__. Returns None if nothing matched
+        if not self._exception_classes:
+            return None
+
+        pending_exceptions = [exception]
+        seen_exception_ids = set()
+        while pending_exceptions:
+            exception = pending_exceptions.pop(0)
+            if exception is None or id(exception) in seen_exception_ids:
+                continue
+            seen_exception_ids.add(id(exception))
+
+            if isinstance(exception, self._exception_classes):
+                for trigger, exception_class in self._exception_triggers:
+                    if isinstance(exception, exception_class):
+                        return trigger
+            pending_exceptions.extend((exception.__cause__, exception.__context__))
+
+        return None
+
+    def search_tail(self, text, window_size):
+        # Searches the last window_size characters of text in chunks, starting from its end since errors are usually
+        # logged last. Chunks overlap so that matches of up to CHUNK_OVERLAP characters spanning two chunks are found.
+        # Returns the trigger that matched, or None, along with the offset in text the search stopped at
+        window_start = max(len(text) - window_size, 0)
+        chunk_end = len(text)
+        while True:
+            chunk_start = max(chunk_end - self.CHUNK_SIZE, window_start)
+            matched_trigger = self.search(text[chunk_start:chunk_end])
+            if matched_trigger is not None or chunk_start == window_start:
+                return matched_trigger, chunk_start
+
+            chunk_end = chunk_start + self.CHUNK_OVERLAP
+
+
+class DynamicRerunTriggerSignature(
+    namedtuple("DynamicRerunTriggerSignature", "trigger attempts schedule priority")
+):
+    # A trigger read from a trigger file, along with its rerun policy. Attempts and schedule are None when the
+    # signature doesn't set them, in which case those of the item apply
+    __slots__ = ()
+
+
+class DynamicRerunVerdictCache:
+    # Memoizes the trigger, or None, that each trigger matcher found in a crash message. During an outage many
+    # tests fail with the same message, which then costs a hash lookup instead of a scan for every trigger.
+    # Messages are keyed by their digest so long ones aren't kept around, and matchers by their id as they live
+    # as long as the session does in session.dynamic_rerun_trigger_matcher_cache
+    MAX_VERDICTS = 1024
+
+    def __init__(self):
+        self._verdicts = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def search(self, trigger_matcher, message):
+        message_digest = hashlib.sha1(message.encode("utf-8", "surrogatepass")).digest()
+        verdict_key = (id(trigger_matcher), message_digest)
+
+        if verdict_key in self._verdicts:
+            self.hits += 1
+            self._verdicts.move_to_end(verdict_key)
+            return self._verdicts[verdict_key]
+
+        self.misses += 1
+        matched_trigger = trigger_matcher.search(message)
+        self._verdicts[verdict_key] = matched_trigger
+        if len(self._verdicts) > self.MAX_VERDICTS:
+            self._verdicts.popitem(last=False)
+
+        return matched_trigger
+
+
+class DynamicRerunWaker:
+    # The rerun loop waits on this for its next rerun instead of sleeping, so other threads, signal handlers
+    # and hooks can wake it up early. Reached through session.dynamic_rerun_waker
+    def __init__(self):
+        self._event = threading.Event()
+        self._rerun_requested = False
+        self._stop_requested = False
+
+    @property
+    def stop_requested(self):
+        return self._stop_requested
+
+    def consume_rerun_request(self):
+        rerun_requested = self._rerun_requested
+        self._rerun_requested = False
+        return rerun_requested
+
+    def stop(self):
+        # stop waiting and leave every pending rerun unrun
+        self._stop_requested = True
+        self._event.set()
+
+    def wait(self, timeout):
+        # returns True if woken up before timeout seconds passed
+        woken_up = self._event.wait(timeout)
+        self._event.clear()
+        return woken_up
+
+    def wake_up(self, rerun_now=False):
+        # with rerun_now, every pending rerun runs right away instead of waiting for its schedule
+        if rerun_now:
+            self._rerun_requested = True
+        self._event.set()
+
+
+class DynamicRerunWorkerReporter:
+    # Registered in the pytest processes that run parallel reruns. Writes every report as a JSON line
+    # so that the parent process can log them as if it had run the item itself
+    def __init__(self, config, report_file_path):
+        self._config = config
+        self._report_file = open(report_file_path, "w")
+
+    def close(self):
+        self._report_file.close()
+
+    def pytest_runtest_logreport(self, report):
+        serialized_report = self._config.hook.pytest_report_to_serializable(
+            config=self._config, report=report
+        )
+        self._report_file.write(json.dumps(serialized_report) + "\n")
+
+
+class DynamicRerunXdistFlushItem(pytest.Item):
+    # NOTE: xdist workers only run a test once they know which test comes after it, so that they can tear it down.
+    #       The xdist controller sends this no-op item after every rerun to have it run right away. It is appended to
+    #       the worker's items after the collection was sent to the controller, so it never shows up in the results
+    def runtest(self):
+        pass
+
+
+class DynamicRerunXdistScheduling(LoadScheduling):
+    # Used in place of xdist's LoadScheduling with '--dist load'. Workers tell the controller whether a test
+    # triggered a rerun, and the controller schedules every rerun on a single schedule. Due reruns are handed
+    # to whichever worker is out of tests, and workers are only shut down once no reruns are left
+    def __init__(self, config, log=None):
+        super().__init__(config, log=log)
+        self._dsession = config.pluginmanager.getplugin("dsession")
+        self._collection_indices = None
+        self._event_log = config.pluginmanager.get_plugin(EVENT_LOG_PLUGIN_NAME)
+        self._attempt_end_times = {}
+        self._history_records = OrderedDict()
+        self._node2reruns = {}
+        self._num_reruns_kicked_off = {}
+        self._rerun_orders = {}
+        self._rerun_scheduled_nodeids = set()
+        self._rerun_scheduler = DynamicRerunScheduler()
+        self._rerun_wait_times = {}
+        self._schedule_cache = DynamicRerunScheduleCache()
+        self._triggered_nodeids = set()
+        self._wakeup_timer = None
+
+    @property
+    def _flush_index(self):
+        # the flush item is appended right after the last collected item
+        return len(self.collection)
+
+    @property
+    def tests_finished(self):
+        if not self.collection_is_completed or self.pending or self._rerun_scheduler:
+            return False
+        if any(self.node2pending.values()):
+            return False
+
+        return not any(
+            index != self._flush_index
+            for rerun_indices in self._node2reruns.values()
+            for index in rerun_indices
+        )
+
+    def _dispatch_due_reruns(self):
+        current_time = time.monotonic()
+        idle_nodes = self._get_idle_nodes()
+        due_nodeids = self._rerun_scheduler.pop_due_items(
+            current_time, max_items=len(idle_nodes)
+        )
+        for node, nodeid in zip(idle_nodes, due_nodeids):
+            self._num_reruns_kicked_off[nodeid] += 1
+            # the rerun may be dispatched before the previous attempt's teardown was reported, with no wait at all
+            self._rerun_wait_times[nodeid] = current_time - self._attempt_end_times.get(
+                nodeid, current_time
+            )
+            self._send_reruns(node, [self._get_collection_index(nodeid)])
+
+        self._wake_up_at_next_fire_time()
+
+    def _get_collection_index(self, nodeid):
+        if self._collection_indices is None:
+            self._collection_indices = {
+                collected_nodeid: i
+                for i, collected_nodeid in enumerate(self.collection)
+            }
+        return self._collection_indices[nodeid]
+
+    def _get_idle_nodes(self):
+        # idle workers are done with their tests and only hold on to a flush item
+        if self.collection is None:
+            return []
+
+        return [
+            node
+            for node in self.nodes
+            if not node.shutting_down
+            and not self.node2pending[node]
+            and self._node2reruns[node] == [self._flush_index]
+        ]
+
+    def _record_history(self, report):
+        # the controller runs no tests itself, so the rerun history is built from the reports of every attempt,
+        # the same way _record_dynamic_rerun_history does from items
+        history_record = self._history_records.setdefault(
+            report.nodeid,
+            {
+                "nodeid": report.nodeid,
+                "run_time": round(report.dynamic_rerun_run_time, 3),
+                "attempts": 0,
+                "passed": False,
+                "trigger": None,
+                "durations": [],
+            },
+        )
+        if report.dynamic_rerun_triggering and report.dynamic_rerun_trigger is not None:
+            history_record["trigger"] = report.dynamic_rerun_trigger
+        if report.when == "teardown":
+            history_record["attempts"] += 1
+            history_record["passed"] = report.dynamic_rerun_passed
+            history_record["durations"].append(round(report.dynamic_rerun_duration, 3))
+
+    def _send_reruns(self, node, rerun_indices):
+        rerun_indices = rerun_indices + [self._flush_index]
+        self._node2reruns[node].extend(rerun_indices)
+        node.send_runtest_some(rerun_indices)
+
+    def _shutdown_node(self, node):
+        if self._dsession.shuttingdown:
+            type(node).shutdown(node)
+            return
+
+        # the worker is out of tests, but may still be needed for reruns. Have it run the last test it was sent
+        # and keep it around instead
+        if not self._node2reruns[node]:
+            self._send_reruns(node, [])
+        self._dispatch_due_reruns()
+
+    def _wake_up(self):
+        # this runs on the timer's thread. Queue an event without a node, which the controller passes on to
+        # mark_test_complete on its own thread
+        self._dsession.queue.put(
+            (
+                "runtest_protocol_complete",
+                {"node": None, "item_index": None, "duration": 0},
+            )
+        )
+
+    def _wake_up_at_next_fire_time(self):
+        if self._wakeup_timer is not None:
+            self._wakeup_timer.cancel()
+            self._wakeup_timer = None
+
+        # with no idle workers, the next finished test wakes the controller up instead
+        next_fire_time = self._rerun_scheduler.get_next_fire_time()
+        if next_fire_time is None or not self._get_idle_nodes():
+            return
+
+        sleep_time = next_fire_time - time.monotonic()
+        self._wakeup_timer = threading.Timer(max(sleep_time, 0), self._wake_up)
+        self._wakeup_timer.daemon = True
+        self._wakeup_timer.start()
+
+    def add_node(self, node):
+        super().add_node(node)
+        self._node2reruns[node] = []
+
+        # workers are shut down as soon as they run out of tests. Keep them around for reruns instead
+        node.shutdown = functools.partial(self._shutdown_node, node)
+
+    def close(self):
+        if self._wakeup_timer is not None:
+            self._wakeup_timer.cancel()
+            self._wakeup_timer = None
+
+    def get_history_records(self):
+        return list(self._history_records.values())
+
+    def mark_test_complete(self, node, item_index, duration=0):
+        if node is None:
+            # woken up by _wake_up
+            pass
+        elif item_index in self.node2pending[node]:
+            super().mark_test_complete(node, item_index, duration=duration)
+        else:
+            self._node2reruns[node].remove(item_index)
+
+        self._dispatch_due_reruns()
+
+    def remove_node(self, node):
+        rerun_indices = [
+            index
+            for index in self._node2reruns.pop(node, [])
+            if index != self._flush_index
+        ]
+
+        crashitem = super().remove_node(node)
+        if crashitem is None and rerun_indices:
+            crashitem = self.collection[rerun_indices[0]]
+        return crashitem
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_logreport(self, report):
+        # only reports of tests using this plugin are marked, see _log_reports_for_xdist_controller
+        if not hasattr(report, "dynamic_rerun_triggering"):
+            return
+
+        nodeid = report.nodeid
+        attempt = self._num_reruns_kicked_off.get(nodeid, 0) + 1
+        report.user_properties.extend(
+            _get_attempt_properties(attempt, self._rerun_wait_times.get(nodeid, 0))
+        )
+
+        # events are logged as reports come in, which is slightly after they happened on the worker
+        if report.when == "setup":
+            self._rerun_scheduled_nodeids.discard(nodeid)
+            self._triggered_nodeids.discard(nodeid)
+            _log_dynamic_rerun_event(
+                self._event_log, "attempt_started", nodeid, attempt=attempt
+            )
+        elif report.when == "teardown":
+            self._attempt_end_times[nodeid] = time.monotonic()
+
+        _log_dynamic_rerun_event(
+            self._event_log,
+            "trigger_evaluated",
+            nodeid,
+            attempt=attempt,
+            when=report.when,
+            triggering=report.dynamic_rerun_triggering,
+            trigger=report.dynamic_rerun_trigger,
+        )
+        if report.dynamic_rerun_triggering:
+            self._triggered_nodeids.add(nodeid)
+            if nodeid not in self._rerun_scheduled_nodeids:
+                self._schedule_rerun(report)
+        self._record_history(report)
+
+        if report.when == "teardown":
+            _log_dynamic_rerun_event(
+                self._event_log,
+                "attempt_finished",
+                nodeid,
+                attempt=attempt,
+                passed=report.dynamic_rerun_passed,
+                duration=report.dynamic_rerun_duration,
+            )
+            if nodeid not in self._rerun_scheduled_nodeids:
+                _log_dynamic_rerun_event(
+                    self._event_log,
+                    "item_exhausted"
+                    if nodeid in self._triggered_nodeids
+                    else "item_terminated",
+                    nodeid,
+                    attempt=attempt,
+                )
+
+    def _schedule_rerun(self, report):
+        nodeid = report.nodeid
+        num_reruns_kicked_off = self._num_reruns_kicked_off.setdefault(nodeid, 0)
+        if num_reruns_kicked_off < report.dynamic_rerun_attempts:
+            report.outcome = "dynamically_rerun"
+
+            # worker and controller clocks aren't comparable, so the worker reports how long ago the attempt started
+            run_time = datetime.fromtimestamp(report.dynamic_rerun_run_time)
+            delay = self._schedule_cache.get_delay(
+                report.dynamic_rerun_schedule, run_time, num_reruns_kicked_off
+            )
+            next_run_time = (
+                time.monotonic()
+                - report.dynamic_rerun_elapsed_time
+                + delay.total_seconds()
+            )
+            order = (
+                -report.dynamic_rerun_priority,
+                self._rerun_orders.setdefault(nodeid, len(self._rerun_orders)),
+            )
+            self._rerun_scheduled_nodeids.add(nodeid)
+            self._rerun_scheduler.schedule(nodeid, next_run_time, order)
+            _log_dynamic_rerun_event(
+                self._event_log,
+                "rerun_scheduled",
+                nodeid,
+                attempt=num_reruns_kicked_off + 1,
+                delay=delay.total_seconds(),
+                next_fire_time=_get_wall_clock_time(next_run_time),
+            )
+        elif report.when == "call" and not report.failed:
+            # only mark 'call' as failed to avoid over-reporting errors, same as _process_dynamic_rerun_reports
+            report.outcome = "failed"
+
+
+def _add_dynamic_rerun_attempts_option(parser):
+    group = parser.getgroup(PLUGIN_NAME)
+    group.addoption(
+        "--dynamic-rerun-attempts",
+        action="store",
+        dest=DYNAMIC_RERUN_ATTEMPTS_DEST_VAR_NAME,
+        default=None,
+        help="Set the amount of times reruns should be attempted ( defaults to 1 )",
+    )
+
+    parser.addini(
+        DYNAMIC_RERUN_ATTEMPTS_DEST_VAR_NAME,
+        "default value for --dynamic-rerun-attempts",
+    )
+
+
+def _add_dynamic_rerun_disabled_option(parser):
+    group = parser.getgroup(PLUGIN_NAME)
+    group.addoption(
+        "--dynamic-rerun-disabled",
+        action="store",
+        dest=DYNAMIC_RERUN_DISABLED_DEST_VAR_NAME,
+        default=False,
+        help="Disable the effects of the pytest-dynamicrerun plugin",
+    )
+
+    parser.addini(
+        DYNAMIC_RERUN_DISABLED_DEST_VAR_NAME,
+        "default value for --dynamic-rerun-disabled",
+    )
+
+
+def _add_dynamic_rerun_front_load_option(parser):
+    group = parser.getgroup(PLUGIN_NAME)
+    group.addoption(
+        "--dynamic-rerun-front-load",
+        action="store",
+        dest=DYNAMIC_RERUN_FRONT_LOAD_DEST_VAR_NAME,
+        default=False,
+        help="Run tests that were rerun in previous sessions first, so their rerun waits overlap the rest of the run",
+    )
+
+    parser.addini(
+        DYNAMIC_RERUN_FRONT_LOAD_DEST_VAR_NAME,
+        "default value for --dynamic-rerun-front-load",
+    )
+
+
+def _add_dynamic_rerun_history_file_option(parser):
+    group = parser.getgroup(PLUGIN_NAME)
+    group.addoption(
+        "--dynamic-rerun-history-file",
+        action="store",
+        dest=DYNAMIC_RERUN_HISTORY_FILE_DEST_VAR_NAME,
+        default=None,
+        help="Append the rerun history of every test using this plugin to the given file as JSON lines",
+    )
+
+    parser.addini(
+        DYNAMIC_RERUN_HISTORY_FILE_DEST_VAR_NAME,
+        "default value for --dynamic-rerun-history-file",
+    )
+
+
+def _add_dynamic_rerun_interleave_option(parser):
+    group = parser.getgroup(PLUGIN_NAME)
+    group.addoption(
+        "--dynamic-rerun-interleave",
+        action="store",
+        dest=DYNAMIC_RERUN_INTERLEAVE_DEST_VAR_NAME,
+        default=False,
+        help="Run reruns that are already due in between regular tests instead of only after the last test",
+    )
+
+    parser.addini(
+        DYNAMIC_RERUN_INTERLEAVE_DEST_VAR_NAME,
+        "default value for --dynamic-rerun-interleave",
+    )
+
+
+def _add_dynamic_rerun_log_option(parser):
+    group = parser.getgroup(PLUGIN_NAME)
+    group.addoption(
+        "--dynamic-rerun-log",
+        action="store",
+        dest=DYNAMIC_RERUN_LOG_DEST_VAR_NAME,
+        default=None,
+        help="Write every rerun decision to this file as JSON lines",
+    )
+
+    parser.addini(
+        DYNAMIC_RERUN_LOG_DEST_VAR_NAME, "default value for --dynamic-rerun-log",
+    )
+
+
+def _add_dynamic_rerun_mode_option(parser):
+    group = parser.getgroup(PLUGIN_NAME)
+    group.addoption(
+        "--dynamic-rerun-mode",
+        action="store",
+        dest=DYNAMIC_RERUN_MODE_DEST_VAR_NAME,
+        default=None,
+        help="Set when reruns happen: 'deferred' to rerun once the last test has run, "
+        "or 'immediate' to rerun right after the failing attempt ( defaults to 'deferred' )",
+    )
+
+    parser.addini(
+        DYNAMIC_RERUN_MODE_DEST_VAR_NAME, "default value for --dynamic-rerun-mode",
+    )
+
+
+def _add_dynamic_rerun_scan_window_option(parser):
+    group = parser.getgroup(PLUGIN_NAME)
+    group.addoption(
+        "--dynamic-rerun-scan-window",
+        action="store",
+        dest=DYNAMIC_RERUN_SCAN_WINDOW_DEST_VAR_NAME,
+        default=None,
+        help="Only scan the last N KB of each captured output section for triggers ( defaults to no limit )",
+    )
+
+    parser.addini(
+        DYNAMIC_RERUN_SCAN_WINDOW_DEST_VAR_NAME,
+        "default value for --dynamic-rerun-scan-window",
+    )
+
+
+def _add_dynamic_rerun_schedule_option(parser):
+    group = parser.getgroup(PLUGIN_NAME)
+    group.addoption(
+        "--dynamic-rerun-schedule",
+        action="store",
+        dest=DYNAMIC_RERUN_SCHEDULE_DEST_VAR_NAME,
+        default=None,
+        help="Set the time to attempt a rerun in using a cron like format ( e.g.: '* * * * *' ) "
+        "or a backoff policy ( e.g.: 'delay:500ms' or 'backoff:exp(base=1s,max=60s,jitter=0.2)' )",
+    )
+
+    parser.addini(
+        DYNAMIC_RERUN_SCHEDULE_DEST_VAR_NAME,
+        "default value for --dyamic-rerun-schedule",
+    )
+
+
+def _add_dynamic_rerun_suppress_deterministic_option(parser):
+    group = parser.getgroup(PLUGIN_NAME)
+    group.addoption(
+        "--dynamic-rerun-suppress-deterministic",
+        action="store",
+        dest=DYNAMIC_RERUN_SUPPRESS_DETERMINISTIC_DEST_VAR_NAME,
+        default=None,
+        help="Don't rerun tests that failed even after reruns in each of their last N sessions, "
+        "according to the rerun history",
+    )
+
+    parser.addini(
+        DYNAMIC_RERUN_SUPPRESS_DETERMINISTIC_DEST_VAR_NAME,
+        "default value for --dynamic-rerun-suppress-deterministic",
+    )
+
+
+def _add_dynamic_rerun_time_budget_option(parser):
+    group = parser.getgroup(PLUGIN_NAME)
+    group.addoption(
+        "--dynamic-rerun-time-budget",
+        action="store",
+        dest=DYNAMIC_RERUN_TIME_BUDGET_DEST_VAR_NAME,
+        default=None,
+        help="Set the maximum amount of seconds to spend on reruns once the last test has run ( defaults to no limit )",
+    )
+
+    parser.addini(
+        DYNAMIC_RERUN_TIME_BUDGET_DEST_VAR_NAME,
+        "default value for --dynamic-rerun-time-budget",
+    )
+
+
+def _add_dynamic_rerun_trigger_file_option(parser):
+    group = parser.getgroup(PLUGIN_NAME)
+    group.addoption(
+        "--dynamic-rerun-trigger-file",
+        action="store",
+        dest=DYNAMIC_RERUN_TRIGGER_FILE_DEST_VAR_NAME,
+        default=None,
+        help="Load additional triggers, each with its own attempts, schedule and priority, from a JSON, "
+        "TOML or plain text file",
+    )
+
+    parser.addini(
+        DYNAMIC_RERUN_TRIGGER_FILE_DEST_VAR_NAME,
+        "default value for --dynamic-rerun-trigger-file",
+    )
+
+
+def _add_dynamic_rerun_triggers_option(parser):
+    group = parser.getgroup(PLUGIN_NAME)
+    group.addoption(
+        "--dynamic-rerun-triggers",
+        action="append",
+        dest=DYNAMIC_RERUN_TRIGGERS_DEST_VAR_NAME,
+        default=None,
+        help="Set pytest output that will trigger dynamic reruns. By default all failing tests are dynamically rerun",
+    )
+
+    parser.addini(
+        DYNAMIC_RERUN_TRIGGERS_DEST_VAR_NAME,
+        "default value for --dyamic-rerun-triggers",
+        type="linelist",
+    )
+
+
+def _add_dynamic_rerun_workers_option(parser):
+    group = parser.getgroup(PLUGIN_NAME)
+    group.addoption(
+        "--dynamic-rerun-workers",
+        action="store",
+        dest=DYNAMIC_RERUN_WORKERS_DEST_VAR_NAME,
+        default=None,
+        help="Set the amount of worker processes used to run due parallel_safe reruns concurrently ( defaults to 1 )",
+    )
+    group.addoption(
+        "--dynamic-rerun-worker-report-file",
+        action="store",
+        dest=DYNAMIC_RERUN_WORKER_REPORT_FILE_DEST_VAR_NAME,
+        default=None,
+        help=argparse.SUPPRESS,
+    )
+
+    parser.addini(
+        DYNAMIC_RERUN_WORKERS_DEST_VAR_NAME,
+        "default value for --dynamic-rerun-workers",
+    )
+
+
+def _apply_trigger_signature(item, trigger):
+    # the policy of the last trigger file signature a report matched applies to the following reruns of the item.
+    # Items whose reruns were suppressed stay suppressed
+    trigger_file = item.session.dynamic_rerun_trigger_file
+    if trigger_file is None or item._dynamic_rerun_suppressed:
+        return
+
+    signature = trigger_file.get_signature(trigger)
+    if signature is None:
+        return
+
+    settings = item.dynamic_rerun_settings
+    item.max_allowed_dynamic_rerun_attempts = signature.attempts or settings.attempts
+    item.dynamic_rerun_schedule = signature.schedule or settings.schedule
+    item._dynamic_rerun_priority = signature.priority
+
+
+def _find_rerun_trigger(item, report):
+    trigger_matcher = item.dynamic_rerun_settings.trigger_matcher
+
+    section_offset = item._dynamic_rerun_section_offset
+    new_sections = report.sections[section_offset:]
+    item._dynamic_rerun_section_offset = len(report.sections)
+
+    # exception triggers were already matched against the raised exception, see pytest_runtest_makereport
+    matched_trigger = getattr(report, "_dynamic_rerun_exception_trigger", None)
+    if matched_trigger is not None:
+        return matched_trigger
+
+    # NOTE: Checking for both report.longrepr and reprcrash on report.longrepr is intentional
+    report_has_reprcrash = report.longrepr and hasattr(report.longrepr, "reprcrash")
+    if report_has_reprcrash:
+        matched_trigger = item.session.dynamic_rerun_verdict_cache.search(
+            trigger_matcher, report.longrepr.reprcrash.message
+        )
+        if matched_trigger is not None:
+            return matched_trigger
+
+    # records the part of each section that was scanned, as ( section title, start offset, end offset )
+    scan_window = item.session.dynamic_rerun_scan_window
+    for section_title, section_text in new_sections:
+        if section_title in ["Captured stdout call", "Captured stderr call"]:
+            if scan_window is None:
+                matched_trigger = trigger_matcher.search(section_text)
+                scan_start = 0
+            else:
+                matched_trigger, scan_start = trigger_matcher.search_tail(
+                    section_text, scan_window
+                )
+            report.dynamic_rerun_scanned_sections.append(
+                (section_title, scan_start, len(section_text))
+            )
+
+            if matched_trigger is not None:
+                return matched_trigger
+
+    return None
+
+
+def _freeze_marker_value(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze_marker_value(element) for element in value)
+
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+def _front_load_rerun_prone_items(session, items):
+    history = session.dynamic_rerun_history
+    if history is None:
+        return
+
+    # A rerun can only be scheduled once its item has run. Running the items that were rerun in previous sessions
+    # first lets their rerun waits elapse while the rest of the suite runs, instead of after the last test.
+    # The partition is stable, so items keep their relative order and mostly stay grouped by module
+    rerun_prone_items = []
+    other_items = []
+    for item in items:
+        entry = history.get(item.nodeid)
+        if (
+            item.dynamic_rerun_settings.is_enabled
+            and not item._dynamic_rerun_suppressed
+            and entry is not None
+            and entry["rerun_sessions"]
+        ):
+            rerun_prone_items.append(item)
+        else:
+            other_items.append(item)
+
+    items[:] = rerun_prone_items + other_items
+
+
+def _get_arg(item, marker_param_name, dest_var_param_name):
+    marker = item.get_closest_marker(MARKER_NAME)
+
+    # The priority followed is: marker, then command line switch, then config INI file
+    if (
+        marker
+        and marker_param_name in marker.kwargs.keys()
+        and marker.kwargs[marker_param_name]
+    ):
+        arg = marker.kwargs[marker_param_name]
+        argument_value = ArgumentValue.create_marker_level_argument(arg)
+    else:
+        argument_value = _get_config_arg(item.session.config, dest_var_param_name)
+
+    return argument_value
+
+
+def _get_attempt_properties(attempt, wait_time):
+    # the attempt index starts at 1 for the first run. The wait time is the time between the end of the previous
+    # attempt and the start of this one, or 0 for the first run
+    return [("dynamic_rerun_attempt", attempt), ("dynamic_rerun_wait_time", wait_time)]
+
+
+def _get_bool_arg_value(argument_value):
+    #  see https://docs.python.org/3/distutils/apiref.html#distutils.util.strtobool for true and false values
+    if isinstance(argument_value, str):
+        try:
+            argument_value = strtobool(argument_value)
+        except ValueError:
+            argument_value = False
+
+    return bool(argument_value)
+
+
+def _get_config_arg(config, dest_var_param_name):
+    config_option_dict = vars(config.option)
+
+    # The priority followed is: command line switch, then config INI file
+    if (
+        dest_var_param_name in config_option_dict.keys()
+        and config_option_dict[dest_var_param_name]
+    ):
+        arg = config_option_dict[dest_var_param_name]
+        argument_value = ArgumentValue.create_flag_level_argument(arg)
+    else:
+        arg = config.getini(dest_var_param_name)
+        argument_value = ArgumentValue.create_ini_level_argument(arg)
+
+    return argument_value
+
+
+def _get_dynamic_rerun_attempts_arg(item):
+    marker_param_name = "attempts"
+    warnings_text = "Rerun attempts must be a positive integer. Using default value '{}'".format(
+        DEFAULT_RERUN_ATTEMPTS
+    )
+
+    dynamic_rerun_attempts = _get_arg(
+        item, marker_param_name, DYNAMIC_RERUN_ATTEMPTS_DEST_VAR_NAME
+    )
+    dynamic_rerun_attempts_value = dynamic_rerun_attempts.argument_value
+
+    try:
+        dynamic_rerun_attempts_value = int(dynamic_rerun_attempts_value)
+    except (ValueError, TypeError):
+        warnings.warn(warnings_text)
+        dynamic_rerun_attempts_value = DEFAULT_RERUN_ATTEMPTS
+
+    if dynamic_rerun_attempts_value <= 0:
+        warnings.warn(warnings_text)
+        dynamic_rerun_attempts_value = DEFAULT_RERUN_ATTEMPTS
+
+    return dynamic_rerun_attempts_value
+
+
+def _get_dynamic_rerun_disabled_arg(item):
+    marker_param_name = "disabled"
+
+    dynamic_rerun_disabled = _get_arg(
+        item, marker_param_name, DYNAMIC_RERUN_DISABLED_DEST_VAR_NAME
+    )
+    return _get_bool_arg_value(dynamic_rerun_disabled.argument_value)
+
+
+def _get_dynamic_rerun_front_load_arg(config):
+    dynamic_rerun_front_load = _get_config_arg(
+        config, DYNAMIC_RERUN_FRONT_LOAD_DEST_VAR_NAME
+    )
+    return _get_bool_arg_value(dynamic_rerun_front_load.argument_value)
+
+
+def _get_dynamic_rerun_history_file_arg(config):
+    dynamic_rerun_history_file = _get_config_arg(
+        config, DYNAMIC_RERUN_HISTORY_FILE_DEST_VAR_NAME
+    )
+    return dynamic_rerun_history_file.argument_value or None
+
+
+def _get_dynamic_rerun_interleave_arg(config):
+    dynamic_rerun_interleave = _get_config_arg(
+        config, DYNAMIC_RERUN_INTERLEAVE_DEST_VAR_NAME
+    )
+    return _get_bool_arg_value(dynamic_rerun_interleave.argument_value)
+
+
+def _get_dynamic_rerun_log_arg(config):
+    dynamic_rerun_log = _get_config_arg(config, DYNAMIC_RERUN_LOG_DEST_VAR_NAME)
+    event_log_path = dynamic_rerun_log.argument_value or None
+
+    workerinput = getattr(config, "workerinput", None)
+    if event_log_path is None or workerinput is None:
+        return event_log_path
+
+    # with xdist load scheduling the controller logs the events of its workers. Otherwise every worker runs its own
+    # reruns, and logs them to its own file
+    if workerinput.get(DYNAMIC_RERUN_XDIST_SCHEDULING_WORKER_INPUT_NAME, False):
+        return None
+    return "{}.{}".format(event_log_path, workerinput["workerid"])
+
+
+def _get_dynamic_rerun_mode_arg(item):
+    marker_param_name = "mode"
+
+    dynamic_rerun_mode = _get_arg(
+        item, marker_param_name, DYNAMIC_RERUN_MODE_DEST_VAR_NAME
+    )
+    dynamic_rerun_mode_value = dynamic_rerun_mode.argument_value
+
+    if not dynamic_rerun_mode_value:
+        return DEFAULT_RERUN_MODE
+
+    if dynamic_rerun_mode_value not in RERUN_MODES:
+        warnings.warn(
+            "Rerun mode must be one of {}. Ignoring dynamic rerun mode '{}' and using default '{}'".format(
+                ", ".join("'{}'".format(mode) for mode in RERUN_MODES),
+                dynamic_rerun_mode_value,
+                DEFAULT_RERUN_MODE,
+            )
+        )
+        dynamic_rerun_mode_value = DEFAULT_RERUN_MODE
+
+    return dynamic_rerun_mode_value
+
+
+def _get_dynamic_rerun_parallel_safe_arg(item):
+    # this is only ever set per test, since only the test author knows whether it is safe to run in parallel
+    marker = item.get_closest_marker(MARKER_NAME)
+    if marker is None:
+        return False
+
+    return _get_bool_arg_value(marker.kwargs.get("parallel_safe", False))
+
+
+def _get_dynamic_rerun_scan_window_arg(config):
+    dynamic_rerun_scan_window = _get_config_arg(
+        config, DYNAMIC_RERUN_SCAN_WINDOW_DEST_VAR_NAME
+    )
+    dynamic_rerun_scan_window_value = dynamic_rerun_scan_window.argument_value
+    if not dynamic_rerun_scan_window_value:
+        return None
+
+    try:
+        dynamic_rerun_scan_window_value = int(dynamic_rerun_scan_window_value)
+    except (ValueError, TypeError):
+        dynamic_rerun_scan_window_value = 0
+
+    if dynamic_rerun_scan_window_value <= 0:
+        warnings.warn(
+            "Scan window must be a positive amount of KB. Ignoring scan window '{}'".format(
+                dynamic_rerun_scan_window.argument_value
+            )
+        )
+        return None
+
+    # captured output is text, so the window is counted in characters
+    return dynamic_rerun_scan_window_value * 1024
+
+
+def _get_dynamic_rerun_schedule_arg(item):
+    marker_param_name = "schedule"
+
+    dynamic_rerun_schedule = _get_arg(
+        item, marker_param_name, DYNAMIC_RERUN_SCHEDULE_DEST_VAR_NAME
+    )
+    dynamic_rerun_schedule_value = dynamic_rerun_schedule.argument_value
+
+    if dynamic_rerun_schedule_value and not _is_valid_schedule(
+        dynamic_rerun_schedule_value
+    ):
+        warnings.warn(
+            "Can't parse invalid dynamic rerun schedule '{}'. "
+            "Ignoring dynamic rerun schedule and using default '{}'".format(
+                dynamic_rerun_schedule_value, DEFAULT_RERUN_SCHEDULE
+            )
+        )
+        dynamic_rerun_schedule_value = DEFAULT_RERUN_SCHEDULE
+
+    return dynamic_rerun_schedule_value
+
+
+def _get_dynamic_rerun_settings_key(item):
+    # Flag and INI values are fixed for the whole session, so only marker arguments can tell
+    # two items' settings apart
+    marker = item.get_closest_marker(MARKER_NAME)
+    if marker is None:
+        return ()
+
+    return tuple(
+        sorted(
+            (name, type(value).__name__, _freeze_marker_value(value))
+            for name, value in marker.kwargs.items()
+        )
+    )
+
+
+def _get_dynamic_rerun_suppress_deterministic_arg(config):
+    dynamic_rerun_suppress_deterministic = _get_config_arg(
+        config, DYNAMIC_RERUN_SUPPRESS_DETERMINISTIC_DEST_VAR_NAME
+    )
+    dynamic_rerun_suppress_deterministic_value = (
+        dynamic_rerun_suppress_deterministic.argument_value
+    )
+    if not dynamic_rerun_suppress_deterministic_value:
+        return None
+
+    try:
+        dynamic_rerun_suppress_deterministic_value = int(
+            dynamic_rerun_suppress_deterministic_value
+        )
+    except (ValueError, TypeError):
+        dynamic_rerun_suppress_deterministic_value = 0
+
+    if dynamic_rerun_suppress_deterministic_value <= 0:
+        warnings.warn(
+            "Deterministic failure sessions must be a positive integer. "
+            "Not suppressing reruns for '{}'".format(
+                dynamic_rerun_suppress_deterministic.argument_value
+            )
+        )
+        return None
+
+    return dynamic_rerun_suppress_deterministic_value
+
+
+def _get_dynamic_rerun_time_budget_arg(config):
+    dynamic_rerun_time_budget = _get_config_arg(
+        config, DYNAMIC_RERUN_TIME_BUDGET_DEST_VAR_NAME
+    )
+    dynamic_rerun_time_budget_value = dynamic_rerun_time_budget.argument_value
+    if not dynamic_rerun_time_budget_value:
+        return None
+
+    try:
+        dynamic_rerun_time_budget_value = float(dynamic_rerun_time_budget_value)
+    except (ValueError, TypeError):
+        dynamic_rerun_time_budget_value = 0
+
+    if dynamic_rerun_time_budget_value <= 0:
+        warnings.warn(
+            "Rerun time budget must be a positive number of seconds. Ignoring rerun time budget '{}'".format(
+                dynamic_rerun_time_budget.argument_value
+            )
+        )
+        return None
+
+    return timedelta(seconds=dynamic_rerun_time_budget_value)
+
+
+def _get_dynamic_rerun_triggers_arg(item):
+    marker_param_name = "triggers"
+
+    dynamic_rerun_triggers = _get_arg(
+        item, marker_param_name, DYNAMIC_RERUN_TRIGGERS_DEST_VAR_NAME
+    )
+    dynamic_rerun_triggers_value = dynamic_rerun_triggers.argument_value
+
+    if not isinstance(dynamic_rerun_triggers_value, list):
+        return [dynamic_rerun_triggers_value]
+    return dynamic_rerun_triggers_value
+
+
+def _get_dynamic_rerun_workers_arg(config):
+    warnings_text = "Rerun workers must be a positive integer. Using default value '{}'".format(
+        DEFAULT_RERUN_WORKERS
+    )
+
+    dynamic_rerun_workers = _get_config_arg(config, DYNAMIC_RERUN_WORKERS_DEST_VAR_NAME)
+    dynamic_rerun_workers_value = dynamic_rerun_workers.argument_value
+    if not dynamic_rerun_workers_value:
+        return DEFAULT_RERUN_WORKERS
+
+    try:
+        dynamic_rerun_workers_value = int(dynamic_rerun_workers_value)
+    except (ValueError, TypeError):
+        warnings.warn(warnings_text)
+        dynamic_rerun_workers_value = DEFAULT_RERUN_WORKERS
+
+    if dynamic_rerun_workers_value <= 0:
+        warnings.warn(warnings_text)
+        dynamic_rerun_workers_value = DEFAULT_RERUN_WORKERS
+
+    return dynamic_rerun_workers_value
+
+
+def _get_item_history_records(session):
+    history_records = []
+    for item in getattr(session, "items", []):
+        # only items whose attempts were processed in this process have a complete history
+        if not getattr(item, "dynamic_rerun_durations", None):
+            continue
+
+        history_records.append(
+            {
+                "nodeid": item.nodeid,
+                "run_time": round(item.dynamic_rerun_run_times[0].timestamp(), 3),
+                "attempts": len(item.dynamic_rerun_durations),
+                "passed": item._dynamic_rerun_passed,
+                "trigger": item._dynamic_rerun_trigger,
+                "durations": [
+                    round(duration.total_seconds(), 3)
+                    for duration in item.dynamic_rerun_durations
+                ],
+            }
+        )
+
+    return history_records
+
+
+def _get_outermost_failed_setup_node(item):
+    # returns the node closest to the session that still holds a setup error, or None if the item's own function
+    # scoped fixtures failed, which the teardown towards the item's parent already cleared
+    chain = item.listchain()
+    failed_setup_nodes = []
+
+    # pytest 7 turned SetupState.stack into a dict holding the setup error of each node
+    setup_state = item.session._setupstate
+    if isinstance(setup_state.stack, dict):
+        failed_setup_nodes.extend(
+            node for node, (_, setup_error) in setup_state.stack.items() if setup_error
+        )
+    else:
+        failed_setup_nodes.extend(
+            node for node in setup_state.stack if getattr(node, "_prepare_exc", None)
+        )
+
+    scope_node_classes = {
+        "class": pytest.Class,
+        "module": pytest.Module,
+        "package": Package,
+    }
+    for fixture_defs in item._fixtureinfo.name2fixturedefs.values():
+        for fixture_def in fixture_defs:
+            cached_result = fixture_def.cached_result
+            if (
+                fixture_def.scope == "function"
+                or cached_result is None
+                or not cached_result[2]
+            ):
+                continue
+
+            scope_node_class = scope_node_classes.get(fixture_def.scope)
+            scope_node = scope_node_class and item.getparent(scope_node_class)
+            failed_setup_nodes.append(scope_node or item.session)
+
+    failed_setup_nodes = [node for node in failed_setup_nodes if node in chain]
+    if not failed_setup_nodes:
+        return None
+    return min(failed_setup_nodes, key=chain.index)
+
+
+def _get_phase_duration_properties(reports):
+    return [
+        ("dynamic_rerun_{}_duration".format(report.when), report.duration)
+        for report in reports
+    ]
+
+
+def _get_trigger_matcher(session, triggers):
+    if not triggers:
+        return None
+
+    matcher_cache = session.dynamic_rerun_trigger_matcher_cache
+    matcher_key = tuple(triggers)
+
+    trigger_matcher = matcher_cache.get(matcher_key)
+    if trigger_matcher is None:
+        trigger_matcher = DynamicRerunTriggerMatcher(triggers)
+        matcher_cache[matcher_key] = trigger_matcher
+
+    return trigger_matcher
+
+
+def _get_wall_clock_time(monotonic_time):
+    # reruns are scheduled on the monotonic clock, which has no meaning outside of this process
+    return time.time() + monotonic_time - time.monotonic()
+
+
+def _get_worker_process_args(config, nodeid, report_file_path):
+    rootdir = str(getattr(config, "rootpath", None) or config.rootdir)
+    inifile = getattr(config, "inipath", None) or getattr(config, "inifile", None)
+
+    # the worker runs in the invocation directory, so relative paths in the options it shares with this session
+    # keep pointing at the same files
+    args = [sys.executable, "-m", "pytest", os.path.join(rootdir, nodeid)]
+    args.extend(_get_worker_process_options(config, config.invocation_params.args))
+    args.extend(
+        [
+            "--rootdir",
+            rootdir,
+            # addopts may hold this plugin's own options, which must not apply to the worker
+            "-o",
+            "addopts={}".format(
+                _quote_args(
+                    _get_worker_process_options(config, config.getini("addopts"))
+                )
+            ),
+            "-p",
+            "no:cacheprovider",
+            "--dynamic-rerun-disabled=True",
+            "--dynamic-rerun-worker-report-file",
+            report_file_path,
+        ]
+    )
+    if inifile:
+        args.extend(["-c", str(inifile)])
+
+    # the worker must not wipe this session's base temporary directory, so it gets a directory of its own inside it
+    tmp_path_factory = getattr(config, "_tmp_path_factory", None)
+    if config.option.basetemp and tmp_path_factory is not None:
+        worker_name = os.path.splitext(os.path.basename(report_file_path))[0]
+        args.append(
+            "--basetemp={}".format(
+                os.path.join(
+                    str(tmp_path_factory.getbasetemp()),
+                    "dynamicrerun-worker-{}".format(worker_name),
+                )
+            )
+        )
+
+    return args
+
+
+def _get_worker_process_env(config):
+    env = dict(os.environ)
+    if env.get("PYTEST_ADDOPTS"):
+        env["PYTEST_ADDOPTS"] = _quote_args(
+            _get_worker_process_options(config, shlex.split(env["PYTEST_ADDOPTS"]))
+        )
+    return env
+
+
+def _get_worker_process_options(config, args):
+    # returns the options in args that the worker should share with this session. File or node id arguments,
+    # this plugin's own options other than its triggers and options the worker can't honor are dropped
+    option_actions = getattr(
+        getattr(config._parser, "optparser", None), "_option_string_actions", {}
+    )
+
+    options = []
+    i = 0
+    while i < len(args):
+        arg = str(args[i])
+        option_string = arg.split("=", 1)[0]
+        action = option_actions.get(option_string)
+
+        option_end = i + 1
+        if "=" not in arg and action is not None and action.nargs not in (0, "?"):
+            option_end += 1
+
+        if (
+            arg.startswith("-")
+            and arg != "-"
+            and (
+                not option_string.startswith("--dynamic-rerun-")
+                or option_string in WORKER_PROCESS_FORWARDED_OPTIONS
+            )
+            and option_string not in WORKER_PROCESS_DROPPED_OPTIONS
+        ):
+            options.extend(str(option_arg) for option_arg in args[i:option_end])
+        i = option_end
+
+    return options
+
+
+def _initialize_plugin_item_level_fields(item):
+    settings = _resolve_dynamic_rerun_settings(item)
+    item.dynamic_rerun_settings = settings
+
+    item.dynamic_rerun_disabled = settings.disabled
+    item.dynamic_rerun_mode = settings.mode
+    item.dynamic_rerun_schedule = settings.schedule
+    item.dynamic_rerun_triggers = settings.triggers
+    item.max_allowed_dynamic_rerun_attempts = settings.attempts
+
+    item.dynamic_rerun_durations = []
+    item.dynamic_rerun_run_times = []
+    item.dynamic_rerun_sleep_times = []
+    item.num_dynamic_reruns_kicked_off = 0
+    item._dynamic_rerun_terminated = False
+
+    # The monotonic clock time the last attempt started at. Reruns are scheduled and waited on using the monotonic
+    # clock, so that they keep sub second precision and aren't shifted by wall clock adjustments ( e.g. NTP )
+    item._dynamic_rerun_monotonic_run_time = None
+
+    # Whether reruns were suppressed since the rerun history shows the item failing deterministically
+    item._dynamic_rerun_suppressed = False
+
+    # Whether the last attempt passed, and the last trigger that matched. Recorded in the rerun history
+    item._dynamic_rerun_passed = False
+    item._dynamic_rerun_trigger = None
+
+    # The timing of every attempt so far, added to the user_properties of each report. The teardown reports of
+    # attempts that trigger a rerun aren't logged, so junitxml only writes the properties of the last attempt's
+    # teardown report, which has to hold those of all previous attempts too
+    item._dynamic_rerun_timing_properties = []
+
+    # The report that scheduled the pending rerun, logged as failed if the rerun is skipped
+    item._dynamic_rerun_last_report = None
+
+    # The position of this item in session.dynamic_rerun_items, set the first time it is scheduled for a rerun
+    item._dynamic_rerun_order = None
+
+    # The priority of the last trigger file signature that matched. Higher priority reruns run first when due
+    item._dynamic_rerun_priority = 0
+
+    # The offset of the first section not yet scanned for triggers. report.sections is not stage or attempt aware:
+    # the 'teardown' report holds all of the sections of 'call' + new teardown sections, and every attempt's reports
+    # hold the sections of all previous attempts. Scanning from this offset checks each section once per attempt
+    item._dynamic_rerun_section_offset = 0
+
+
+def _is_rerun_triggering_report(item, report):
+    report.dynamic_rerun_scanned_sections = []
+    if item.dynamic_rerun_settings.trigger_matcher is None:
+        report.dynamic_rerun_trigger = None
+        return report.failed
+
+    report.dynamic_rerun_trigger = _find_rerun_trigger(item, report)
+    return report.dynamic_rerun_trigger is not None
+
+
+def _is_valid_schedule(schedule):
+    try:
+        backoff_schedule = DynamicRerunBackoffSchedule.parse(schedule)
+    except ValueError:
+        return False
+
+    return backoff_schedule is not None or croniter.is_valid(schedule)
 
 
-def _add_dynamic_rerun_attempts_option(parser):
-    group = parser.getgroup(PLUGIN_NAME)
-    group.addoption(
-        "--dynamic-rerun-attempts",
-        action="store",
-        dest=DYNAMIC_RERUN_ATTEMPTS_DEST_VAR_NAME,
-        default=None,
-        help="Set the amount of times reruns should be attempted ( defaults to 1 )",
+def _is_xdist_load_scheduling(config):
+    # sessions with this plugin disabled keep xdist's own scheduler. Reruns enabled again through the marker are
+    # then run by the workers themselves, as with the other distribution modes
+    dynamic_rerun_disabled = _get_config_arg(
+        config, DYNAMIC_RERUN_DISABLED_DEST_VAR_NAME
     )
-
-    parser.addini(
-        DYNAMIC_RERUN_ATTEMPTS_DEST_VAR_NAME,
-        "default value for --dynamic-rerun-attempts",
+    return config.getoption("dist") == "load" and not _get_bool_arg_value(
+        dynamic_rerun_disabled.argument_value
     )
 
 
-def _add_dynamic_rerun_disabled_option(parser):
-    group = parser.getgroup(PLUGIN_NAME)
-    group.addoption(
-        "--dynamic-rerun-disabled",
-        action="store",
-        dest=DYNAMIC_RERUN_DISABLED_DEST_VAR_NAME,
-        default=False,
-        help="Disable the effects of the pytest-dynamicrerun plugin",
-    )
+def _kick_off_dynamic_rerun(item, current_time):
+    item.num_dynamic_reruns_kicked_off += 1
 
-    parser.addini(
-        DYNAMIC_RERUN_DISABLED_DEST_VAR_NAME,
-        "default value for --dynamic-rerun-disabled",
-    )
+    sleep_time = current_time - item._dynamic_rerun_monotonic_run_time
+    item.dynamic_rerun_sleep_times.append(timedelta(seconds=sleep_time))
 
 
-def _add_dynamic_rerun_schedule_option(parser):
-    group = parser.getgroup(PLUGIN_NAME)
-    group.addoption(
-        "--dynamic-rerun-schedule",
-        action="store",
-        dest=DYNAMIC_RERUN_SCHEDULE_DEST_VAR_NAME,
-        default=None,
-        help="Set the time to attempt a rerun in using a cron like format ( e.g.: '* * * * *' )",
-    )
+def _load_dynamic_rerun_history(session, items):
+    # xdist workers only read the history. It is recorded by the controller, see _record_dynamic_rerun_history
+    cache = getattr(session.config, "cache", None)
+    if cache is None:
+        return None
 
-    parser.addini(
-        DYNAMIC_RERUN_SCHEDULE_DEST_VAR_NAME,
-        "default value for --dyamic-rerun-schedule",
+    return DynamicRerunHistory.load(
+        cache, [item.nodeid for item in items if item.dynamic_rerun_settings.is_enabled]
     )
 
 
-# TODO: As a follow up we can let each error define its own rerun amount here. But that should not be
-#       part of the initial pass
-def _add_dynamic_rerun_triggers_option(parser):
-    group = parser.getgroup(PLUGIN_NAME)
-    group.addoption(
-        "--dynamic-rerun-triggers",
-        action="append",
-        dest=DYNAMIC_RERUN_TRIGGERS_DEST_VAR_NAME,
-        default=None,
-        help="Set pytest output that will trigger dynamic reruns. By default all failing tests are dynamically rerun",
+def _load_dynamic_rerun_trigger_file(config):
+    dynamic_rerun_trigger_file = _get_config_arg(
+        config, DYNAMIC_RERUN_TRIGGER_FILE_DEST_VAR_NAME
     )
+    trigger_file_path = dynamic_rerun_trigger_file.argument_value
+    if not trigger_file_path:
+        return None
 
-    parser.addini(
-        DYNAMIC_RERUN_TRIGGERS_DEST_VAR_NAME,
-        "default value for --dyamic-rerun-triggers",
-        type="linelist",
+    return DynamicRerunTriggerFile.load(
+        trigger_file_path, getattr(config, "cache", None)
     )
 
 
-def _can_item_be_potentially_dynamically_rerun(item):
-    # this is a previously failing test that now passes
-    if item._dynamic_rerun_terminated:
-        return False
+def _log_dynamic_rerun_event(event_log, event, nodeid, **fields):
+    if event_log is not None:
+        event_log.log(event, nodeid, **fields)
+
+
+def _log_reports_for_xdist_controller(item, reports):
+    # reruns may run on any xdist worker, so only the controller knows whether a test may run again
+    run_time = item.dynamic_rerun_run_times[-1].timestamp()
+
+    # every attempt shows up as its own test case in the controller's junitxml, so each report only holds the timing
+    # of its own attempt. The attempt index and wait time are added by the controller, see DynamicRerunXdistScheduling
+    phase_duration_properties = _get_phase_duration_properties(reports)
+    passed = not any(report.failed for report in reports)
+    duration = sum(report.duration for report in reports)
+    for report in reports:
+        report.user_properties.extend(phase_duration_properties)
+        report.dynamic_rerun_passed = passed
+        report.dynamic_rerun_duration = duration
+        report.dynamic_rerun_triggering = _is_rerun_triggering_report(item, report)
+        if report.dynamic_rerun_trigger is not None:
+            _apply_trigger_signature(item, report.dynamic_rerun_trigger)
+        report.dynamic_rerun_attempts = item.max_allowed_dynamic_rerun_attempts
+        report.dynamic_rerun_priority = item._dynamic_rerun_priority
+        report.dynamic_rerun_schedule = item.dynamic_rerun_schedule
+        report.dynamic_rerun_run_time = run_time
+        report.dynamic_rerun_elapsed_time = (
+            time.monotonic() - item._dynamic_rerun_monotonic_run_time
+        )
 
-    # this item has been run as many times as allowed
-    if item.num_dynamic_reruns_kicked_off >= item.max_allowed_dynamic_rerun_attempts:
-        return False
+        item.ihook.pytest_runtest_logreport(report=report)
 
-    return True
 
+def _log_worker_process_reports(item, reports):
+    item.ihook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
 
-def _get_arg(item, marker_param_name, dest_var_param_name):
-    marker = item.get_closest_marker(MARKER_NAME)
+    # worker reports only hold the sections of their own attempt, unlike the ones made in this process
+    section_offset = item._dynamic_rerun_section_offset
+    item._dynamic_rerun_section_offset = 0
+    _process_dynamic_rerun_reports(item, reports)
+    item._dynamic_rerun_section_offset = section_offset
 
-    config_option_dict = vars(item.session.config.option)
+    item.ihook.pytest_runtest_logfinish(nodeid=item.nodeid, location=item.location)
 
-    # The priority followed is: marker, then command line switch, then config INI file
-    if (
-        marker
-        and marker_param_name in marker.kwargs.keys()
-        and marker.kwargs[marker_param_name]
-    ):
-        arg = marker.kwargs[marker_param_name]
-        argument_value = ArgumentValue.create_marker_level_argument(arg)
-    elif (
-        dest_var_param_name in config_option_dict.keys()
-        and config_option_dict[dest_var_param_name]
-    ):
-        arg = config_option_dict[dest_var_param_name]
-        argument_value = ArgumentValue.create_flag_level_argument(arg)
-    else:
-        arg = item.session.config.getini(dest_var_param_name)
-        argument_value = ArgumentValue.create_ini_level_argument(arg)
 
-    return argument_value
+def _may_rerun_immediately(item):
+    # with xdist scheduling the controller decides on reruns, so immediate mode falls back to deferred reruns
+    return (
+        item.dynamic_rerun_settings.mode == IMMEDIATE_RERUN_MODE
+        and not item.session.dynamic_rerun_xdist_scheduling
+        and item.num_dynamic_reruns_kicked_off < item.max_allowed_dynamic_rerun_attempts
+    )
 
 
-def _get_dynamic_rerun_attempts_arg(item):
-    marker_param_name = "attempts"
-    warnings_text = "Rerun attempts must be a positive integer. Using default value '{}'".format(
-        DEFAULT_RERUN_ATTEMPTS
+def _order_by_fixture_locality(rerun_items, previous_item=None):
+    # Groups items sharing a package, module or class so that their fixtures are set up once per batch instead
+    # of once per item. Groups keep the order they first appear in, starting with the ones previous_item is part of.
+    # Higher priority items still run before lower priority ones, see DynamicRerunTriggerFile
+    collector_orders = {}
+    if previous_item is not None:
+        for collector in previous_item.listchain()[:-1]:
+            collector_orders.setdefault(collector, len(collector_orders))
+
+    locality_keys = []
+    for item in rerun_items:
+        locality_keys.append(
+            (-item._dynamic_rerun_priority,)
+            + tuple(
+                collector_orders.setdefault(collector, len(collector_orders))
+                for collector in item.listchain()[:-1]
+            )
+        )
+
+    # sorting is stable, so items within a group keep the order they were due in
+    return [
+        item
+        for locality_key, item in sorted(
+            zip(locality_keys, rerun_items), key=lambda entry: entry[0]
+        )
+    ]
+
+
+def _process_dynamic_rerun_reports(item, reports):
+    item.dynamic_rerun_durations.append(
+        timedelta(seconds=sum(report.duration for report in reports))
     )
 
-    dynamic_rerun_attempts = _get_arg(
-        item, marker_param_name, DYNAMIC_RERUN_ATTEMPTS_DEST_VAR_NAME
+    attempt = len(item.dynamic_rerun_durations)
+    wait_time = 0
+    if attempt > 1:
+        # the sleep time spans from the start of the previous attempt, so leave out the time it ran for
+        previous_duration = item.dynamic_rerun_durations[-2]
+        wait_time = max(
+            (item.dynamic_rerun_sleep_times[-1] - previous_duration).total_seconds(), 0
+        )
+    item._dynamic_rerun_timing_properties.extend(
+        _get_phase_duration_properties(reports)
+        + _get_attempt_properties(attempt, wait_time)
+    )
+    for report in reports:
+        report.user_properties.extend(item._dynamic_rerun_timing_properties)
+    item._dynamic_rerun_passed = not any(report.failed for report in reports)
+
+    event_log = item.session.dynamic_rerun_event_log
+    _log_dynamic_rerun_event(
+        event_log,
+        "attempt_finished",
+        item.nodeid,
+        attempt=attempt,
+        passed=item._dynamic_rerun_passed,
+        duration=item.dynamic_rerun_durations[-1].total_seconds(),
     )
-    dynamic_rerun_attempts_value = dynamic_rerun_attempts.argument_value
 
-    try:
-        dynamic_rerun_attempts_value = int(dynamic_rerun_attempts_value)
-    except (ValueError, TypeError):
-        warnings.warn(warnings_text)
-        dynamic_rerun_attempts_value = DEFAULT_RERUN_ATTEMPTS
+    rerun_scheduled = False
+    triggered = False
+    for report in reports:
+        triggering = _is_rerun_triggering_report(item, report)
+        _log_dynamic_rerun_event(
+            event_log,
+            "trigger_evaluated",
+            item.nodeid,
+            attempt=attempt,
+            when=report.when,
+            triggering=triggering,
+            trigger=report.dynamic_rerun_trigger,
+        )
+        if triggering:
+            triggered = True
+            item._dynamic_rerun_terminated = False
+            if report.dynamic_rerun_trigger is not None:
+                item._dynamic_rerun_trigger = report.dynamic_rerun_trigger
+                _apply_trigger_signature(item, report.dynamic_rerun_trigger)
+
+            if (
+                item.num_dynamic_reruns_kicked_off
+                < item.max_allowed_dynamic_rerun_attempts
+            ):
+                report.outcome = "dynamically_rerun"
+                _schedule_dynamic_rerun(item)
+                rerun_scheduled = True
+                item._dynamic_rerun_last_report = report
+
+                if not report.failed:
+                    item.ihook.pytest_runtest_logreport(report=report)
+                    break
+            else:
+                if (
+                    item._dynamic_rerun_suppressed
+                    and item not in item.session.dynamic_rerun_suppressed_items
+                ):
+                    item.session.dynamic_rerun_suppressed_items.append(item)
 
-    if dynamic_rerun_attempts_value <= 0:
-        warnings.warn(warnings_text)
-        dynamic_rerun_attempts_value = DEFAULT_RERUN_ATTEMPTS
+                if report.when == "call" and not report.failed:
+                    # only mark 'call' as failed to avoid over-reporting errors
+                    # 'call' was picked over setup or teardown since it makes the most sense
+                    # to mark the actual execution as bad in passing test cases
+                    report.outcome = "failed"
+        else:
+            item._dynamic_rerun_terminated = True
+
+        item.ihook.pytest_runtest_logreport(report=report)
+
+    # the item either terminated or exhausted its attempts, so it should not be picked up again
+    if not rerun_scheduled:
+        item.session.dynamic_rerun_scheduler.remove(item)
+        _log_dynamic_rerun_event(
+            event_log,
+            "item_exhausted" if triggered else "item_terminated",
+            item.nodeid,
+            attempt=attempt,
+        )
 
-    return dynamic_rerun_attempts_value
 
+def _quote_args(args):
+    return " ".join(shlex.quote(arg) for arg in args)
 
-def _get_dynamic_rerun_disabled_arg(item):
-    marker_param_name = "disabled"
 
-    dynamic_rerun_disabled = _get_arg(
-        item, marker_param_name, DYNAMIC_RERUN_DISABLED_DEST_VAR_NAME
-    )
-    dynamic_rerun_disabled_value = dynamic_rerun_disabled.argument_value
+def _record_dynamic_rerun_history(session):
+    config = session.config
+    history = session.dynamic_rerun_history
+    history_file_path = session.dynamic_rerun_history_file
 
-    #  see https://docs.python.org/3/distutils/apiref.html#distutils.util.strtobool for true and false values
-    if isinstance(dynamic_rerun_disabled_value, str):
-        try:
-            dynamic_rerun_disabled_value = strtobool(dynamic_rerun_disabled_value)
-        except ValueError:
-            dynamic_rerun_disabled_value = False
+    xdist_scheduling = config.pluginmanager.get_plugin(XDIST_SCHEDULING_PLUGIN_NAME)
+    if xdist_scheduling is not None:
+        # the xdist controller collects no items, but sees every attempt its workers run
+        history_records = xdist_scheduling.get_history_records()
+        cache = getattr(config, "cache", None)
+        history = DynamicRerunHistory(cache) if cache is not None else None
+        history_file_path = _get_dynamic_rerun_history_file_arg(config)
+    else:
+        history_records = _get_item_history_records(session)
+        if hasattr(config, "workerinput"):
+            # xdist workers may run reruns of the same test, and would overwrite each other's history
+            history = None
 
-    return bool(dynamic_rerun_disabled_value)
+    if not history_records:
+        return
 
+    if history is not None:
+        for history_record in history_records:
+            history.record(**history_record)
+        history.save()
+
+    if history_file_path:
+        # written in one go, so that the file only ever holds complete lines
+        with open(history_file_path, "a") as history_file:
+            history_file.write(
+                "".join(
+                    json.dumps(history_record, separators=(",", ":")) + "\n"
+                    for history_record in history_records
+                )
+            )
 
-def _get_dynamic_rerun_schedule_arg(item):
-    marker_param_name = "schedule"
 
-    dynamic_rerun_schedule = _get_arg(
-        item, marker_param_name, DYNAMIC_RERUN_SCHEDULE_DEST_VAR_NAME
-    )
-    dynamic_rerun_schedule_value = dynamic_rerun_schedule.argument_value
+def _record_dynamic_rerun_run_time(item):
+    item.dynamic_rerun_run_times.append(datetime.now())
+    item._dynamic_rerun_monotonic_run_time = time.monotonic()
 
-    if dynamic_rerun_schedule_value and not croniter.is_valid(
-        dynamic_rerun_schedule_value
+    # under xdist load scheduling the controller logs events as it receives the worker's reports
+    if (
+        item.dynamic_rerun_settings.is_enabled
+        and not item.session.dynamic_rerun_xdist_scheduling
     ):
-        warnings.warn(
-            "Can't parse invalid dynamic rerun schedule '{}'. "
-            "Ignoring dynamic rerun schedule and using default '{}'".format(
-                dynamic_rerun_schedule_value, DEFAULT_RERUN_SCHEDULE
-            )
+        _log_dynamic_rerun_event(
+            item.session.dynamic_rerun_event_log,
+            "attempt_started",
+            item.nodeid,
+            attempt=len(item.dynamic_rerun_run_times),
         )
-        dynamic_rerun_schedule_value = DEFAULT_RERUN_SCHEDULE
 
-    return dynamic_rerun_schedule_value
 
+def _record_interrupted_reruns(session):
+    # items still waiting on a rerun never get a final report, so they are listed in the terminal summary instead
+    interrupted_items = session.dynamic_rerun_scheduler.pop_due_items(float("inf"))
+    session.dynamic_rerun_interrupted_items.extend(interrupted_items)
 
-def _get_dynamic_rerun_triggers_arg(item):
-    marker_param_name = "triggers"
 
-    dynamic_rerun_triggers = _get_arg(
-        item, marker_param_name, DYNAMIC_RERUN_TRIGGERS_DEST_VAR_NAME
-    )
-    dynamic_rerun_triggers_value = dynamic_rerun_triggers.argument_value
+def _rerun_dynamically_failing_items(session):
+    scheduler = session.dynamic_rerun_scheduler
+    waker = session.dynamic_rerun_waker
 
-    if not isinstance(dynamic_rerun_triggers_value, list):
-        return [dynamic_rerun_triggers_value]
-    return dynamic_rerun_triggers_value
+    deadline = None
+    if session.dynamic_rerun_time_budget is not None:
+        deadline = time.monotonic() + session.dynamic_rerun_time_budget.total_seconds()
 
+    try:
+        while scheduler and not waker.stop_requested:
+            current_time = time.monotonic()
 
-def _get_next_rerunnable_time(items_to_rerun, current_time):
-    soonest_possible_run_time = None
+            if waker.consume_rerun_request():
+                rerun_items = scheduler.pop_due_items(float("inf"))
+            else:
+                rerun_items = scheduler.pop_due_items(current_time)
+            rerun_items = _order_by_fixture_locality(rerun_items)
+
+            if deadline is not None:
+                rerun_items = _skip_reruns_over_budget(
+                    rerun_items, current_time, deadline
+                )
+
+            if rerun_items:
+                _run_dynamic_reruns(rerun_items, current_time, None)
+            elif deadline is not None and _skip_next_rerun_if_over_budget(
+                scheduler, current_time, deadline
+            ):
+                continue
+            else:
+                next_run_time = scheduler.get_next_fire_time()
+                if next_run_time is not None:
+                    sleep_time = next_run_time - current_time
+                    if sleep_time > 0:
+                        waker.wait(sleep_time)
+    except KeyboardInterrupt:
+        _record_interrupted_reruns(session)
+        raise
+
+    _record_interrupted_reruns(session)
+    return True
 
-    for item in items_to_rerun:
-        if not _can_item_be_potentially_dynamically_rerun(item):
-            continue
 
-        time_iterator = croniter(item.dynamic_rerun_schedule, current_time)
-        next_run_time = time_iterator.get_next(datetime)
+def _resolve_dynamic_rerun_settings(item):
+    settings_cache = item.session.dynamic_rerun_settings_cache
+    settings_key = _get_dynamic_rerun_settings_key(item)
+
+    settings = settings_cache.get(settings_key)
+    if settings is None:
+        triggers = _get_dynamic_rerun_triggers_arg(item)
+        trigger_file = item.session.dynamic_rerun_trigger_file
+        if trigger_file is not None:
+            triggers = triggers + [
+                trigger for trigger in trigger_file.triggers if trigger not in triggers
+            ]
+        settings = DynamicRerunSettings(
+            attempts=_get_dynamic_rerun_attempts_arg(item),
+            disabled=_get_dynamic_rerun_disabled_arg(item),
+            mode=_get_dynamic_rerun_mode_arg(item),
+            parallel_safe=_get_dynamic_rerun_parallel_safe_arg(item),
+            schedule=_get_dynamic_rerun_schedule_arg(item),
+            triggers=triggers,
+            trigger_matcher=_get_trigger_matcher(item.session, triggers),
+        )
+        settings_cache[settings_key] = settings
 
-        if soonest_possible_run_time is None:
-            soonest_possible_run_time = next_run_time
-        elif soonest_possible_run_time > next_run_time:
-            soonest_possible_run_time = next_run_time
+    return settings
 
-    return soonest_possible_run_time
 
+def _run_dynamic_reruns(rerun_items, current_time, nextitem):
+    for item in rerun_items:
+        _kick_off_dynamic_rerun(item, current_time)
 
-def _get_immediately_rerunnable_items(items_to_rerun, current_time, last_run_time):
-    rerunnable_items = []
-    for item in items_to_rerun:
-        if not _can_item_be_potentially_dynamically_rerun(item):
-            continue
+    session = rerun_items[0].session
+    if session.dynamic_rerun_workers > 1:
+        parallel_items = [
+            item for item in rerun_items if item.dynamic_rerun_settings.parallel_safe
+        ]
+        serial_items = [
+            item
+            for item in rerun_items
+            if not item.dynamic_rerun_settings.parallel_safe
+        ]
+    else:
+        parallel_items = []
+        serial_items = rerun_items
+
+    if not parallel_items:
+        _run_serial_dynamic_reruns(serial_items, nextitem)
+        return
 
-        time_iterator = croniter(item.dynamic_rerun_schedule, last_run_time)
-        if time_iterator.get_next(datetime) <= current_time:
-            rerunnable_items.append(item)
+    # serial reruns run in this process while the parallel ones run in worker processes.
+    # Parallel reruns are logged once all of them are done, in the order they were scheduled
+    worker_directory = tempfile.mkdtemp(prefix="dynamicrerun-")
+    try:
+        with ThreadPoolExecutor(max_workers=session.dynamic_rerun_workers) as executor:
+            worker_futures = []
+            for i, item in enumerate(parallel_items):
+                report_file_path = os.path.join(worker_directory, "{}.jsonl".format(i))
+                # worker args are built here, as they may create this session's base temporary directory
+                args = _get_worker_process_args(
+                    session.config, item.nodeid, report_file_path
+                )
+                _record_dynamic_rerun_run_time(item)
+                worker_futures.append(
+                    executor.submit(
+                        _run_item_in_worker_process,
+                        session.config,
+                        args,
+                        report_file_path,
+                    )
+                )
+
+            _run_serial_dynamic_reruns(serial_items, nextitem)
+
+            for item, worker_future in zip(parallel_items, worker_futures):
+                serialized_reports, stderr = worker_future.result()
+                if serialized_reports:
+                    reports = [
+                        session.config.hook.pytest_report_from_serializable(
+                            config=session.config, data=data
+                        )
+                        for data in serialized_reports
+                    ]
+                    _log_worker_process_reports(item, reports)
+                else:
+                    # the worker could not run the item ( e.g. it failed to start ), so run it here instead
+                    warnings.warn(
+                        "Worker process could not rerun '{}'. Rerunning it in the main process. "
+                        "Worker process stderr:\n{}".format(item.nodeid, stderr)
+                    )
+                    item.dynamic_rerun_run_times.pop()
+                    _run_item_dynamically(item, nextitem)
+    finally:
+        shutil.rmtree(worker_directory, ignore_errors=True)
+
+
+def _run_item_dynamically(item, nextitem):
+    # items are normally initialized at collection time, but other plugins may hand us items we never saw
+    if not hasattr(item, "dynamic_rerun_settings"):
+        _initialize_plugin_item_level_fields(item)
+    _record_dynamic_rerun_run_time(item)
+
+    if not item.dynamic_rerun_settings.is_enabled:
+        return False
 
-    return rerunnable_items
+    # items in immediate mode are rerun in place, without tearing down fixtures scoped above the function
+    # in between attempts. Fixtures are only torn down towards nextitem once no rerun follows
+    while True:
+        teardown_nextitem = nextitem
+        if _may_rerun_immediately(item):
+            teardown_nextitem = item.parent
 
+        item.ihook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
+        reports = runtestprotocol(item, nextitem=teardown_nextitem, log=False)
+        setup_failed = reports[0].failed
+        if item.session.dynamic_rerun_xdist_scheduling:
+            _log_reports_for_xdist_controller(item, reports)
+        else:
+            _process_dynamic_rerun_reports(item, reports)
 
-def _get_all_rerunnable_items(items_to_rerun):
-    rerunnable_items = []
-    for item in items_to_rerun:
-        if not _can_item_be_potentially_dynamically_rerun(item):
-            continue
+        # the next attempt only needs to scan the sections it adds itself
+        item._dynamic_rerun_section_offset = len(reports[-1].sections)
+        item.ihook.pytest_runtest_logfinish(nodeid=item.nodeid, location=item.location)
 
-        rerunnable_items.append(item)
+        if teardown_nextitem is nextitem:
+            return True
 
-    return rerunnable_items
+        rerun_pending = item in item.session.dynamic_rerun_scheduler
+        if rerun_pending and setup_failed:
+            # fixtures and collectors scoped above the function cache their setup errors until they are torn down.
+            # Only those are torn down, keeping the fixtures around them set up
+            failed_setup_node = _get_outermost_failed_setup_node(item)
+            if failed_setup_node is not None:
+                _teardown_towards_next_item(item, failed_setup_node.parent)
+        if not rerun_pending or not _wait_for_immediate_rerun(item):
+            _teardown_towards_next_item(item, nextitem)
+            return True
 
+        _kick_off_dynamic_rerun(item, time.monotonic())
+        _record_dynamic_rerun_run_time(item)
 
-def _initialize_plugin_item_level_fields(item):
-    item.dynamic_rerun_disabled = _get_dynamic_rerun_disabled_arg(item)
-    item.dynamic_rerun_schedule = _get_dynamic_rerun_schedule_arg(item)
-    item.dynamic_rerun_triggers = _get_dynamic_rerun_triggers_arg(item)
-    item.max_allowed_dynamic_rerun_attempts = _get_dynamic_rerun_attempts_arg(item)
 
-    if not hasattr(item, "dynamic_rerun_run_times"):
-        item.dynamic_rerun_run_times = []
-    item.dynamic_rerun_run_times.append(datetime.now())
+def _run_item_in_worker_process(config, args, report_file_path):
+    # returns the serialized reports of the worker, and what it wrote to stderr so failing workers can be reported
+    try:
+        worker_process = subprocess.run(
+            args,
+            cwd=str(config.invocation_params.dir),
+            env=_get_worker_process_env(config),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+    except OSError as e:
+        return [], str(e)
+
+    stderr = worker_process.stderr.decode("utf-8", "replace")
+    try:
+        with open(report_file_path) as report_file:
+            serialized_reports = [json.loads(line) for line in report_file]
+    except (OSError, ValueError):
+        return [], stderr
 
-    if not hasattr(item, "dynamic_rerun_sleep_times"):
-        item.dynamic_rerun_sleep_times = []
+    return serialized_reports, stderr
 
-    if not hasattr(item, "num_dynamic_reruns_kicked_off"):
-        item.num_dynamic_reruns_kicked_off = 0
 
-    if not hasattr(item, "_dynamic_rerun_terminated"):
-        item._dynamic_rerun_terminated = False
+def _run_serial_dynamic_reruns(rerun_items, nextitem):
+    for i, item in enumerate(rerun_items):
+        next_item = rerun_items[i + 1] if i + 1 < len(rerun_items) else nextitem
+        _run_item_dynamically(item, next_item)
 
-    # The amount of sections seen last run. This works since sections is a globally passed item that is not stage aware
-    # so, sections for 'teardown' has all of the sections of 'call' + new teardown sections
-    if not hasattr(item, "_amount_previously_seen_sections"):
-        item._amount_previously_seen_sections = 0
 
+def _schedule_dynamic_rerun(item):
+    session = item.session
 
-def _is_rerun_triggering_report(item, report):
-    if not item.dynamic_rerun_triggers:
-        return report.failed
+    if item._dynamic_rerun_order is None:
+        item._dynamic_rerun_order = len(session.dynamic_rerun_items)
+        session.dynamic_rerun_items.append(item)
 
-    new_output_sections_found = (
-        len(report.sections) != item._amount_previously_seen_sections
+    delay = session.dynamic_rerun_schedule_cache.get_delay(
+        item.dynamic_rerun_schedule,
+        item.dynamic_rerun_run_times[-1],
+        item.num_dynamic_reruns_kicked_off,
+    )
+    next_run_time = item._dynamic_rerun_monotonic_run_time + delay.total_seconds()
+    session.dynamic_rerun_scheduler.schedule(
+        item, next_run_time, (-item._dynamic_rerun_priority, item._dynamic_rerun_order)
+    )
+    _log_dynamic_rerun_event(
+        session.dynamic_rerun_event_log,
+        "rerun_scheduled",
+        item.nodeid,
+        attempt=len(item.dynamic_rerun_durations),
+        delay=delay.total_seconds(),
+        next_fire_time=_get_wall_clock_time(next_run_time),
     )
-    item._amount_previously_seen_sections = len(report.sections)
 
-    for rerun_regex in item.dynamic_rerun_triggers:
-        # NOTE: Checking for both report.longrepr and reprcrash on report.longrepr is intentional
-        report_has_reprcrash = report.longrepr and hasattr(report.longrepr, "reprcrash")
-        if report_has_reprcrash and re.search(
-            rerun_regex, report.longrepr.reprcrash.message
-        ):
-            return True
 
-        if new_output_sections_found:
-            for section in report.sections:
-                section_title = section[0]
-                section_text = section[1]
-                if section_title in [
-                    "Captured stdout call",
-                    "Captured stderr call",
-                ] and re.search(rerun_regex, section_text):
-                    return True
+def _skip_next_rerun_if_over_budget(scheduler, current_time, deadline):
+    next_entry = scheduler.peek()
+    if next_entry is None:
+        return False
+
+    next_run_time, item = next_entry
+    if not _would_overrun_budget(item, max(next_run_time, current_time), deadline):
+        return False
 
-    return False
+    scheduler.remove(item)
+    _skip_rerun_over_budget(item)
+    return True
 
 
-def _rerun_dynamically_failing_items(session):
-    last_rerun_attempt_time = None
-    while _get_all_rerunnable_items(session.dynamic_rerun_items):
-        current_time = datetime.now()
-        if last_rerun_attempt_time is None:
-            last_rerun_attempt_time = current_time
+def _skip_rerun_over_budget(item):
+    # the item's last report was logged as a rerun. Log it again as failed so the item still gets a final outcome
+    report = copy.copy(item._dynamic_rerun_last_report)
+    report.outcome = "failed"
 
-        rerun_items = _get_immediately_rerunnable_items(
-            session.dynamic_rerun_items, current_time, last_rerun_attempt_time
-        )
-        for i, item in enumerate(rerun_items):
-            last_rerun_attempt_time = current_time
+    item.ihook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
+    item.ihook.pytest_runtest_logreport(report=report)
+    item.ihook.pytest_runtest_logfinish(nodeid=item.nodeid, location=item.location)
 
-            item.num_dynamic_reruns_kicked_off += 1
+    item.session.dynamic_rerun_budget_exhausted_items.append(item)
 
-            last_run_time = item.dynamic_rerun_run_times[-1]
-            sleep_time = current_time - last_run_time
-            item.dynamic_rerun_sleep_times.append(sleep_time)
 
-            next_item = rerun_items[i + 1] if i + 1 < len(rerun_items) else None
-            pytest_runtest_protocol(item, next_item)
+def _skip_reruns_over_budget(rerun_items, current_time, deadline):
+    admitted_items = []
+    for item in rerun_items:
+        if _would_overrun_budget(item, current_time, deadline):
+            _skip_rerun_over_budget(item)
         else:
-            next_run_time = _get_next_rerunnable_time(
-                session.dynamic_rerun_items, last_rerun_attempt_time
-            )
-            if next_run_time is not None:
-                sleep_delta = next_run_time - current_time
-                total_sleep_time = sleep_delta.total_seconds()
-                if total_sleep_time > 0:
-                    time.sleep(total_sleep_time)
+            admitted_items.append(item)
+
+    return admitted_items
+
+
+def _suppress_deterministic_reruns(session, items):
+    history = session.dynamic_rerun_history
+    if history is None:
+        return
+
+    for item in items:
+        if item.dynamic_rerun_settings.is_enabled and history.is_deterministic_failure(
+            item.nodeid, session.dynamic_rerun_suppress_deterministic
+        ):
+            # the item keeps its settings, which are shared with other items, but gets a single attempt
+            item.max_allowed_dynamic_rerun_attempts = 0
+            item._dynamic_rerun_suppressed = True
+
+
+def _teardown_exact(item, nextitem):
+    setup_state = item.session._setupstate
+
+    # pytest 7 dropped the item argument of SetupState.teardown_exact
+    if isinstance(setup_state.stack, dict):
+        setup_state.teardown_exact(nextitem)
+    else:
+        setup_state.teardown_exact(item, nextitem)
+
+
+def _teardown_towards_next_item(item, nextitem):
+    # the last attempt was only torn down towards the item's parent. The teardown hooks already ran for this
+    # attempt, so the remaining collectors are torn down directly, and only a failing teardown is logged
+    call = CallInfo.from_call(
+        functools.partial(_teardown_exact, item, nextitem),
+        when="teardown",
+        reraise=(Exit, KeyboardInterrupt),
+    )
+    if call.excinfo is not None:
+        report = item.ihook.pytest_runtest_makereport(item=item, call=call)
+        item.ihook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
+        item.ihook.pytest_runtest_logreport(report=report)
+        item.ihook.pytest_runtest_logfinish(nodeid=item.nodeid, location=item.location)
+
+
+def _wait_for_immediate_rerun(item):
+    # returns whether the rerun should go ahead. Like deferred reruns, the wait can be cut short or stopped
+    # through session.dynamic_rerun_waker, and reruns left unrun are listed in the terminal summary
+    session = item.session
+    scheduler = session.dynamic_rerun_scheduler
+    waker = session.dynamic_rerun_waker
+
+    fire_time = scheduler.get_fire_time(item)
+    try:
+        while not waker.stop_requested and not waker.consume_rerun_request():
+            sleep_time = fire_time - time.monotonic()
+            if sleep_time <= 0:
+                break
+            waker.wait(sleep_time)
+    except KeyboardInterrupt:
+        _record_interrupted_reruns(session)
+        raise
+
+    scheduler.remove(item)
+    if waker.stop_requested:
+        session.dynamic_rerun_interrupted_items.append(item)
+        return False
 
     return True
 
 
+def _would_overrun_budget(item, run_time, deadline):
+    # the last attempt's duration is the best guess of how long the next one takes
+    expected_duration = item.dynamic_rerun_durations[-1]
+    return run_time + expected_duration.total_seconds() > deadline
+
+
 def pytest_addoption(parser):
     _add_dynamic_rerun_attempts_option(parser)
     _add_dynamic_rerun_disabled_option(parser)
+    _add_dynamic_rerun_front_load_option(parser)
+    _add_dynamic_rerun_history_file_option(parser)
+    _add_dynamic_rerun_interleave_option(parser)
+    _add_dynamic_rerun_log_option(parser)
+    _add_dynamic_rerun_mode_option(parser)
+    _add_dynamic_rerun_scan_window_option(parser)
     _add_dynamic_rerun_schedule_option(parser)
+    _add_dynamic_rerun_suppress_deterministic_option(parser)
+    _add_dynamic_rerun_time_budget_option(parser)
+    _add_dynamic_rerun_trigger_file_option(parser)
     _add_dynamic_rerun_triggers_option(parser)
+    _add_dynamic_rerun_workers_option(parser)
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_collection_finish(session):
+    # added after xdist sent the collection to the controller, see DynamicRerunXdistFlushItem
+    if session.dynamic_rerun_xdist_scheduling:
+        session.items.append(
+            DynamicRerunXdistFlushItem.from_parent(session, name=XDIST_FLUSH_ITEM_NAME)
+        )
+
+
+def pytest_collection_modifyitems(session, config, items):
+    # NOTE: Session level options are resolved here instead of in pytest_sessionstart so their warnings are shown
+    session.dynamic_rerun_history_file = _get_dynamic_rerun_history_file_arg(config)
+    session.dynamic_rerun_interleave = _get_dynamic_rerun_interleave_arg(config)
+    session.dynamic_rerun_scan_window = _get_dynamic_rerun_scan_window_arg(config)
+    session.dynamic_rerun_time_budget = _get_dynamic_rerun_time_budget_arg(config)
+    session.dynamic_rerun_trigger_file = _load_dynamic_rerun_trigger_file(config)
+    session.dynamic_rerun_workers = _get_dynamic_rerun_workers_arg(config)
+
+    for item in items:
+        _initialize_plugin_item_level_fields(item)
+
+    session.dynamic_rerun_history = _load_dynamic_rerun_history(session, items)
+
+    session.dynamic_rerun_suppress_deterministic = _get_dynamic_rerun_suppress_deterministic_arg(
+        config
+    )
+    if session.dynamic_rerun_suppress_deterministic is not None:
+        _suppress_deterministic_reruns(session, items)
+
+    session.dynamic_rerun_front_load = _get_dynamic_rerun_front_load_arg(config)
+    if session.dynamic_rerun_front_load:
+        _front_load_rerun_prone_items(session, items)
 
 
 def pytest_configure(config):
+    worker_report_file_path = config.getoption(
+        DYNAMIC_RERUN_WORKER_REPORT_FILE_DEST_VAR_NAME
+    )
+    if worker_report_file_path:
+        config.pluginmanager.register(
+            DynamicRerunWorkerReporter(config, worker_report_file_path),
+            "dynamicrerun-worker-reporter",
+        )
+    else:
+        # worker processes running parallel reruns leave logging events to the process that started them
+        event_log_path = _get_dynamic_rerun_log_arg(config)
+        if event_log_path:
+            config.pluginmanager.register(
+                DynamicRerunEventLog(event_log_path), EVENT_LOG_PLUGIN_NAME
+            )
+
     config.addinivalue_line(
         "markers",
-        "{}(attempts=N, disabled=[True|False], schedule=S, triggers=[REGEX]): mark test as dynamically re-runnable. "
+        "{}(attempts=N, disabled=[True|False], mode=[deferred|immediate], "
+        "parallel_safe=[True|False], schedule=S, triggers=[REGEX]): "
+        "mark test as dynamically re-runnable. "
         "Attempt a rerun up to N times on anything that matches a regex in the list [REGEX], "
-        "following cron formatted schedule S. Set disabled to False to stop this plugin from running.".format(
+        "following cron formatted schedule S. Set disabled to False to stop this plugin from running. "
+        "Set mode=immediate to rerun right after the failing attempt instead of once the last test has run. "
+        "Set parallel_safe=True to allow reruns to run in parallel worker processes.".format(
             MARKER_NAME
         ),
     )
 
 
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    node.workerinput[
+        DYNAMIC_RERUN_XDIST_SCHEDULING_WORKER_INPUT_NAME
+    ] = _is_xdist_load_scheduling(node.config)
+
+
 def pytest_report_teststatus(report):
     if report.outcome == "dynamically_rerun":
         return "dynamicrerun", "DR", ("DYNAMIC_RERUN", {"yellow": True})
 
 
-def pytest_runtest_protocol(item, nextitem):
-    _initialize_plugin_item_level_fields(item)
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    # reports only hold the text of the exception a test raised, so exception triggers are matched against the
+    # exception itself while it is still around. The matched trigger is picked up by _find_rerun_trigger
+    outcome = yield
+
+    settings = getattr(item, "dynamic_rerun_settings", None)
+    if call.excinfo is None or settings is None or settings.trigger_matcher is None:
+        return
 
-    # don't apply the plugin if required arguments are missing or if the user requested not to run it
-    should_run_plugin = (
-        item.dynamic_rerun_schedule
-        and item.max_allowed_dynamic_rerun_attempts
-        and not item.dynamic_rerun_disabled
+    report = outcome.get_result()
+    report._dynamic_rerun_exception_trigger = settings.trigger_matcher.search_exception(
+        call.excinfo.value
     )
 
-    if should_run_plugin:
-        item.ihook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
-        reports = runtestprotocol(item, nextitem=nextitem, log=False)
 
-        will_run_again = (
-            item.num_dynamic_reruns_kicked_off < item.max_allowed_dynamic_rerun_attempts
-        )
+def pytest_runtest_protocol(item, nextitem):
+    session = item.session
+    if isinstance(item, DynamicRerunXdistFlushItem):
+        return True
 
-        for report in reports:
-            if _is_rerun_triggering_report(item, report):
-                item._dynamic_rerun_terminated = False
+    # when interleaving, reruns that are already due run right after this item, before moving on to nextitem.
+    # This item is then torn down towards the first rerun so only fixtures it doesn't share with it are finalized
+    interleaved_rerun_items = []
+    if nextitem is not None and session.dynamic_rerun_interleave:
+        current_time = time.monotonic()
+        interleaved_rerun_items = _order_by_fixture_locality(
+            session.dynamic_rerun_scheduler.pop_due_items(current_time),
+            previous_item=item,
+        )
 
-                if will_run_again:
-                    report.outcome = "dynamically_rerun"
-                    if item not in item.session.dynamic_rerun_items:
-                        item.session.dynamic_rerun_items.append(item)
+    if interleaved_rerun_items:
+        if not _run_item_dynamically(item, interleaved_rerun_items[0]):
+            # this item doesn't use the plugin, so run it the way pytest would have
+            item.ihook.pytest_runtest_logstart(
+                nodeid=item.nodeid, location=item.location
+            )
+            runtestprotocol(item, nextitem=interleaved_rerun_items[0])
+            item.ihook.pytest_runtest_logfinish(
+                nodeid=item.nodeid, location=item.location
+            )
 
-                    if not report.failed:
-                        item.ihook.pytest_runtest_logreport(report=report)
-                        break
-                elif report.when == "call" and not report.failed:
-                    # only mark 'call' as failed to avoid over-reporting errors
-                    # 'call' was picked over setup or teardown since it makes the most sense
-                    # to mark the actual execution as bad in passing test cases
-                    report.outcome = "failed"
-            else:
-                item._dynamic_rerun_terminated = True
+        _run_dynamic_reruns(interleaved_rerun_items, current_time, nextitem)
+        return True
 
-            item.ihook.pytest_runtest_logreport(report=report)
-        item.ihook.pytest_runtest_logfinish(nodeid=item.nodeid, location=item.location)
+    should_run_plugin = _run_item_dynamically(item, nextitem)
 
     # if nextitem is None, we have finished running tests. Dynamically rerun any tests that failed
     if nextitem is None:
-        _rerun_dynamically_failing_items(item.session)
+        _rerun_dynamically_failing_items(session)
 
     # NOTE: This was done this way to conform to the pytest runtest api and there is no logic beyond that
     if should_run_plugin:
@@ -452,11 +2969,98 @@ def pytest_runtest_protocol(item, nextitem):
         return
 
 
+def pytest_sessionfinish(session):
+    _record_dynamic_rerun_history(session)
+
+
 def pytest_sessionstart(session):
+    session.dynamic_rerun_budget_exhausted_items = []
+    session.dynamic_rerun_event_log = session.config.pluginmanager.get_plugin(
+        EVENT_LOG_PLUGIN_NAME
+    )
+    session.dynamic_rerun_front_load = False
+    session.dynamic_rerun_history = None
+    session.dynamic_rerun_history_file = None
+    session.dynamic_rerun_interleave = False
+    session.dynamic_rerun_interrupted_items = []
     session.dynamic_rerun_items = []
+    session.dynamic_rerun_scan_window = None
+    session.dynamic_rerun_schedule_cache = DynamicRerunScheduleCache()
+    session.dynamic_rerun_scheduler = DynamicRerunScheduler()
+    session.dynamic_rerun_settings_cache = {}
+    session.dynamic_rerun_suppress_deterministic = None
+    session.dynamic_rerun_suppressed_items = []
+    session.dynamic_rerun_time_budget = None
+    session.dynamic_rerun_trigger_file = None
+    session.dynamic_rerun_trigger_matcher_cache = {}
+    session.dynamic_rerun_verdict_cache = DynamicRerunVerdictCache()
+    session.dynamic_rerun_waker = DynamicRerunWaker()
+    session.dynamic_rerun_workers = DEFAULT_RERUN_WORKERS
+
+    # xdist workers leave rerun decisions and scheduling to the controller, see DynamicRerunXdistScheduling
+    workerinput = getattr(session.config, "workerinput", {})
+    session.dynamic_rerun_xdist_scheduling = workerinput.get(
+        DYNAMIC_RERUN_XDIST_SCHEDULING_WORKER_INPUT_NAME, False
+    )
 
 
 def pytest_terminal_summary(terminalreporter):
     terminalreporter.write_sep("=", "Dynamically rerun tests")
     for report in terminalreporter.stats.get("dynamicrerun", []):
         terminalreporter.write_line(report.nodeid)
+
+    session = getattr(terminalreporter, "_session", None)
+    budget_exhausted_items = getattr(
+        session, "dynamic_rerun_budget_exhausted_items", []
+    )
+    suppressed_items = getattr(session, "dynamic_rerun_suppressed_items", [])
+    if budget_exhausted_items or suppressed_items:
+        terminalreporter.write_sep("=", "Dynamic reruns skipped")
+        for item in budget_exhausted_items:
+            terminalreporter.write_line(
+                "{} - not rerun: budget exhausted".format(item.nodeid)
+            )
+        for item in suppressed_items:
+            terminalreporter.write_line(
+                "{} - rerun suppressed (deterministic)".format(item.nodeid)
+            )
+
+    interrupted_items = getattr(session, "dynamic_rerun_interrupted_items", [])
+    if interrupted_items:
+        terminalreporter.write_sep("=", "Dynamic reruns interrupted")
+        for item in interrupted_items:
+            terminalreporter.write_line(item.nodeid)
+
+    verdict_cache = getattr(session, "dynamic_rerun_verdict_cache", None)
+    if verdict_cache is not None and verdict_cache.hits + verdict_cache.misses:
+        terminalreporter.write_sep("=", "Dynamic rerun verdict cache")
+        terminalreporter.write_line(
+            "{} hits, {} misses".format(verdict_cache.hits, verdict_cache.misses)
+        )
+
+
+def pytest_unconfigure(config):
+    event_log = config.pluginmanager.get_plugin(EVENT_LOG_PLUGIN_NAME)
+    if event_log is not None:
+        event_log.close()
+        config.pluginmanager.unregister(event_log)
+
+    worker_reporter = config.pluginmanager.get_plugin("dynamicrerun-worker-reporter")
+    if worker_reporter is not None:
+        worker_reporter.close()
+        config.pluginmanager.unregister(worker_reporter)
+
+    xdist_scheduling = config.pluginmanager.get_plugin(XDIST_SCHEDULING_PLUGIN_NAME)
+    if xdist_scheduling is not None:
+        xdist_scheduling.close()
+        config.pluginmanager.unregister(xdist_scheduling)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_xdist_make_scheduler(config, log):
+    if not _is_xdist_load_scheduling(config):
+        return None
+
+    xdist_scheduling = DynamicRerunXdistScheduling(config, log)
+    config.pluginmanager.register(xdist_scheduling, XDIST_SCHEDULING_PLUGIN_NAME)
+    return xdist_scheduling
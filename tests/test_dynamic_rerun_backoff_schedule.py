@@ -0,0 +1,107 @@
+# This file contains tests specific to DynamicRerunBackoffSchedule class
+from datetime import datetime
+from datetime import timedelta
+
+import pytest
+
+from pytest_dynamicrerun import DynamicRerunBackoffSchedule
+from pytest_dynamicrerun import DynamicRerunScheduleCache
+
+
+@pytest.mark.parametrize(
+    "schedule,expected_delay",
+    [
+        ("delay:500ms", timedelta(milliseconds=500)),
+        ("delay:2", timedelta(seconds=2)),
+        ("delay:1.5s", timedelta(seconds=1.5)),
+        ("delay:3m", timedelta(minutes=3)),
+        ("delay:1h", timedelta(hours=1)),
+        (" delay: 250ms ", timedelta(milliseconds=250)),
+    ],
+)
+def test_fixed_delay_is_the_same_for_every_attempt(schedule, expected_delay):
+    backoff_schedule = DynamicRerunBackoffSchedule.parse(schedule)
+
+    for attempt in range(5):
+        assert backoff_schedule.get_delay(attempt) == expected_delay
+
+
+def test_exponential_backoff_defaults():
+    backoff_schedule = DynamicRerunBackoffSchedule.parse("backoff:exp")
+
+    delays = [backoff_schedule.get_delay(attempt) for attempt in range(4)]
+    assert delays == [timedelta(seconds=seconds) for seconds in [1, 2, 4, 8]]
+
+
+def test_exponential_backoff_is_capped_at_max():
+    backoff_schedule = DynamicRerunBackoffSchedule.parse(
+        "backoff:exp(base=100ms, factor=3, max=1s)"
+    )
+
+    delays = [backoff_schedule.get_delay(attempt) for attempt in range(5)]
+    assert delays == [
+        timedelta(milliseconds=milliseconds)
+        for milliseconds in [100, 300, 900, 1000, 1000]
+    ]
+
+
+def test_unbounded_exponential_backoff_does_not_overflow():
+    backoff_schedule = DynamicRerunBackoffSchedule.parse("backoff:exp")
+
+    assert backoff_schedule.get_delay(10000) == DynamicRerunBackoffSchedule.MAX_DELAY
+
+
+def test_jitter_stays_within_bounds():
+    backoff_schedule = DynamicRerunBackoffSchedule.parse(
+        "backoff:exp(base=1s,max=60s,jitter=0.2)"
+    )
+
+    delays = set()
+    for _ in range(100):
+        delay = backoff_schedule.get_delay(2)
+        assert timedelta(seconds=3.2) <= delay <= timedelta(seconds=4.8)
+        delays.add(delay)
+
+        # jitter never pushes a delay past max
+        assert backoff_schedule.get_delay(10) <= timedelta(seconds=60)
+
+    assert len(delays) > 1
+
+
+@pytest.mark.parametrize("schedule", ["* * * * * *", "0 0 1 1 *", "foobar", 1, None])
+def test_non_backoff_schedules_are_not_parsed(schedule):
+    assert DynamicRerunBackoffSchedule.parse(schedule) is None
+
+
+@pytest.mark.parametrize(
+    "schedule",
+    [
+        "delay:",
+        "delay:soon",
+        "delay:-1s",
+        "backoff:linear",
+        "backoff:exp(base)",
+        "backoff:exp(base=fast)",
+        "backoff:exp(foo=1)",
+        "backoff:exp(factor=0.5)",
+        "backoff:exp(jitter=2)",
+    ],
+)
+def test_invalid_backoff_schedules_raise(schedule):
+    with pytest.raises(ValueError):
+        DynamicRerunBackoffSchedule.parse(schedule)
+
+
+def test_schedule_cache_computes_backoff_from_the_attempt():
+    schedule_cache = DynamicRerunScheduleCache()
+    anchor_time = datetime(2020, 8, 15, 12, 0, 0, 250000)
+
+    assert schedule_cache.get_next_fire_time(
+        "backoff:exp(base=500ms)", anchor_time, 0
+    ) == anchor_time + timedelta(milliseconds=500)
+    assert schedule_cache.get_next_fire_time(
+        "backoff:exp(base=500ms)", anchor_time, 2
+    ) == anchor_time + timedelta(seconds=2)
+    assert schedule_cache.get_backoff_schedule(
+        "backoff:exp(base=500ms)"
+    ) is schedule_cache.get_backoff_schedule("backoff:exp(base=500ms)")
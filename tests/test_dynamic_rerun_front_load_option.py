@@ -0,0 +1,114 @@
+# This file contains tests specific to the dynamic_rerun_front_load option
+import pytest
+from helpers import _assert_result_outcomes
+from helpers import ParameterPassLevel
+
+TEST_BODY = """
+import pytest
+
+COUNTER = 0
+
+def test_first():
+    assert True
+
+@pytest.mark.dynamicrerun(attempts=2, schedule="delay:10ms")
+def test_without_reruns():
+    assert True
+
+def test_second():
+    assert True
+
+@pytest.mark.dynamicrerun(attempts=2, schedule="delay:10ms")
+def test_flaky():
+    global COUNTER
+    COUNTER = COUNTER + 1
+    assert COUNTER == 2
+"""
+
+
+@pytest.mark.parametrize(
+    "parameter_pass_level", [ParameterPassLevel.FLAG, ParameterPassLevel.INI_KEY]
+)
+def test_rerun_prone_tests_run_first(testdir, parameter_pass_level):
+    testdir.makepyfile(TEST_BODY)
+
+    args = ["-v"]
+    if parameter_pass_level == ParameterPassLevel.FLAG:
+        args.append("--dynamic-rerun-front-load=1")
+    else:  # ParameterPassLevel.INI_KEY
+        testdir.makeini(
+            """
+            [pytest]
+            dynamic_rerun_front_load = 1
+        """
+        )
+
+    # there is no history to go by in the first session
+    result = testdir.runpytest(*args)
+    result.stdout.fnmatch_lines(
+        [
+            "*::test_first PASSED*",
+            "*::test_without_reruns PASSED*",
+            "*::test_second PASSED*",
+            "*::test_flaky DYNAMIC_RERUN*",
+            "*::test_flaky PASSED*",
+        ]
+    )
+
+    result = testdir.runpytest(*args)
+
+    assert result.ret == pytest.ExitCode.OK
+    _assert_result_outcomes(result, dynamic_rerun=1, passed=4)
+    result.stdout.fnmatch_lines(
+        [
+            "*::test_flaky DYNAMIC_RERUN*",
+            "*::test_first PASSED*",
+            "*::test_without_reruns PASSED*",
+            "*::test_flaky PASSED*",
+        ]
+    )
+
+
+def test_tests_not_reordered_by_default(testdir):
+    testdir.makepyfile(TEST_BODY)
+
+    for _ in range(2):
+        result = testdir.runpytest("-v")
+
+        assert result.ret == pytest.ExitCode.OK
+        _assert_result_outcomes(result, dynamic_rerun=1, passed=4)
+        result.stdout.fnmatch_lines(
+            [
+                "*::test_first PASSED*",
+                "*::test_without_reruns PASSED*",
+                "*::test_second PASSED*",
+                "*::test_flaky DYNAMIC_RERUN*",
+                "*::test_flaky PASSED*",
+            ]
+        )
+
+
+def test_suppressed_tests_not_front_loaded(testdir):
+    testdir.makepyfile(
+        """
+        import pytest
+
+        def test_first():
+            assert True
+
+        @pytest.mark.dynamicrerun(attempts=1, schedule="delay:10ms")
+        def test_broken():
+            assert False
+        """
+    )
+    args = [
+        "-v",
+        "--dynamic-rerun-front-load=1",
+        "--dynamic-rerun-suppress-deterministic=1",
+    ]
+
+    testdir.runpytest(*args)
+    result = testdir.runpytest(*args)
+
+    _assert_result_outcomes(result, passed=1, failed=1)
+    result.stdout.fnmatch_lines(["*::test_first PASSED*", "*::test_broken FAILED*"])
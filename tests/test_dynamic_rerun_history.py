@@ -0,0 +1,210 @@
+# This file contains tests specific to DynamicRerunHistory class
+import pytest
+from helpers import _assert_result_outcomes
+
+from pytest_dynamicrerun import DynamicRerunHistory
+
+
+class FakeCache:
+    def __init__(self):
+        self.values = {}
+        self.num_gets = 0
+
+    def get(self, key, default):
+        self.num_gets += 1
+        return self.values.get(key, default)
+
+    def set(self, key, value):
+        self.values[key] = value
+
+
+def _record(history, nodeid, attempts, passed, trigger=None):
+    history.record(
+        nodeid=nodeid,
+        run_time=0,
+        attempts=attempts,
+        passed=passed,
+        trigger=trigger,
+        durations=[0.5] * attempts,
+    )
+
+
+def test_history_persisted_across_sessions():
+    cache = FakeCache()
+
+    history = DynamicRerunHistory.load(cache, ["test_a.py::test_flaky"])
+    assert history.get("test_a.py::test_flaky") is None
+    _record(history, "test_a.py::test_flaky", attempts=3, passed=True, trigger="foo")
+    history.save()
+
+    history = DynamicRerunHistory.load(cache, ["test_a.py::test_flaky"])
+    _record(history, "test_a.py::test_flaky", attempts=2, passed=False)
+    _record(history, "test_a.py::test_flaky", attempts=1, passed=True)
+    history.save()
+
+    history = DynamicRerunHistory.load(cache, ["test_a.py::test_flaky"])
+    assert history.get("test_a.py::test_flaky") == {
+        "sessions": 3,
+        "attempts": 6,
+        "rerun_sessions": 2,
+        "passed_after_rerun": 1,
+        "failed_sessions": 1,
+        "last_trigger": "foo",
+        "last_run_time": 0,
+        "durations": [0.5] * 6,
+        "recent_outcomes": ["passed_after_rerun", "failed_after_rerun", "passed"],
+    }
+    assert history.get_pass_after_rerun_rate("test_a.py::test_flaky") == 0.5
+
+
+def test_history_sharded_by_module():
+    cache = FakeCache()
+
+    history = DynamicRerunHistory.load(cache, [])
+    _record(history, "test_a.py::test_one", attempts=2, passed=True)
+    _record(history, "test_a.py::TestClass::test_two", attempts=2, passed=True)
+    _record(history, "test_b.py::test_one", attempts=2, passed=True)
+    history.save()
+    assert len(cache.values) == 2
+
+    # only the shards of the requested modules are read
+    cache.num_gets = 0
+    history = DynamicRerunHistory.load(
+        cache, ["test_a.py::test_one", "test_a.py::TestClass::test_two"]
+    )
+    assert cache.num_gets == 1
+    assert history.get("test_a.py::TestClass::test_two")["sessions"] == 1
+
+
+def test_only_changed_shards_saved():
+    cache = FakeCache()
+
+    history = DynamicRerunHistory.load(cache, ["test_a.py::test_one"])
+    history.save()
+    assert cache.values == {}
+
+    _record(history, "test_a.py::test_one", attempts=1, passed=True)
+    history.save()
+    assert len(cache.values) == 1
+
+
+def test_durations_bounded(monkeypatch):
+    monkeypatch.setattr(DynamicRerunHistory, "MAX_DURATIONS", 3)
+    history = DynamicRerunHistory.load(FakeCache(), [])
+
+    for attempts in range(1, 4):
+        history.record(
+            nodeid="test_a.py::test_one",
+            run_time=0,
+            attempts=attempts,
+            passed=True,
+            trigger=None,
+            durations=[float(attempts)] * attempts,
+        )
+
+    assert history.get("test_a.py::test_one")["durations"] == [3.0, 3.0, 3.0]
+
+
+@pytest.mark.parametrize(
+    "outcomes, num_sessions, is_deterministic_failure",
+    [
+        ([(2, False), (2, False)], 2, True),
+        ([(2, True), (2, False), (1, False)], 2, True),
+        ([(2, False), (2, True)], 2, False),
+        ([(2, False), (1, True)], 2, False),
+        ([(2, False)], 2, False),
+        ([(1, False), (1, False)], 2, False),
+        ([(2, False), (2, False), (2, True)], 3, False),
+    ],
+)
+def test_deterministic_failures(outcomes, num_sessions, is_deterministic_failure):
+    history = DynamicRerunHistory.load(FakeCache(), [])
+    assert not history.is_deterministic_failure("test_a.py::test_one", num_sessions)
+
+    for attempts, passed in outcomes:
+        _record(history, "test_a.py::test_one", attempts=attempts, passed=passed)
+
+    assert (
+        history.is_deterministic_failure("test_a.py::test_one", num_sessions)
+        == is_deterministic_failure
+    )
+
+
+def test_recent_outcomes_bounded(monkeypatch):
+    monkeypatch.setattr(DynamicRerunHistory, "MAX_RECENT_OUTCOMES", 2)
+    history = DynamicRerunHistory.load(FakeCache(), [])
+
+    _record(history, "test_a.py::test_one", attempts=1, passed=True)
+    _record(history, "test_a.py::test_one", attempts=2, passed=True)
+    _record(history, "test_a.py::test_one", attempts=2, passed=False)
+
+    assert history.get("test_a.py::test_one")["recent_outcomes"] == [
+        "passed_after_rerun",
+        "failed_after_rerun",
+    ]
+
+
+def test_pass_after_rerun_rate_unknown_without_reruns():
+    history = DynamicRerunHistory.load(FakeCache(), [])
+    assert history.get_pass_after_rerun_rate("test_a.py::test_one") is None
+
+    _record(history, "test_a.py::test_one", attempts=1, passed=True)
+    assert history.get_pass_after_rerun_rate("test_a.py::test_one") is None
+
+
+def test_unexpected_cache_values_ignored():
+    cache = FakeCache()
+    history = DynamicRerunHistory.load(cache, [])
+    cache.values[history._get_shard_key("test_a.py::test_one")] = ["not", "a", "dict"]
+
+    history = DynamicRerunHistory.load(cache, ["test_a.py::test_one"])
+    assert history.get("test_a.py::test_one") is None
+
+
+def test_session_records_history_in_pytest_cache(testdir):
+    testdir.makepyfile(
+        """
+        import os
+
+        import pytest
+
+        @pytest.mark.dynamicrerun(attempts=2, schedule="delay:10ms", triggers="foo")
+        def test_flaky():
+            counter_file = os.path.join(os.path.dirname(__file__), "counter")
+            first_attempt = not os.path.exists(counter_file)
+            open(counter_file, "w").close()
+            if first_attempt:
+                print("foo")
+                assert False
+
+        def test_without_plugin():
+            assert True
+        """
+    )
+
+    result = testdir.runpytest("-v")
+    assert result.ret == pytest.ExitCode.OK
+    _assert_result_outcomes(result, dynamic_rerun=1, passed=2)
+
+    result = testdir.runpytest("-v")
+    assert result.ret == pytest.ExitCode.OK
+    _assert_result_outcomes(result, passed=2)
+
+    config = testdir.parseconfigure()
+    nodeids = [
+        "test_session_records_history_in_pytest_cache.py::test_flaky",
+        "test_session_records_history_in_pytest_cache.py::test_without_plugin",
+    ]
+    history = DynamicRerunHistory.load(config.cache, nodeids)
+
+    entry = history.get(nodeids[0])
+    assert entry["sessions"] == 2
+    assert entry["attempts"] == 3
+    assert entry["rerun_sessions"] == 1
+    assert entry["passed_after_rerun"] == 1
+    assert entry["failed_sessions"] == 0
+    assert entry["last_trigger"] == "foo"
+    assert len(entry["durations"]) == 3
+    assert history.get_pass_after_rerun_rate(nodeids[0]) == 1
+
+    assert history.get(nodeids[1]) is None
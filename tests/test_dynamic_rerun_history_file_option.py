@@ -0,0 +1,76 @@
+# This file contains tests specific to the dynamic_rerun_history_file option
+import json
+
+import pytest
+from helpers import _assert_result_outcomes
+from helpers import ParameterPassLevel
+
+TEST_BODY = """
+import pytest
+
+COUNTER = 0
+
+@pytest.mark.dynamicrerun(attempts=3, schedule="delay:10ms")
+def test_flaky():
+    global COUNTER
+    COUNTER = COUNTER + 1
+    assert COUNTER == 3
+
+@pytest.mark.dynamicrerun(attempts=1, schedule="delay:10ms", triggers="foo")
+def test_always_triggers():
+    print("foo")
+
+def test_without_plugin():
+    assert True
+"""
+
+
+@pytest.mark.parametrize(
+    "parameter_pass_level", [ParameterPassLevel.FLAG, ParameterPassLevel.INI_KEY]
+)
+def test_history_appended_to_file(testdir, parameter_pass_level):
+    testdir.makepyfile(TEST_BODY)
+
+    if parameter_pass_level == ParameterPassLevel.FLAG:
+        args = ["-v", "--dynamic-rerun-history-file=history.jsonl"]
+    else:  # ParameterPassLevel.INI_KEY
+        testdir.makeini(
+            """
+            [pytest]
+            dynamic_rerun_history_file = history.jsonl
+        """
+        )
+        args = ["-v"]
+
+    for _ in range(2):
+        result = testdir.runpytest(*args)
+        assert result.ret == pytest.ExitCode.TESTS_FAILED
+        _assert_result_outcomes(result, dynamic_rerun=3, passed=2, failed=1)
+
+    history_lines = testdir.tmpdir.join("history.jsonl").readlines()
+    history_records = [json.loads(line) for line in history_lines]
+    assert [record["nodeid"].split("::")[1] for record in history_records] == [
+        "test_flaky",
+        "test_always_triggers",
+        "test_flaky",
+        "test_always_triggers",
+    ]
+
+    flaky_record = history_records[0]
+    assert flaky_record["attempts"] == 3
+    assert flaky_record["passed"] is True
+    assert flaky_record["trigger"] is None
+    assert len(flaky_record["durations"]) == 3
+
+    triggering_record = history_records[1]
+    assert triggering_record["attempts"] == 2
+    assert triggering_record["passed"] is True
+    assert triggering_record["trigger"] == "foo"
+
+
+def test_history_file_not_written_by_default(testdir):
+    testdir.makepyfile(TEST_BODY)
+
+    testdir.runpytest("-v")
+
+    assert not testdir.tmpdir.join("history.jsonl").exists()
@@ -0,0 +1,161 @@
+# This file contains tests specific to the dynamic_rerun_interleave option
+import pytest
+from helpers import _assert_result_outcomes
+from helpers import ParameterPassLevel
+
+TEST_BODY = """
+import time
+
+import pytest
+
+COUNTER = 0
+
+@pytest.fixture(scope="module")
+def module_fixture():
+    print("module fixture setup")
+    yield
+    print("module fixture teardown")
+
+def test_flaky(module_fixture):
+    global COUNTER
+    COUNTER = COUNTER + 1
+    if COUNTER == 1:
+        print("foo")
+
+def test_slow_a():
+    time.sleep(1.5)
+
+def test_slow_b():
+    time.sleep(1.5)
+
+def test_last():
+    pass
+"""
+
+
+@pytest.mark.parametrize(
+    "parameter_pass_level", [ParameterPassLevel.FLAG, ParameterPassLevel.INI_KEY]
+)
+def test_due_reruns_interleaved_with_regular_tests(testdir, parameter_pass_level):
+    testdir.makepyfile(TEST_BODY)
+
+    if parameter_pass_level == ParameterPassLevel.FLAG:
+        testdir.makeini(
+            """
+            [pytest]
+            dynamic_rerun_attempts = 2
+            dynamic_rerun_schedule = * * * * * *
+            dynamic_rerun_triggers = foo
+        """
+        )
+        result = testdir.runpytest("-v", "--dynamic-rerun-interleave=True")
+    else:  # ParameterPassLevel.INI_KEY
+        testdir.makeini(
+            """
+            [pytest]
+            dynamic_rerun_attempts = 2
+            dynamic_rerun_schedule = * * * * * *
+            dynamic_rerun_triggers = foo
+            dynamic_rerun_interleave = True
+        """
+        )
+        result = testdir.runpytest("-v")
+
+    result.stdout.fnmatch_lines(
+        [
+            "*::test_flaky DYNAMIC_RERUN*",
+            "*::test_slow_a PASSED*",
+            "*::test_slow_b PASSED*",
+            "*::test_flaky PASSED*",
+            "*::test_last PASSED*",
+        ]
+    )
+    assert result.ret == pytest.ExitCode.OK
+    _assert_result_outcomes(result, dynamic_rerun=1, passed=4)
+
+
+def test_reruns_not_interleaved_by_default(testdir):
+    testdir.makepyfile(TEST_BODY)
+    testdir.makeini(
+        """
+        [pytest]
+        dynamic_rerun_attempts = 2
+        dynamic_rerun_schedule = * * * * * *
+        dynamic_rerun_triggers = foo
+    """
+    )
+
+    result = testdir.runpytest("-v")
+
+    result.stdout.fnmatch_lines(
+        [
+            "*::test_flaky DYNAMIC_RERUN*",
+            "*::test_slow_a PASSED*",
+            "*::test_slow_b PASSED*",
+            "*::test_last PASSED*",
+            "*::test_flaky PASSED*",
+        ]
+    )
+    assert result.ret == pytest.ExitCode.OK
+    _assert_result_outcomes(result, dynamic_rerun=1, passed=4)
+
+
+def test_interleaved_reruns_from_other_modules_set_up_their_fixtures(testdir):
+    testdir.makepyfile(
+        test_a="""
+        import pytest
+
+        COUNTER = 0
+
+        @pytest.fixture(scope="module")
+        def module_a_fixture():
+            return "a"
+
+        def test_flaky(module_a_fixture):
+            global COUNTER
+            COUNTER = COUNTER + 1
+            assert module_a_fixture == "a"
+            assert COUNTER > 1
+        """,
+        test_b="""
+        import time
+
+        import pytest
+
+        @pytest.fixture(scope="module")
+        def module_b_fixture():
+            return "b"
+
+        def test_slow(module_b_fixture):
+            time.sleep(1.5)
+            assert module_b_fixture == "b"
+
+        def test_uses_module_fixture(module_b_fixture):
+            assert module_b_fixture == "b"
+
+        def test_last(module_b_fixture):
+            assert module_b_fixture == "b"
+        """,
+    )
+    testdir.makeini(
+        """
+        [pytest]
+        dynamic_rerun_attempts = 2
+        dynamic_rerun_schedule = * * * * * *
+        dynamic_rerun_interleave = True
+    """
+    )
+
+    result = testdir.runpytest("-v")
+
+    result.stdout.fnmatch_lines(
+        [
+            "test_a.py::test_flaky DYNAMIC_RERUN*",
+            "test_b.py::test_slow PASSED*",
+            "test_b.py::test_uses_module_fixture PASSED*",
+            "test_a.py::test_flaky PASSED*",
+            "test_b.py::test_last PASSED*",
+        ]
+    )
+    assert result.ret == pytest.ExitCode.OK
+    _assert_result_outcomes(result, dynamic_rerun=1, passed=4)
@@ -0,0 +1,121 @@
+# This file contains tests specific to the dynamic_rerun_log option
+import json
+
+import pytest
+from helpers import _assert_result_outcomes
+from helpers import ParameterPassLevel
+
+from pytest_dynamicrerun import DynamicRerunEventLog
+
+TEST_BODY = """
+import pytest
+
+COUNTER = 0
+
+@pytest.mark.dynamicrerun(attempts=2, schedule="delay:10ms")
+def test_flaky():
+    global COUNTER
+    COUNTER = COUNTER + 1
+    assert COUNTER == 2
+
+@pytest.mark.dynamicrerun(attempts=1, schedule="delay:10ms", triggers="foo")
+def test_always_triggers():
+    print("foo")
+
+def test_without_plugin():
+    assert True
+"""
+
+
+def _read_events(path, test_name):
+    events = [json.loads(line) for line in path.readlines()]
+    return [event for event in events if event["nodeid"].endswith(test_name)]
+
+
+@pytest.mark.parametrize(
+    "parameter_pass_level", [ParameterPassLevel.FLAG, ParameterPassLevel.INI_KEY]
+)
+def test_rerun_decisions_logged(testdir, parameter_pass_level):
+    testdir.makepyfile(TEST_BODY)
+
+    args = ["-v"]
+    if parameter_pass_level == ParameterPassLevel.FLAG:
+        args.append("--dynamic-rerun-log=events.jsonl")
+    else:  # ParameterPassLevel.INI_KEY
+        testdir.makeini(
+            """
+            [pytest]
+            dynamic_rerun_log = events.jsonl
+        """
+        )
+
+    result = testdir.runpytest(*args)
+
+    assert result.ret == pytest.ExitCode.TESTS_FAILED
+    _assert_result_outcomes(result, dynamic_rerun=2, passed=2, failed=1)
+
+    log_path = testdir.tmpdir.join("events.jsonl")
+    flaky_events = _read_events(log_path, "::test_flaky")
+    assert [(event["event"], event["attempt"]) for event in flaky_events] == [
+        ("attempt_started", 1),
+        ("attempt_finished", 1),
+        ("trigger_evaluated", 1),
+        ("trigger_evaluated", 1),
+        ("rerun_scheduled", 1),
+        ("attempt_started", 2),
+        ("attempt_finished", 2),
+        ("trigger_evaluated", 2),
+        ("trigger_evaluated", 2),
+        ("trigger_evaluated", 2),
+        ("item_terminated", 2),
+    ]
+    assert flaky_events[1]["passed"] is False
+    assert flaky_events[3]["when"] == "call"
+    assert flaky_events[3]["triggering"] is True
+    assert flaky_events[3]["trigger"] is None
+    assert flaky_events[4]["delay"] == 0.01
+    assert flaky_events[4]["next_fire_time"] == pytest.approx(
+        flaky_events[0]["time"] + 0.01, abs=0.005
+    )
+    assert flaky_events[6]["passed"] is True
+
+    triggering_events = _read_events(log_path, "::test_always_triggers")
+    last_call_evaluation = [
+        event
+        for event in triggering_events
+        if event["event"] == "trigger_evaluated" and event["when"] == "call"
+    ][-1]
+    assert last_call_evaluation["attempt"] == 2
+    assert last_call_evaluation["trigger"] == "foo"
+    assert triggering_events[-1]["event"] == "item_exhausted"
+    assert triggering_events[-1]["attempt"] == 2
+
+    assert not _read_events(log_path, "::test_without_plugin")
+
+
+def test_no_events_logged_by_default(testdir):
+    testdir.makepyfile(TEST_BODY)
+
+    testdir.runpytest("-v")
+
+    assert not testdir.tmpdir.join("events.jsonl").exists()
+
+
+def test_events_buffered(tmpdir, monkeypatch):
+    monkeypatch.setattr(DynamicRerunEventLog, "MAX_BUFFERED_EVENTS", 2)
+    log_path = tmpdir.join("events.jsonl")
+    event_log = DynamicRerunEventLog(str(log_path))
+
+    event_log.log("attempt_started", "test_a.py::test_one", attempt=1)
+    assert log_path.read() == ""
+
+    event_log.log("attempt_finished", "test_a.py::test_one", attempt=1)
+    assert len(log_path.readlines()) == 2
+
+    event_log.log("item_terminated", "test_a.py::test_one", attempt=1)
+    event_log.close()
+    assert [json.loads(line)["event"] for line in log_path.readlines()] == [
+        "attempt_started",
+        "attempt_finished",
+        "item_terminated",
+    ]
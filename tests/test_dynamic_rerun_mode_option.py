@@ -0,0 +1,213 @@
+# This file contains tests specific to the dynamic_rerun_mode option
+import pytest
+from helpers import _assert_result_outcomes
+from helpers import ParameterPassLevel
+
+TEST_BODY = """
+import pytest
+
+COUNTER = 0
+NUM_MODULE_FIXTURE_SETUPS = 0
+
+@pytest.fixture(scope="module")
+def module_fixture():
+    global NUM_MODULE_FIXTURE_SETUPS
+    NUM_MODULE_FIXTURE_SETUPS = NUM_MODULE_FIXTURE_SETUPS + 1
+    yield
+    print("module fixture teardown")
+
+{marker}
+def test_flaky(module_fixture):
+    global COUNTER
+    COUNTER = COUNTER + 1
+    assert COUNTER == 3
+
+def test_after(module_fixture):
+    assert NUM_MODULE_FIXTURE_SETUPS == 1
+"""
+
+
+@pytest.mark.parametrize(
+    "parameter_pass_level",
+    [ParameterPassLevel.FLAG, ParameterPassLevel.INI_KEY, ParameterPassLevel.MARKER],
+)
+def test_immediate_reruns_keep_module_fixtures(testdir, parameter_pass_level):
+    ini_mode = ""
+    args = ["-v"]
+    marker = ""
+
+    if parameter_pass_level == ParameterPassLevel.FLAG:
+        args.append("--dynamic-rerun-mode=immediate")
+    elif parameter_pass_level == ParameterPassLevel.INI_KEY:
+        ini_mode = "dynamic_rerun_mode = immediate"
+    else:  # ParameterPassLevel.MARKER
+        marker = '@pytest.mark.dynamicrerun(mode="immediate")'
+
+    testdir.makeini(
+        """
+        [pytest]
+        dynamic_rerun_attempts = 2
+        dynamic_rerun_schedule = delay:10ms
+        {}
+    """.format(
+            ini_mode
+        )
+    )
+    testdir.makepyfile(TEST_BODY.format(marker=marker))
+
+    result = testdir.runpytest(*args)
+
+    result.stdout.fnmatch_lines(
+        [
+            "*::test_flaky DYNAMIC_RERUN*",
+            "*::test_flaky DYNAMIC_RERUN*",
+            "*::test_flaky PASSED*",
+            "*::test_after PASSED*",
+        ]
+    )
+    assert result.ret == pytest.ExitCode.OK
+    _assert_result_outcomes(result, dynamic_rerun=2, passed=2)
+
+
+def test_reruns_deferred_by_default(testdir):
+    testdir.makeini(
+        """
+        [pytest]
+        dynamic_rerun_attempts = 2
+        dynamic_rerun_schedule = delay:10ms
+    """
+    )
+    testdir.makepyfile(TEST_BODY.format(marker=""))
+
+    result = testdir.runpytest("-v")
+
+    result.stdout.fnmatch_lines(
+        [
+            "*::test_flaky DYNAMIC_RERUN*",
+            "*::test_after PASSED*",
+            "*::test_flaky DYNAMIC_RERUN*",
+            "*::test_flaky PASSED*",
+        ]
+    )
+    assert result.ret == pytest.ExitCode.OK
+    _assert_result_outcomes(result, dynamic_rerun=2, passed=2)
+
+
+def test_immediate_reruns_tear_down_towards_the_next_module(testdir):
+    testdir.makepyfile(
+        test_a="""
+        import pytest
+
+        @pytest.fixture(scope="module")
+        def module_a_fixture():
+            yield
+            print("module a teardown")
+
+        @pytest.mark.dynamicrerun(attempts=2, mode="immediate", schedule="delay:10ms")
+        def test_always_false(module_a_fixture):
+            assert False
+        """,
+        test_b="""
+        def test_passes():
+            assert True
+        """,
+    )
+
+    result = testdir.runpytest("-v", "-s")
+
+    result.stdout.fnmatch_lines(
+        [
+            "test_a.py::test_always_false DYNAMIC_RERUN*",
+            "test_a.py::test_always_false DYNAMIC_RERUN*",
+            "test_a.py::test_always_false module a teardown",
+            "FAILED",
+            "test_b.py::test_passes PASSED*",
+        ]
+    )
+    assert result.stdout.str().count("module a teardown") == 1
+    assert result.ret == pytest.ExitCode.TESTS_FAILED
+    _assert_result_outcomes(result, dynamic_rerun=2, passed=1, failed=1)
+
+
+def test_immediate_reruns_retry_failed_fixture_setup(testdir):
+    testdir.makepyfile(
+        """
+        import pytest
+
+        NUM_MODULE_FIXTURE_SETUPS = 0
+
+        @pytest.fixture(scope="module")
+        def module_fixture():
+            global NUM_MODULE_FIXTURE_SETUPS
+            NUM_MODULE_FIXTURE_SETUPS = NUM_MODULE_FIXTURE_SETUPS + 1
+            assert NUM_MODULE_FIXTURE_SETUPS > 1
+
+        @pytest.mark.dynamicrerun(attempts=2, mode="immediate", schedule="delay:10ms")
+        def test_flaky_setup(module_fixture):
+            assert True
+        """
+    )
+
+    result = testdir.runpytest("-v")
+
+    assert result.ret == pytest.ExitCode.OK
+    _assert_result_outcomes(result, dynamic_rerun=1, passed=1)
+
+
+def test_immediate_reruns_keep_wider_fixtures_after_failed_function_setup(testdir):
+    testdir.makepyfile(
+        """
+        import pytest
+
+        NUM_SESSION_FIXTURE_SETUPS = 0
+        NUM_FUNCTION_FIXTURE_SETUPS = 0
+
+        @pytest.fixture(scope="session")
+        def session_fixture():
+            global NUM_SESSION_FIXTURE_SETUPS
+            NUM_SESSION_FIXTURE_SETUPS = NUM_SESSION_FIXTURE_SETUPS + 1
+
+        @pytest.fixture
+        def function_fixture(session_fixture):
+            global NUM_FUNCTION_FIXTURE_SETUPS
+            NUM_FUNCTION_FIXTURE_SETUPS = NUM_FUNCTION_FIXTURE_SETUPS + 1
+            assert NUM_FUNCTION_FIXTURE_SETUPS > 1
+
+        @pytest.mark.dynamicrerun(attempts=2, mode="immediate", schedule="delay:10ms")
+        def test_flaky_setup(function_fixture):
+            assert NUM_SESSION_FIXTURE_SETUPS == 1
+        """
+    )
+
+    result = testdir.runpytest("-v")
+
+    assert result.ret == pytest.ExitCode.OK
+    _assert_result_outcomes(result, dynamic_rerun=1, passed=1)
+
+
+@pytest.mark.parametrize("rerun_mode", ["later", "1"])
+def test_invalid_dynamic_rerun_mode_ignored(testdir, rerun_mode):
+    testdir.makeini(
+        """
+        [pytest]
+        dynamic_rerun_schedule = delay:10ms
+        dynamic_rerun_mode = {}
+    """.format(
+            rerun_mode
+        )
+    )
+    testdir.makepyfile(TEST_BODY.format(marker=""))
+
+    result = testdir.runpytest("-v")
+
+    result.stdout.fnmatch_lines(
+        [
+            "*Rerun mode must be one of 'deferred', 'immediate'. "
+            "Ignoring dynamic rerun mode '{}' and using default 'deferred'*".format(
+                rerun_mode
+            )
+        ]
+    )
+    result.stdout.fnmatch_lines(
+        ["*::test_flaky DYNAMIC_RERUN*", "*::test_after PASSED*"]
+    )
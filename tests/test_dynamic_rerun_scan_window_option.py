@@ -0,0 +1,83 @@
+# This file contains tests specific to the dynamic_rerun_scan_window option
+import pytest
+from helpers import _assert_result_outcomes
+from helpers import ParameterPassLevel
+
+TEST_BODY = """
+import pytest
+
+@pytest.mark.dynamicrerun(schedule="delay:10ms", triggers="foo")
+def test_trigger_logged_first():
+    print("foo")
+    print("." * 8 * 1024)
+
+@pytest.mark.dynamicrerun(schedule="delay:10ms", triggers="foo")
+def test_trigger_logged_last():
+    print("." * 8 * 1024)
+    print("foo")
+"""
+
+CONFTEST_BODY = """
+def pytest_runtest_logreport(report):
+    if report.when == "call" and report.dynamic_rerun_scanned_sections:
+        print("\\n{} scanned {}".format(report.nodeid, report.dynamic_rerun_scanned_sections))
+"""
+
+
+@pytest.mark.parametrize(
+    "parameter_pass_level", [ParameterPassLevel.FLAG, ParameterPassLevel.INI_KEY]
+)
+def test_only_tail_of_output_scanned(testdir, parameter_pass_level):
+    testdir.makepyfile(TEST_BODY)
+    testdir.makeconftest(CONFTEST_BODY)
+
+    if parameter_pass_level == ParameterPassLevel.FLAG:
+        result = testdir.runpytest("-v", "--dynamic-rerun-scan-window=4")
+    else:  # ParameterPassLevel.INI_KEY
+        testdir.makeini(
+            """
+            [pytest]
+            dynamic_rerun_scan_window = 4
+        """
+        )
+        result = testdir.runpytest("-v")
+
+    # every section holds 8KB of dots and 'foo', but only its last 4KB are scanned
+    assert result.ret == pytest.ExitCode.TESTS_FAILED
+    _assert_result_outcomes(result, dynamic_rerun=1, passed=1, failed=1)
+    result.stdout.fnmatch_lines(
+        [
+            "*::test_trigger_logged_first scanned ?('Captured stdout call', 4101, 8197)?",
+            "*::test_trigger_logged_last scanned ?('Captured stdout call', 4101, 8197)?",
+        ]
+    )
+
+
+def test_whole_output_scanned_by_default(testdir):
+    testdir.makepyfile(TEST_BODY)
+    testdir.makeconftest(CONFTEST_BODY)
+
+    result = testdir.runpytest("-v")
+
+    assert result.ret == pytest.ExitCode.TESTS_FAILED
+    _assert_result_outcomes(result, dynamic_rerun=2, failed=2)
+    result.stdout.fnmatch_lines(
+        ["*::test_trigger_logged_first scanned ?('Captured stdout call', 0, 8197)?"]
+    )
+
+
+@pytest.mark.parametrize("scan_window", ["0", "-1", "1.5", "big"])
+def test_invalid_scan_window_ignored(testdir, scan_window):
+    testdir.makepyfile(TEST_BODY)
+
+    result = testdir.runpytest(
+        "-v", "--dynamic-rerun-scan-window={}".format(scan_window)
+    )
+
+    result.stdout.fnmatch_lines(
+        [
+            "*Scan window must be a positive amount of KB. "
+            "Ignoring scan window '{}'*".format(scan_window)
+        ]
+    )
+    _assert_result_outcomes(result, dynamic_rerun=2, failed=2)
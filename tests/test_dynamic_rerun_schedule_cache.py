@@ -0,0 +1,60 @@
+# This file contains tests specific to DynamicRerunScheduleCache class
+from datetime import datetime
+
+import pytest
+from croniter import croniter
+
+from pytest_dynamicrerun import DynamicRerunScheduleCache
+
+
+@pytest.mark.parametrize(
+    "schedule", ["* * * * * *", "* * * * * */5", "*/2 * * * *", "0 0 * * *"]
+)
+@pytest.mark.parametrize(
+    "anchor_time",
+    [
+        datetime(2020, 8, 15, 12, 0, 0),
+        datetime(2020, 8, 15, 12, 0, 4, 999999),
+        datetime(2020, 8, 15, 23, 59, 59, 500000),
+    ],
+)
+def test_next_fire_time_matches_croniter(schedule, anchor_time):
+    schedule_cache = DynamicRerunScheduleCache()
+    expected_fire_time = croniter(schedule, anchor_time).get_next(datetime)
+
+    assert (
+        schedule_cache.get_next_fire_time(schedule, anchor_time) == expected_fire_time
+    )
+    # the second lookup is served from the memoized fire times
+    assert (
+        schedule_cache.get_next_fire_time(schedule, anchor_time) == expected_fire_time
+    )
+
+
+def test_anchors_in_the_same_second_share_one_evaluation(monkeypatch):
+    schedule_cache = DynamicRerunScheduleCache()
+    schedule = "* * * * * *"
+
+    first_fire_time = schedule_cache.get_next_fire_time(
+        schedule, datetime(2020, 8, 15, 12, 0, 0, 1)
+    )
+    monkeypatch.setattr(
+        croniter, "get_next", pytest.fail, raising=True,
+    )
+    for microsecond in range(0, 1000000, 100000):
+        anchor_time = datetime(2020, 8, 15, 12, 0, 0, microsecond)
+        assert (
+            schedule_cache.get_next_fire_time(schedule, anchor_time) is first_fire_time
+        )
+
+
+def test_memoized_fire_times_are_bounded(monkeypatch):
+    monkeypatch.setattr(DynamicRerunScheduleCache, "MAX_MEMOIZED_FIRE_TIMES", 3)
+    schedule_cache = DynamicRerunScheduleCache()
+
+    for second in range(10):
+        anchor_time = datetime(2020, 8, 15, 12, 0, second)
+        fire_time = schedule_cache.get_next_fire_time("* * * * * *", anchor_time)
+        assert fire_time == datetime(2020, 8, 15, 12, 0, second + 1)
+
+    assert len(schedule_cache._next_fire_times) == 3
@@ -118,3 +118,153 @@ def test_dynamic_rerun_properly_adheres_to_schedule(
         failed=failed_amount,
         passed=passed_amount,
     )
+
+
+@pytest.mark.parametrize(
+    "rerun_schedule,min_wait_milliseconds,max_wait_milliseconds",
+    [
+        ("delay:200ms", [200, 200, 200], [900, 900, 900]),
+        ("backoff:exp(base=100ms,factor=2)", [100, 200, 400], [800, 900, 1100]),
+        (
+            "backoff:exp(base=100ms,max=200ms,jitter=0.5)",
+            [50, 100, 100],
+            [750, 800, 800],
+        ),
+    ],
+)
+def test_dynamic_rerun_adheres_to_backoff_schedule(
+    testdir, rerun_schedule, min_wait_milliseconds, max_wait_milliseconds
+):
+    testdir.makeini(
+        """
+        [pytest]
+        dynamic_rerun_attempts = 3
+        dynamic_rerun_schedule = {}
+    """.format(
+            rerun_schedule
+        )
+    )
+
+    # delays are measured from the start of the previous attempt, so they are at least the scheduled delay
+    # minus the time it took to get to the rerun loop
+    testdir.makeconftest(
+        """
+        from datetime import timedelta
+
+        def pytest_sessionfinish(session, exitstatus):
+            run_times = session.dynamic_rerun_items[0].dynamic_rerun_run_times
+            assert len(run_times) == 4
+            for i, (min_wait, max_wait) in enumerate(zip({}, {})):
+                delay = run_times[i + 1] - run_times[i]
+                assert timedelta(milliseconds=min_wait) <= delay <= timedelta(milliseconds=max_wait)
+    """.format(
+            min_wait_milliseconds, max_wait_milliseconds
+        )
+    )
+
+    testdir.makepyfile("def test_always_false(): assert False")
+
+    result = testdir.runpytest("-v")
+
+    assert "Can't parse invalid dynamic rerun schedule" not in result.stdout.str()
+    assert result.ret == pytest.ExitCode.TESTS_FAILED
+    _assert_result_outcomes(result, dynamic_rerun=3, failed=1)
+
+
+@pytest.mark.parametrize(
+    "rerun_schedule", ["delay:soon", "backoff:linear", "backoff:exp(jitter=2)"]
+)
+def test_invalid_backoff_schedule_ignored(testdir, rerun_schedule):
+    testdir.makeini(
+        """
+        [pytest]
+        dynamic_rerun_schedule = {}
+    """.format(
+            rerun_schedule
+        )
+    )
+    testdir.makepyfile("def test_always_false(): assert False")
+
+    result = testdir.runpytest("-v")
+
+    result.stdout.fnmatch_lines(
+        [
+            "*Can't parse invalid dynamic rerun schedule '{}'. "
+            "Ignoring dynamic rerun schedule and using default '* * * * * *'*".format(
+                rerun_schedule
+            )
+        ]
+    )
+    _assert_result_outcomes(result, dynamic_rerun=1, failed=1)
+
+
+def test_sub_second_delays_are_honored(testdir):
+    testdir.makeini(
+        """
+        [pytest]
+        dynamic_rerun_attempts = 20
+        dynamic_rerun_schedule = delay:50ms
+    """
+    )
+
+    testdir.makeconftest(
+        """
+        from datetime import timedelta
+
+        def pytest_sessionfinish(session, exitstatus):
+            item = session.dynamic_rerun_items[0]
+            assert len(item.dynamic_rerun_sleep_times) == 20
+            for sleep_time in item.dynamic_rerun_sleep_times:
+                assert timedelta(milliseconds=50) <= sleep_time < timedelta(milliseconds=500)
+
+            # delays aren't rounded up to the next second
+            assert item.dynamic_rerun_run_times[-1] - item.dynamic_rerun_run_times[0] < timedelta(seconds=10)
+    """
+    )
+
+    testdir.makepyfile("def test_always_false(): assert False")
+
+    result = testdir.runpytest("-v")
+
+    assert result.ret == pytest.ExitCode.TESTS_FAILED
+    _assert_result_outcomes(result, dynamic_rerun=20, failed=1)
+
+
+def test_wall_clock_adjustments_dont_shift_reruns(testdir):
+    # the wall clock jumps back an hour once the first attempt has started, like an NTP correction would.
+    # Waiting on the wall clock would then sleep for an hour before the first rerun
+    testdir.makeconftest(
+        """
+        from datetime import datetime
+        from datetime import timedelta
+
+        import pytest_dynamicrerun
+
+        class AdjustedDatetime(datetime):
+            num_calls = 0
+
+            @classmethod
+            def now(cls, tz=None):
+                cls.num_calls += 1
+                if cls.num_calls == 1:
+                    return datetime.now(tz)
+                return datetime.now(tz) - timedelta(hours=1)
+
+        def pytest_configure(config):
+            pytest_dynamicrerun.datetime = AdjustedDatetime
+    """
+    )
+    testdir.makepyfile(
+        """
+        import pytest
+
+        @pytest.mark.dynamicrerun(attempts=2, schedule="delay:100ms")
+        def test_always_false():
+            assert False
+    """
+    )
+
+    result = testdir.runpytest_subprocess("-v", timeout=60)
+
+    assert result.ret == pytest.ExitCode.TESTS_FAILED
+    _assert_result_outcomes(result, dynamic_rerun=2, failed=1)
@@ -0,0 +1,99 @@
+# This file contains tests specific to DynamicRerunScheduler class
+import time
+from datetime import datetime
+from datetime import timedelta
+
+from pytest_dynamicrerun import DynamicRerunScheduler
+
+
+class FakeItem:
+    def __init__(self, name):
+        self.name = name
+
+
+def test_due_items_popped_in_scheduling_order():
+    now = datetime.now()
+    items = [FakeItem(name) for name in "abcd"]
+
+    scheduler = DynamicRerunScheduler()
+    scheduler.schedule(items[3], now + timedelta(seconds=1), 3)
+    scheduler.schedule(items[1], now - timedelta(seconds=1), 1)
+    scheduler.schedule(items[0], now, 0)
+    scheduler.schedule(items[2], now - timedelta(seconds=2), 2)
+
+    assert len(scheduler) == 4
+    assert scheduler.get_next_fire_time() == now - timedelta(seconds=2)
+
+    assert scheduler.pop_due_items(now) == items[:3]
+    assert len(scheduler) == 1
+    assert items[3] in scheduler
+    assert items[0] not in scheduler
+
+    assert scheduler.pop_due_items(now) == []
+    assert scheduler.get_next_fire_time() == now + timedelta(seconds=1)
+    assert scheduler.pop_due_items(now + timedelta(seconds=1)) == [items[3]]
+    assert not scheduler
+    assert scheduler.get_next_fire_time() is None
+
+
+def test_removed_and_rescheduled_items_are_not_popped_twice():
+    now = datetime.now()
+    items = [FakeItem(name) for name in "abc"]
+
+    scheduler = DynamicRerunScheduler()
+    for order, item in enumerate(items):
+        scheduler.schedule(item, now, order)
+
+    scheduler.remove(items[0])
+    scheduler.remove(items[0])
+    scheduler.schedule(items[1], now + timedelta(seconds=5), 1)
+
+    assert len(scheduler) == 2
+    assert items[0] not in scheduler
+    assert scheduler.get_next_fire_time() == now
+    assert scheduler.pop_due_items(now) == [items[2]]
+    assert scheduler.get_next_fire_time() == now + timedelta(seconds=5)
+    assert scheduler.pop_due_items(now + timedelta(seconds=5)) == [items[1]]
+    assert not scheduler
+
+
+def test_many_due_items_popped_a_few_at_a_time():
+    # the xdist controller pops one due item per idle worker each time a worker becomes idle
+    now = datetime.now()
+    items = [FakeItem(str(i)) for i in range(5000)]
+
+    scheduler = DynamicRerunScheduler()
+    for order, item in reversed(list(enumerate(items))):
+        scheduler.schedule(item, now - timedelta(microseconds=order), order)
+
+    start_time = time.monotonic()
+    popped_items = []
+    while scheduler:
+        due_items = scheduler.pop_due_items(now, max_items=3)
+        assert 0 < len(due_items) <= 3
+        popped_items.extend(due_items)
+
+    assert popped_items == items
+    # re-sorting every due item on each pop made this quadratic in the number of due items
+    assert time.monotonic() - start_time < 1
+
+
+def test_items_due_later_wait_behind_earlier_due_items():
+    now = datetime.now()
+    items = [FakeItem(name) for name in "abc"]
+
+    scheduler = DynamicRerunScheduler()
+    scheduler.schedule(items[0], now, 2)
+    scheduler.schedule(items[1], now, 1)
+    scheduler.schedule(items[2], now + timedelta(seconds=1), 0)
+
+    assert scheduler.pop_due_items(now, max_items=1) == [items[1]]
+    assert scheduler.peek() == (now, items[0])
+
+    # the item left due keeps its place behind items found due later but ordered before it
+    assert scheduler.pop_due_items(now + timedelta(seconds=1), max_items=1) == [
+        items[2]
+    ]
+    scheduler.remove(items[0])
+    assert scheduler.peek() is None
+    assert scheduler.pop_due_items(now + timedelta(seconds=1)) == []
@@ -0,0 +1,84 @@
+# This file contains tests specific to the dynamic_rerun_suppress_deterministic option
+import pytest
+from helpers import _assert_result_outcomes
+from helpers import ParameterPassLevel
+
+TEST_BODY = """
+import pytest
+
+COUNTER = 0
+
+@pytest.mark.dynamicrerun(attempts=2, schedule="delay:10ms")
+def test_broken():
+    assert False
+
+@pytest.mark.dynamicrerun(attempts=2, schedule="delay:10ms")
+def test_flaky():
+    global COUNTER
+    COUNTER = COUNTER + 1
+    assert COUNTER == 2
+"""
+
+
+@pytest.mark.parametrize(
+    "parameter_pass_level", [ParameterPassLevel.FLAG, ParameterPassLevel.INI_KEY]
+)
+def test_deterministic_failures_not_rerun(testdir, parameter_pass_level):
+    testdir.makepyfile(TEST_BODY)
+
+    args = []
+    if parameter_pass_level == ParameterPassLevel.FLAG:
+        args.append("--dynamic-rerun-suppress-deterministic=2")
+    else:  # ParameterPassLevel.INI_KEY
+        testdir.makeini(
+            """
+            [pytest]
+            dynamic_rerun_suppress_deterministic = 2
+        """
+        )
+
+    # the history needs two sessions of failing reruns before reruns are suppressed
+    for _ in range(2):
+        result = testdir.runpytest("-v", *args)
+        _assert_result_outcomes(result, dynamic_rerun=3, passed=1, failed=1)
+        assert "rerun suppressed" not in result.stdout.str()
+
+    result = testdir.runpytest("-v", *args)
+
+    assert result.ret == pytest.ExitCode.TESTS_FAILED
+    _assert_result_outcomes(result, dynamic_rerun=1, passed=1, failed=1)
+    result.stdout.fnmatch_lines(
+        [
+            "*::test_broken FAILED*",
+            "*::test_flaky DYNAMIC_RERUN*",
+            "*::test_flaky PASSED*",
+            "*Dynamic reruns skipped*",
+            "*::test_broken - rerun suppressed (deterministic)",
+        ]
+    )
+
+
+def test_deterministic_failures_rerun_by_default(testdir):
+    testdir.makepyfile(TEST_BODY)
+
+    for _ in range(3):
+        result = testdir.runpytest("-v")
+        _assert_result_outcomes(result, dynamic_rerun=3, passed=1, failed=1)
+        assert "rerun suppressed" not in result.stdout.str()
+
+
+@pytest.mark.parametrize("num_sessions", ["0", "-1", "many"])
+def test_invalid_suppress_deterministic_ignored(testdir, num_sessions):
+    testdir.makepyfile(TEST_BODY)
+
+    result = testdir.runpytest(
+        "-v", "--dynamic-rerun-suppress-deterministic={}".format(num_sessions)
+    )
+
+    result.stdout.fnmatch_lines(
+        [
+            "*Deterministic failure sessions must be a positive integer. "
+            "Not suppressing reruns for '{}'*".format(num_sessions)
+        ]
+    )
+    _assert_result_outcomes(result, dynamic_rerun=3, passed=1, failed=1)
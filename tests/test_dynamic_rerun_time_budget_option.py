@@ -0,0 +1,115 @@
+# This file contains tests specific to the dynamic_rerun_time_budget option
+import pytest
+from helpers import _assert_result_outcomes
+from helpers import ParameterPassLevel
+
+TEST_BODY = """
+import time
+
+import pytest
+
+COUNTER = 0
+
+def test_flaky():
+    global COUNTER
+    COUNTER = COUNTER + 1
+    assert COUNTER > 1
+
+@pytest.mark.dynamicrerun(schedule="0 0 1 1 *")
+def test_flaky_yearly():
+    assert False
+
+@pytest.mark.dynamicrerun(schedule="* * * * * *")
+def test_slow():
+    time.sleep(3)
+    assert False
+
+def test_passes():
+    assert True
+"""
+
+
+@pytest.mark.parametrize(
+    "parameter_pass_level", [ParameterPassLevel.FLAG, ParameterPassLevel.INI_KEY]
+)
+def test_reruns_over_budget_are_skipped(testdir, parameter_pass_level):
+    testdir.makepyfile(TEST_BODY)
+    if parameter_pass_level == ParameterPassLevel.FLAG:
+        testdir.makeini(
+            """
+            [pytest]
+            dynamic_rerun_schedule = * * * * * *
+        """
+        )
+        result = testdir.runpytest("-v", "--dynamic-rerun-time-budget=2.5")
+    else:
+        testdir.makeini(
+            """
+            [pytest]
+            dynamic_rerun_schedule = * * * * * *
+            dynamic_rerun_time_budget = 2.5
+        """
+        )
+        result = testdir.runpytest("-v")
+
+    # test_flaky_yearly would wait until next year and test_slow's rerun takes longer than the budget
+    assert result.ret == pytest.ExitCode.TESTS_FAILED
+    _assert_result_outcomes(result, dynamic_rerun=3, passed=2, failed=2)
+    result.stdout.fnmatch_lines(
+        [
+            "*Dynamic reruns skipped*",
+            "*::test_slow - not rerun: budget exhausted",
+            "*::test_flaky_yearly - not rerun: budget exhausted",
+        ]
+    )
+    assert "test_flaky - not rerun" not in result.stdout.str()
+
+
+def test_reruns_not_limited_by_default(testdir):
+    testdir.makepyfile(
+        """
+        COUNTER = 0
+
+        def test_flaky():
+            global COUNTER
+            COUNTER = COUNTER + 1
+            assert COUNTER > 1
+        """
+    )
+
+    result = testdir.runpytest(
+        "-v", "--dynamic-rerun-schedule=* * * * * *", "--dynamic-rerun-attempts=3"
+    )
+
+    assert result.ret == pytest.ExitCode.OK
+    _assert_result_outcomes(result, dynamic_rerun=1, passed=1)
+    assert "Dynamic reruns skipped" not in result.stdout.str()
+
+
+@pytest.mark.parametrize("time_budget", [0, -1, "foobar"])
+def test_invalid_dynamic_rerun_time_budget_ignored(testdir, time_budget):
+    testdir.makepyfile(
+        """
+        COUNTER = 0
+
+        def test_flaky():
+            global COUNTER
+            COUNTER = COUNTER + 1
+            assert COUNTER > 1
+        """
+    )
+
+    result = testdir.runpytest(
+        "-v",
+        "--dynamic-rerun-schedule=* * * * * *",
+        "--dynamic-rerun-time-budget={}".format(time_budget),
+    )
+
+    result.stdout.fnmatch_lines(
+        [
+            "*Rerun time budget must be a positive number of seconds. "
+            "Ignoring rerun time budget '{}'*".format(time_budget)
+        ]
+    )
+    assert result.ret == pytest.ExitCode.OK
+    _assert_result_outcomes(result, dynamic_rerun=1, passed=1)
@@ -0,0 +1,293 @@
+# This file contains tests specific to the dynamic_rerun_trigger_file option
+import json
+import os
+
+import pytest
+from helpers import _assert_result_outcomes
+from helpers import ParameterPassLevel
+
+import pytest_dynamicrerun
+from pytest_dynamicrerun import DynamicRerunTriggerFile
+
+SIGNATURES = {
+    "signatures": [
+        {"trigger": "ConnectionResetError", "attempts": 3},
+        {"trigger": "database is locked"},
+    ]
+}
+
+TEST_BODY = """
+import pytest
+
+pytestmark = pytest.mark.dynamicrerun(schedule="delay:10ms")
+
+def test_connection_reset():
+    raise ConnectionResetError()
+
+def test_database_locked():
+    print("database is locked")
+    assert False
+
+def test_broken():
+    assert False
+"""
+
+
+class FakeCache:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key, default):
+        return self.values.get(key, default)
+
+    def set(self, key, value):
+        self.values[key] = value
+
+
+@pytest.mark.parametrize(
+    "parameter_pass_level", [ParameterPassLevel.FLAG, ParameterPassLevel.INI_KEY]
+)
+def test_signatures_rerun_with_their_own_attempts(testdir, parameter_pass_level):
+    testdir.makefile(".json", signatures=json.dumps(SIGNATURES))
+    testdir.makepyfile(TEST_BODY)
+
+    args = ["-v"]
+    if parameter_pass_level == ParameterPassLevel.FLAG:
+        args.append("--dynamic-rerun-trigger-file=signatures.json")
+    else:  # ParameterPassLevel.INI_KEY
+        testdir.makeini(
+            """
+            [pytest]
+            dynamic_rerun_trigger_file = signatures.json
+        """
+        )
+
+    result = testdir.runpytest(*args)
+
+    # only failures matching a signature are rerun, test_database_locked keeps its single attempt
+    assert result.ret == pytest.ExitCode.TESTS_FAILED
+    _assert_result_outcomes(result, dynamic_rerun=4, failed=3)
+    assert result.stdout.str().count("::test_connection_reset DYNAMIC_RERUN") == 3
+    assert result.stdout.str().count("::test_database_locked DYNAMIC_RERUN") == 1
+    assert "::test_broken DYNAMIC_RERUN" not in result.stdout.str()
+
+
+def test_signatures_added_to_marker_triggers(testdir):
+    testdir.makefile(".json", signatures=json.dumps(SIGNATURES))
+    testdir.makepyfile(
+        """
+        import pytest
+
+        @pytest.mark.dynamicrerun(attempts=2, schedule="delay:10ms", triggers="broken")
+        def test_broken():
+            print("broken")
+            assert False
+
+        @pytest.mark.dynamicrerun(attempts=2, schedule="delay:10ms", triggers="broken")
+        def test_connection_reset():
+            raise ConnectionResetError()
+        """
+    )
+
+    result = testdir.runpytest("-v", "--dynamic-rerun-trigger-file=signatures.json")
+
+    assert result.ret == pytest.ExitCode.TESTS_FAILED
+    _assert_result_outcomes(result, dynamic_rerun=5, failed=2)
+    assert result.stdout.str().count("::test_broken DYNAMIC_RERUN") == 2
+    assert result.stdout.str().count("::test_connection_reset DYNAMIC_RERUN") == 3
+
+
+def test_signature_schedule_used(testdir):
+    testdir.makefile(
+        ".json",
+        signatures=json.dumps(
+            {
+                "signatures": [
+                    {"trigger": "ConnectionResetError", "schedule": "delay:200ms"}
+                ]
+            }
+        ),
+    )
+    testdir.makepyfile(TEST_BODY)
+
+    result = testdir.runpytest(
+        "-v",
+        "--dynamic-rerun-trigger-file=signatures.json",
+        "--dynamic-rerun-log=events.jsonl",
+    )
+
+    _assert_result_outcomes(result, dynamic_rerun=1, failed=3)
+    events = [
+        json.loads(line) for line in testdir.tmpdir.join("events.jsonl").readlines()
+    ]
+    delays = [event["delay"] for event in events if event["event"] == "rerun_scheduled"]
+    assert delays == [0.2]
+
+
+def test_higher_priority_reruns_run_first(testdir):
+    testdir.makefile(
+        ".json",
+        signatures=json.dumps(
+            {
+                "signatures": [
+                    {"trigger": "low priority", "priority": 1},
+                    {"trigger": "high priority", "priority": 2},
+                ]
+            }
+        ),
+    )
+    testdir.makepyfile(
+        """
+        import time
+
+        import pytest
+
+        COUNTERS = {}
+
+        def _fail_once(name):
+            COUNTERS[name] = COUNTERS.get(name, 0) + 1
+            if COUNTERS[name] == 1:
+                # outlasts the rerun delay, so both reruns are due once the last attempt is done
+                time.sleep(0.05)
+                print(name)
+                assert False
+
+        @pytest.mark.dynamicrerun(schedule="delay:10ms")
+        def test_low():
+            _fail_once("low priority")
+
+        @pytest.mark.dynamicrerun(schedule="delay:10ms")
+        def test_high():
+            _fail_once("high priority")
+        """
+    )
+
+    result = testdir.runpytest("-v", "--dynamic-rerun-trigger-file=signatures.json")
+
+    assert result.ret == pytest.ExitCode.OK
+    _assert_result_outcomes(result, dynamic_rerun=2, passed=2)
+    result.stdout.fnmatch_lines(
+        [
+            "*::test_low DYNAMIC_RERUN*",
+            "*::test_high DYNAMIC_RERUN*",
+            "*::test_high PASSED*",
+            "*::test_low PASSED*",
+        ]
+    )
+
+
+def test_toml_trigger_file(testdir):
+    if pytest_dynamicrerun.tomllib is None:
+        pytest.skip("reading TOML needs Python 3.11 or the toml package")
+
+    testdir.makefile(
+        ".toml",
+        signatures="""
+        [[signatures]]
+        trigger = "ConnectionResetError"
+        attempts = 2
+        """,
+    )
+    testdir.makepyfile(TEST_BODY)
+
+    result = testdir.runpytest("-v", "--dynamic-rerun-trigger-file=signatures.toml")
+
+    _assert_result_outcomes(result, dynamic_rerun=2, failed=3)
+    assert result.stdout.str().count("::test_connection_reset DYNAMIC_RERUN") == 2
+
+
+def test_plain_text_trigger_file(testdir):
+    testdir.makefile(
+        ".txt",
+        signatures="""
+        # one trigger per line
+        ConnectionResetError
+
+        database is locked
+        """,
+    )
+    testdir.makepyfile(TEST_BODY)
+
+    result = testdir.runpytest("-v", "--dynamic-rerun-trigger-file=signatures.txt")
+
+    _assert_result_outcomes(result, dynamic_rerun=2, failed=3)
+    assert "::test_broken DYNAMIC_RERUN" not in result.stdout.str()
+
+
+def test_parsed_signatures_cached_until_the_file_changes(tmpdir, monkeypatch):
+    trigger_file_path = str(tmpdir.join("signatures.json"))
+    with open(trigger_file_path, "w") as trigger_file:
+        json.dump(SIGNATURES, trigger_file)
+    cache = FakeCache()
+
+    trigger_file = DynamicRerunTriggerFile.load(trigger_file_path, cache)
+    assert trigger_file.triggers == ["ConnectionResetError", "database is locked"]
+    assert trigger_file.get_signature("ConnectionResetError") == (
+        "ConnectionResetError",
+        3,
+        None,
+        0,
+    )
+    assert trigger_file.get_signature("foo") is None
+
+    def _fail_parsing(path):
+        pytest.fail("the trigger file should not be parsed again")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(DynamicRerunTriggerFile, "_parse_signatures", _fail_parsing)
+        cached_trigger_file = DynamicRerunTriggerFile.load(trigger_file_path, cache)
+    assert cached_trigger_file.triggers == trigger_file.triggers
+    assert cached_trigger_file.get_signature("ConnectionResetError").attempts == 3
+
+    with open(trigger_file_path, "w") as trigger_file:
+        json.dump({"signatures": [{"trigger": "foo", "priority": 1}]}, trigger_file)
+    os.utime(trigger_file_path, ns=(0, 0))
+
+    trigger_file = DynamicRerunTriggerFile.load(trigger_file_path, cache)
+    assert trigger_file.triggers == ["foo"]
+    assert trigger_file.get_signature("foo").priority == 1
+
+
+@pytest.mark.parametrize(
+    "signature",
+    [
+        {"attempts": 2},
+        {"trigger": "foo", "attempts": 0},
+        {"trigger": "foo", "attempts": "2"},
+        {"trigger": "foo", "schedule": "not a schedule"},
+        {"trigger": "foo", "priority": "high"},
+    ],
+)
+def test_invalid_signatures_ignored(tmpdir, signature):
+    trigger_file_path = str(tmpdir.join("signatures.json"))
+    with open(trigger_file_path, "w") as trigger_file:
+        json.dump({"signatures": [signature, {"trigger": "bar"}]}, trigger_file)
+
+    with pytest.warns(UserWarning, match="Ignoring invalid signature"):
+        trigger_file = DynamicRerunTriggerFile.load(trigger_file_path)
+
+    assert trigger_file.triggers == ["bar"]
+
+
+@pytest.mark.parametrize(
+    "file_name,content",
+    [
+        ("signatures.json", "{not json"),
+        ("signatures.json", '["ConnectionResetError"]'),
+        ("missing.json", None),
+    ],
+)
+def test_unreadable_trigger_file_ignored(testdir, file_name, content):
+    if content is not None:
+        testdir.tmpdir.join(file_name).write(content)
+    testdir.makepyfile(TEST_BODY)
+
+    result = testdir.runpytest(
+        "-v", "--dynamic-rerun-trigger-file={}".format(file_name)
+    )
+
+    result.stdout.fnmatch_lines(
+        ["*Can't read dynamic rerun trigger file '{}'*Ignoring it*".format(file_name)]
+    )
+    # without a trigger file every failure is rerun
+    _assert_result_outcomes(result, dynamic_rerun=3, failed=3)
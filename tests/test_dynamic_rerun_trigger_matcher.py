@@ -0,0 +1,206 @@
+# This file contains tests specific to DynamicRerunTriggerMatcher class
+import json
+
+import pytest
+
+from pytest_dynamicrerun import DynamicRerunTriggerMatcher
+
+
+@pytest.mark.parametrize(
+    "triggers,text,expected_trigger",
+    [
+        (["foo"], "a foo b", "foo"),
+        (["foo"], "a bar b", None),
+        (["foo", "bar"], "a bar b", "bar"),
+        (["foo", "bar"], "bar then foo", "bar"),
+        (["^My.*output$"], "My print output\n", "^My.*output$"),
+        (["(a|b)c", "d"], "xbc", "(a|b)c"),
+        (["(?P<name>a)b", "(?P<name>c)d"], "cd", "(?P<name>c)d"),
+        (["(ab)\\1"], "abab", "(ab)\\1"),
+        (["(a)?(?(1)b|c)"], "ab", "(a)?(?(1)b|c)"),
+        (["foo", "(a)?(?(1)b|c)"], "ab", "(a)?(?(1)b|c)"),
+        (["(?i)error"], "An ERROR occurred", "(?i)error"),
+        (["(?i)error", "foo"], "foo", "foo"),
+        ([123], "the number 123", "123"),
+        (
+            ["Conn", "ConnectionResetError"],
+            "a ConnectionResetError",
+            "ConnectionResetError",
+        ),
+        (["ConnectionResetError", "Conn"], "a ConnectionRefusedError", "Conn"),
+        (["literal:a.c"], "abc", None),
+        (["literal:a.c"], "xa.cy", "literal:a.c"),
+        (["foo", "b.r"], "bar then foo", "b.r"),
+        (["fo+", "bar"], "bar then foo", "bar"),
+    ],
+)
+def test_search_returns_matching_trigger(triggers, text, expected_trigger):
+    trigger_matcher = DynamicRerunTriggerMatcher(triggers)
+    assert trigger_matcher.search(text) == expected_trigger
+
+
+def test_invalid_regex_trigger_matched_as_plain_text():
+    with pytest.warns(UserWarning, match="Can't compile invalid dynamic rerun trigger"):
+        trigger_matcher = DynamicRerunTriggerMatcher(["a(b", "c"])
+
+    assert trigger_matcher.search("xa(by") == "a(b"
+    assert trigger_matcher.search("ab") is None
+    assert trigger_matcher.search("c") == "c"
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(DynamicRerunTriggerMatcher, "CHUNK_SIZE", 10)
+    monkeypatch.setattr(DynamicRerunTriggerMatcher, "CHUNK_OVERLAP", 4)
+
+
+@pytest.mark.parametrize(
+    "text,window_size,expected_result",
+    [
+        # searched in the chunks [10, 20), [4, 14) and [0, 8)
+        ("foo" + "." * 17, 20, ("foo", 0)),
+        ("foo" + "." * 17, 12, (None, 8)),
+        ("." * 17 + "foo", 20, ("foo", 10)),
+        # spans the first two chunks
+        ("." * 9 + "foo" + "." * 8, 20, ("foo", 4)),
+        ("", 20, (None, 0)),
+    ],
+)
+def test_search_tail_scans_window_from_the_end(
+    small_chunks, text, window_size, expected_result
+):
+    trigger_matcher = DynamicRerunTriggerMatcher(["foo"])
+
+    assert trigger_matcher.search_tail(text, window_size) == expected_result
+
+
+def test_search_tail_returns_last_match(small_chunks):
+    trigger_matcher = DynamicRerunTriggerMatcher(["foo", "bar"])
+
+    text = "foo" + "." * 20 + "bar"
+    assert trigger_matcher.search(text) == "foo"
+    assert trigger_matcher.search_tail(text, len(text)) == ("bar", 16)
+
+
+def test_literal_triggers_merged_into_a_prefix_tree():
+    trigger_matcher = DynamicRerunTriggerMatcher(
+        [
+            "ConnectionResetError",
+            "ConnectionRefusedError",
+            "503 Service Unavailable",
+            "literal:a(b",
+            "Timeout after \\d+s",
+        ]
+    )
+
+    assert trigger_matcher._literal_regex.pattern == (
+        "(?:503\\ Service\\ Unavailable|ConnectionRe(?:fusedError|setError)|a\\(b)"
+    )
+    assert (
+        trigger_matcher.search("got ConnectionRefusedError") == "ConnectionRefusedError"
+    )
+    assert trigger_matcher.search("Timeout after 5s") == "Timeout after \\d+s"
+
+
+class ServiceUnavailable(Exception):
+    class Retryable(Exception):
+        pass
+
+
+def _raise_from(exception, cause):
+    try:
+        raise exception from cause
+    except Exception as raised_exception:
+        return raised_exception
+
+
+def _raise_while_handling(exception, context):
+    try:
+        try:
+            raise context
+        except Exception:
+            raise exception
+    except Exception as raised_exception:
+        return raised_exception
+
+
+@pytest.mark.parametrize(
+    "trigger,expected_class",
+    [
+        ("exc:ConnectionError", ConnectionError),
+        ("exc:json.JSONDecodeError", json.JSONDecodeError),
+        ("exc:json.decoder.JSONDecodeError", json.JSONDecodeError),
+        (
+            "exc:test_dynamic_rerun_trigger_matcher.ServiceUnavailable.Retryable",
+            ServiceUnavailable.Retryable,
+        ),
+    ],
+)
+def test_exception_triggers_resolved_to_their_class(trigger, expected_class):
+    trigger_matcher = DynamicRerunTriggerMatcher([trigger])
+
+    assert trigger_matcher._exception_triggers == [(trigger, expected_class)]
+
+
+@pytest.mark.parametrize(
+    "trigger", ["exc:", "exc:NoSuchError", "exc:no_such_module.Error", "exc:json.loads"]
+)
+def test_unresolvable_exception_trigger_ignored(trigger):
+    with pytest.warns(UserWarning, match="Can't resolve dynamic rerun trigger"):
+        trigger_matcher = DynamicRerunTriggerMatcher([trigger, "exc:ValueError"])
+
+    assert trigger_matcher.search_exception(ValueError()) == "exc:ValueError"
+
+
+@pytest.mark.parametrize(
+    "module_body", ["raise RuntimeError('broken module')", "class Error(Exception"]
+)
+def test_exception_trigger_in_broken_module_ignored(testdir, monkeypatch, module_body):
+    testdir.makepyfile(broken_module=module_body)
+    monkeypatch.syspath_prepend(str(testdir.tmpdir))
+
+    with pytest.warns(UserWarning, match="Can't resolve dynamic rerun trigger"):
+        trigger_matcher = DynamicRerunTriggerMatcher(
+            ["exc:broken_module.Error", "exc:ValueError"]
+        )
+
+    assert trigger_matcher.search_exception(ValueError()) == "exc:ValueError"
+
+
+@pytest.mark.parametrize(
+    "exception,expected_trigger",
+    [
+        (ConnectionResetError(), "exc:ConnectionError"),
+        (ValueError(), None),
+        (_raise_from(RuntimeError(), ConnectionResetError()), "exc:ConnectionError"),
+        (_raise_while_handling(RuntimeError(), TimeoutError()), "exc:TimeoutError"),
+        # the outermost matching exception wins
+        (_raise_from(TimeoutError(), ConnectionResetError()), "exc:TimeoutError"),
+        (_raise_from(KeyError(), ValueError()), None),
+    ],
+)
+def test_search_exception_walks_the_exception_chain(exception, expected_trigger):
+    trigger_matcher = DynamicRerunTriggerMatcher(
+        ["exc:ConnectionError", "exc:TimeoutError", "ValueError"]
+    )
+
+    assert trigger_matcher.search_exception(exception) == expected_trigger
+
+
+def test_search_exception_handles_cycles():
+    first_exception = ValueError()
+    second_exception = KeyError()
+    first_exception.__context__ = second_exception
+    second_exception.__context__ = first_exception
+
+    trigger_matcher = DynamicRerunTriggerMatcher(["exc:ConnectionError"])
+
+    assert trigger_matcher.search_exception(first_exception) is None
+
+
+def test_exception_triggers_never_match_text():
+    trigger_matcher = DynamicRerunTriggerMatcher(["exc:ConnectionError", "foo"])
+
+    assert trigger_matcher.search("exc:ConnectionError ConnectionError") is None
+    assert trigger_matcher.search_exception(ConnectionError()) == "exc:ConnectionError"
+    assert trigger_matcher.search_exception(Exception("foo")) is None
@@ -267,3 +267,118 @@ def test_dynamic_rerun_triggers_can_handle_regexes(testdir, rerun_regex, should_
         failed=failed_amount,
         passed=passed_amount,
     )
+
+
+def test_matched_trigger_recorded_on_report(testdir):
+    testdir.makeini(
+        """
+[pytest]
+dynamic_rerun_attempts = 1
+dynamic_rerun_schedule = * * * * * *
+dynamic_rerun_triggers = not printed
+    second trigger
+    """
+    )
+
+    testdir.makeconftest(
+        """
+        def pytest_runtest_logreport(report):
+            if report.when == "call":
+                assert report.dynamic_rerun_trigger == "second trigger"
+    """
+    )
+
+    testdir.makepyfile("def test_print_trigger(): print('the second trigger')")
+    result = testdir.runpytest("-v")
+
+    assert result.ret == pytest.ExitCode.TESTS_FAILED
+    _assert_result_outcomes(result, dynamic_rerun=1, failed=1)
+
+
+@pytest.mark.parametrize(
+    "parameter_pass_level",
+    [ParameterPassLevel.FLAG, ParameterPassLevel.INI_KEY, ParameterPassLevel.MARKER],
+)
+def test_exception_triggers_match_wrapped_exceptions(testdir, parameter_pass_level):
+    testdir.makepyfile(
+        errors="""
+        class ServiceError(Exception):
+            pass
+
+        class ServiceUnavailable(ServiceError):
+            pass
+        """
+    )
+    testdir.syspathinsert()
+
+    args = ["-v"]
+    marker = ""
+    if parameter_pass_level == ParameterPassLevel.FLAG:
+        args.append("--dynamic-rerun-triggers=exc:errors.ServiceError")
+    elif parameter_pass_level == ParameterPassLevel.INI_KEY:
+        testdir.makeini(
+            """
+            [pytest]
+            dynamic_rerun_triggers = exc:errors.ServiceError
+        """
+        )
+    else:  # ParameterPassLevel.MARKER
+        marker = ', triggers="exc:errors.ServiceError"'
+
+    testdir.makepyfile(
+        """
+        import pytest
+
+        from errors import ServiceUnavailable
+
+        pytestmark = pytest.mark.dynamicrerun(attempts=2, schedule="delay:10ms"{})
+
+        def test_raised_from():
+            try:
+                raise ServiceUnavailable("503")
+            except ServiceUnavailable as error:
+                raise RuntimeError("the request failed") from error
+
+        def test_raised_while_handling():
+            try:
+                raise ServiceUnavailable("503")
+            except ServiceUnavailable:
+                assert False
+
+        def test_other_exception():
+            raise ValueError("ServiceError")
+        """.format(
+            marker
+        )
+    )
+
+    result = testdir.runpytest(*args)
+
+    # the messages of the failures don't mention the exception class, and the text of the last one isn't matched
+    assert result.ret == pytest.ExitCode.TESTS_FAILED
+    _assert_result_outcomes(result, dynamic_rerun=4, failed=3)
+    assert "::test_other_exception DYNAMIC_RERUN" not in result.stdout.str()
+
+
+def test_exception_trigger_recorded_on_report(testdir):
+    testdir.makeconftest(
+        """
+        def pytest_runtest_logreport(report):
+            if report.when == "call":
+                assert report.dynamic_rerun_trigger == "exc:OSError"
+    """
+    )
+    testdir.makepyfile(
+        """
+        import pytest
+
+        @pytest.mark.dynamicrerun(schedule="delay:10ms", triggers=["exc:OSError", "reset"])
+        def test_connection_reset():
+            raise ConnectionResetError("reset")
+        """
+    )
+
+    result = testdir.runpytest("-v")
+
+    assert result.ret == pytest.ExitCode.TESTS_FAILED
+    _assert_result_outcomes(result, dynamic_rerun=1, failed=1)
@@ -0,0 +1,92 @@
+# This file contains tests specific to DynamicRerunVerdictCache class
+import pytest
+from helpers import _assert_result_outcomes
+
+from pytest_dynamicrerun import DynamicRerunTriggerMatcher
+from pytest_dynamicrerun import DynamicRerunVerdictCache
+
+
+class CountingTriggerMatcher(DynamicRerunTriggerMatcher):
+    def __init__(self, triggers):
+        super().__init__(triggers)
+        self.num_searches = 0
+
+    def search(self, text):
+        self.num_searches += 1
+        return super().search(text)
+
+
+def test_repeated_messages_searched_once():
+    verdict_cache = DynamicRerunVerdictCache()
+    trigger_matcher = CountingTriggerMatcher(["ConnectionResetError"])
+
+    for _ in range(3):
+        assert (
+            verdict_cache.search(trigger_matcher, "ConnectionResetError: peer reset")
+            == "ConnectionResetError"
+        )
+        assert verdict_cache.search(trigger_matcher, "AssertionError") is None
+
+    assert trigger_matcher.num_searches == 2
+    assert verdict_cache.hits == 4
+    assert verdict_cache.misses == 2
+
+
+def test_verdicts_kept_per_trigger_set():
+    verdict_cache = DynamicRerunVerdictCache()
+    foo_matcher = DynamicRerunTriggerMatcher(["foo"])
+    bar_matcher = DynamicRerunTriggerMatcher(["bar"])
+
+    assert verdict_cache.search(foo_matcher, "foo") == "foo"
+    assert verdict_cache.search(bar_matcher, "foo") is None
+    assert verdict_cache.misses == 2
+
+
+def test_least_recently_used_verdicts_evicted(monkeypatch):
+    monkeypatch.setattr(DynamicRerunVerdictCache, "MAX_VERDICTS", 2)
+    verdict_cache = DynamicRerunVerdictCache()
+    trigger_matcher = CountingTriggerMatcher(["foo"])
+
+    verdict_cache.search(trigger_matcher, "a")
+    verdict_cache.search(trigger_matcher, "b")
+    verdict_cache.search(trigger_matcher, "a")
+    verdict_cache.search(trigger_matcher, "c")
+    assert trigger_matcher.num_searches == 3
+
+    # "b" was the least recently used message when "c" was added
+    verdict_cache.search(trigger_matcher, "a")
+    assert trigger_matcher.num_searches == 3
+    verdict_cache.search(trigger_matcher, "b")
+    assert trigger_matcher.num_searches == 4
+
+
+def test_hits_and_misses_shown_in_summary(testdir):
+    testdir.makepyfile(
+        """
+        import pytest
+
+        @pytest.mark.parametrize("i", range(3))
+        @pytest.mark.dynamicrerun(attempts=1, schedule="delay:10ms", triggers="outage")
+        def test_outage(i):
+            raise ConnectionError("outage")
+        """
+    )
+
+    result = testdir.runpytest("-v")
+
+    assert result.ret == pytest.ExitCode.TESTS_FAILED
+    _assert_result_outcomes(result, dynamic_rerun=3, failed=3)
+    result.stdout.fnmatch_lines(["*Dynamic rerun verdict cache*", "5 hits, 1 misses"])
+
+
+def test_summary_omitted_without_crash_messages(testdir):
+    testdir.makepyfile(
+        """
+        def test_passes():
+            assert True
+        """
+    )
+
+    result = testdir.runpytest("-v")
+
+    assert "Dynamic rerun verdict cache" not in result.stdout.str()
@@ -0,0 +1,132 @@
+# This file contains tests specific to DynamicRerunWaker class
+import threading
+import time
+
+import pytest
+from helpers import _assert_result_outcomes
+
+from pytest_dynamicrerun import DynamicRerunWaker
+
+
+def test_wait_times_out_without_wake_up():
+    waker = DynamicRerunWaker()
+
+    assert not waker.wait(0.01)
+    assert not waker.consume_rerun_request()
+    assert not waker.stop_requested
+
+
+def test_wake_up_from_another_thread_ends_wait_early():
+    waker = DynamicRerunWaker()
+    timer = threading.Timer(0.1, waker.wake_up)
+    timer.start()
+
+    start_time = time.time()
+    assert waker.wait(30)
+    assert time.time() - start_time < 10
+    timer.join()
+
+    # the wake up is consumed by the wait it ended
+    assert not waker.wait(0.01)
+
+
+def test_rerun_request_is_consumed_once():
+    waker = DynamicRerunWaker()
+    waker.wake_up(rerun_now=True)
+
+    assert waker.wait(0)
+    assert waker.consume_rerun_request()
+    assert not waker.consume_rerun_request()
+
+
+def test_stop_wakes_up_and_is_kept():
+    waker = DynamicRerunWaker()
+    waker.stop()
+
+    assert waker.wait(0)
+    assert waker.stop_requested
+    # waking up is consumed by waiting, the stop request is not
+    assert not waker.wait(0)
+    assert waker.stop_requested
+
+
+# every rerun below would otherwise wait until the first of January
+YEARLY_SCHEDULE_TEST_BODY = """
+import pytest
+
+COUNTER = 0
+
+@pytest.mark.dynamicrerun(attempts=2, schedule="0 0 1 1 *")
+def test_flaky():
+    global COUNTER
+    COUNTER += 1
+    assert COUNTER == 2
+"""
+
+
+def test_wake_up_with_rerun_now_runs_pending_reruns(testdir):
+    testdir.makeconftest(
+        """
+        import threading
+
+        SESSION = None
+
+        def pytest_sessionstart(session):
+            global SESSION
+            SESSION = session
+
+        def pytest_runtest_logreport(report):
+            if report.outcome == "dynamically_rerun":
+                threading.Timer(0.5, SESSION.dynamic_rerun_waker.wake_up, kwargs={"rerun_now": True}).start()
+        """
+    )
+    testdir.makepyfile(YEARLY_SCHEDULE_TEST_BODY)
+
+    result = testdir.runpytest("-v")
+
+    assert result.ret == pytest.ExitCode.OK
+    _assert_result_outcomes(result, dynamic_rerun=1, passed=1)
+
+
+def test_stop_leaves_pending_reruns_unrun(testdir):
+    testdir.makeconftest(
+        """
+        import threading
+
+        SESSION = None
+
+        def pytest_sessionstart(session):
+            global SESSION
+            SESSION = session
+
+        def pytest_runtest_logreport(report):
+            if report.outcome == "dynamically_rerun":
+                threading.Timer(0.5, SESSION.dynamic_rerun_waker.stop).start()
+        """
+    )
+    testdir.makepyfile(YEARLY_SCHEDULE_TEST_BODY)
+
+    result = testdir.runpytest("-v")
+
+    _assert_result_outcomes(result, dynamic_rerun=1)
+    result.stdout.fnmatch_lines(["*Dynamic reruns interrupted*", "*::test_flaky"])
+
+
+def test_keyboard_interrupt_while_waiting_lists_pending_reruns(testdir):
+    testdir.makeconftest(
+        """
+        import os
+        import signal
+        import threading
+
+        def pytest_runtest_logreport(report):
+            if report.outcome == "dynamically_rerun":
+                threading.Timer(0.5, os.kill, args=(os.getpid(), signal.SIGINT)).start()
+        """
+    )
+    testdir.makepyfile(YEARLY_SCHEDULE_TEST_BODY)
+
+    result = testdir.runpytest_subprocess("-v")
+
+    assert result.ret == pytest.ExitCode.INTERRUPTED
+    result.stdout.fnmatch_lines(["*Dynamic reruns interrupted*", "*::test_flaky"])
@@ -0,0 +1,248 @@
+# This file contains tests specific to the dynamic_rerun_workers option
+import os
+
+import pytest
+from helpers import _assert_result_outcomes
+
+# worker processes don't share module state with the main process, so attempts are counted in files
+PARALLEL_SAFE_TEST_BODY = """
+import os
+import time
+
+import pytest
+
+def _count_attempt(name):
+    counter_file = os.path.join(os.path.dirname(__file__), name + ".count")
+    count = 1
+    if os.path.exists(counter_file):
+        with open(counter_file) as f:
+            count = int(f.read()) + 1
+    with open(counter_file, "w") as f:
+        f.write(str(count))
+    return count
+
+def _record_rerun_interval(name):
+    start_time = time.time()
+    time.sleep(2)
+    with open(os.path.join(os.path.dirname(__file__), name + ".interval"), "w") as f:
+        f.write("{} {}".format(start_time, time.time()))
+
+@pytest.mark.dynamicrerun(parallel_safe=True)
+def test_parallel_a():
+    if _count_attempt("a") == 1:
+        print("foo")
+    else:
+        _record_rerun_interval("a")
+
+@pytest.mark.dynamicrerun(parallel_safe=True)
+def test_parallel_b():
+    if _count_attempt("b") == 1:
+        print("foo")
+    else:
+        _record_rerun_interval("b")
+
+@pytest.mark.dynamicrerun(parallel_safe=True)
+def test_parallel_c():
+    _count_attempt("c")
+    print("foo")
+
+COUNTER = 0
+
+def test_serial():
+    global COUNTER
+    COUNTER = COUNTER + 1
+    if COUNTER == 1:
+        print("foo")
+"""
+
+
+def test_parallel_safe_reruns_run_concurrently(testdir):
+    testdir.makepyfile(PARALLEL_SAFE_TEST_BODY)
+    testdir.makeini(
+        """
+        [pytest]
+        dynamic_rerun_attempts = 2
+        dynamic_rerun_schedule = * * * * * *
+        dynamic_rerun_triggers = foo
+        dynamic_rerun_workers = 3
+    """
+    )
+
+    result = testdir.runpytest("-v")
+
+    assert result.ret == pytest.ExitCode.TESTS_FAILED
+    _assert_result_outcomes(result, dynamic_rerun=5, passed=3, failed=1)
+    result.stdout.fnmatch_lines(
+        [
+            "*::test_serial PASSED*",
+            "*::test_parallel_a PASSED*",
+            "*::test_parallel_b PASSED*",
+            "*::test_parallel_c DYNAMIC_RERUN*",
+            "*::test_parallel_c FAILED*",
+        ]
+    )
+
+    a_start, a_end = map(float, testdir.tmpdir.join("a.interval").read().split())
+    b_start, b_end = map(float, testdir.tmpdir.join("b.interval").read().split())
+    assert a_start < b_end and b_start < a_end
+    assert testdir.tmpdir.join("c.count").read() == "3"
+
+
+@pytest.mark.parametrize("rerun_workers", [0, -1, 2.23, "foobar"])
+def test_invalid_dynamic_rerun_workers_rejected(testdir, rerun_workers):
+    testdir.makepyfile(PARALLEL_SAFE_TEST_BODY)
+    testdir.makeini(
+        """
+        [pytest]
+        dynamic_rerun_attempts = 2
+        dynamic_rerun_schedule = * * * * * *
+        dynamic_rerun_triggers = foo
+    """
+    )
+
+    result = testdir.runpytest("-v", "--dynamic-rerun-workers={}".format(rerun_workers))
+
+    result.stdout.fnmatch_lines(
+        ["*Rerun workers must be a positive integer. Using default value '1'*"]
+    )
+    assert result.ret == pytest.ExitCode.TESTS_FAILED
+    _assert_result_outcomes(result, dynamic_rerun=5, passed=3, failed=1)
+
+
+def test_exception_triggers_matched_in_worker_processes(testdir):
+    testdir.makepyfile(
+        """
+        import os
+
+        import pytest
+
+        @pytest.mark.dynamicrerun(
+            attempts=2, parallel_safe=True, schedule="delay:10ms", triggers="exc:OSError"
+        )
+        def test_parallel():
+            with open(os.path.join(os.path.dirname(__file__), "attempts"), "a") as f:
+                f.write(".")
+            raise ConnectionResetError()
+        """
+    )
+
+    result = testdir.runpytest("-v", "--dynamic-rerun-workers=2")
+
+    assert result.ret == pytest.ExitCode.TESTS_FAILED
+    _assert_result_outcomes(result, dynamic_rerun=2, failed=1)
+    assert testdir.tmpdir.join("attempts").read() == "..."
+
+
+@pytest.mark.parametrize("trigger_source", ["flag", "trigger_file"])
+def test_session_exception_triggers_matched_in_worker_processes(
+    testdir, trigger_source
+):
+    testdir.makepyfile(
+        """
+        import os
+
+        import pytest
+
+        @pytest.mark.dynamicrerun(attempts=3, parallel_safe=True, schedule="delay:10ms")
+        def test_parallel():
+            with open(os.path.join(os.path.dirname(__file__), "attempts"), "a") as f:
+                f.write(".")
+            raise ConnectionResetError()
+        """
+    )
+
+    args = ["-v", "--dynamic-rerun-workers=2"]
+    if trigger_source == "flag":
+        args.append("--dynamic-rerun-triggers=exc:OSError")
+    else:
+        testdir.makefile(".txt", triggers="exc:OSError")
+        args.append("--dynamic-rerun-trigger-file=triggers.txt")
+
+    result = testdir.runpytest(*args)
+
+    # the worker processes match the triggers given to this session, so every attempt is used
+    assert result.ret == pytest.ExitCode.TESTS_FAILED
+    _assert_result_outcomes(result, dynamic_rerun=3, failed=1)
+    assert testdir.tmpdir.join("attempts").read() == "...."
+
+
+def test_worker_processes_share_the_session_options(testdir):
+    testdir.makeconftest(
+        """
+        def pytest_addoption(parser):
+            parser.addoption("--flavor")
+            parser.addoption("--topping")
+        """
+    )
+    testdir.makeini(
+        """
+        [pytest]
+        addopts = --flavor=vanilla --dynamic-rerun-workers=2
+    """
+    )
+    testdir.makepyfile(
+        """
+        import os
+
+        import pytest
+
+        @pytest.mark.dynamicrerun(parallel_safe=True, schedule="delay:10ms")
+        def test_parallel(request, tmp_path):
+            with open(os.path.join(os.path.dirname(__file__), "attempts"), "a") as f:
+                f.write("{} {}\\n".format(os.getpid(), tmp_path))
+            assert request.config.getoption("flavor") == "vanilla"
+            assert request.config.getoption("topping") == "sprinkles"
+            if os.getpid() == int(os.environ["SESSION_PID"]):
+                assert False
+        """
+    )
+    testdir.monkeypatch.setenv("SESSION_PID", str(os.getpid()))
+
+    result = testdir.runpytest("-v", "--topping", "sprinkles")
+
+    assert result.ret == pytest.ExitCode.OK
+    _assert_result_outcomes(result, dynamic_rerun=1, passed=1)
+
+    # the rerun ran in a worker process, with a base temporary directory inside this session's
+    attempts = [line.split() for line in testdir.tmpdir.join("attempts").readlines()]
+    assert len(attempts) == 2
+    (session_pid, session_tmp_path), (worker_pid, worker_tmp_path) = attempts
+    assert session_pid != worker_pid
+    assert worker_tmp_path.startswith(os.path.dirname(session_tmp_path))
+    assert os.path.isdir(session_tmp_path)
+
+
+def test_failing_worker_processes_reported(testdir):
+    testdir.makeconftest(
+        """
+        import sys
+
+        if "--dynamic-rerun-worker-report-file" in sys.argv:
+            raise RuntimeError("broken worker conftest")
+        """
+    )
+    testdir.makepyfile(
+        """
+        import os
+
+        import pytest
+
+        @pytest.mark.dynamicrerun(parallel_safe=True, schedule="delay:10ms")
+        def test_parallel():
+            with open(os.path.join(os.path.dirname(__file__), "attempts"), "a") as f:
+                f.write(".")
+            assert len(open(os.path.join(os.path.dirname(__file__), "attempts")).read()) == 2
+        """
+    )
+
+    result = testdir.runpytest("-v", "--dynamic-rerun-workers=2")
+
+    # the rerun falls back to the main process, and the warning explains why
+    assert result.ret == pytest.ExitCode.OK
+    _assert_result_outcomes(result, dynamic_rerun=1, passed=1)
+    result.stdout.fnmatch_lines(
+        [
+            "*Worker process could not rerun 'test_failing_worker_processes_reported.py::test_parallel'*",
+            "*RuntimeError: broken worker conftest*",
+        ]
+    )
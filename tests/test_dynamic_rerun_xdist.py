@@ -0,0 +1,374 @@
+# This file contains tests specific to running this plugin under pytest-xdist
+import json
+from xml.etree import ElementTree
+
+import pytest
+from helpers import _assert_result_outcomes
+from helpers import ParameterPassLevel
+
+pytest.importorskip("xdist")
+
+# xdist workers don't share module state, so attempts are counted in files
+COUNT_ATTEMPT_FUNCTION = """
+import os
+import time
+
+import pytest
+
+def _count_attempt(name):
+    counter_file = os.path.join(os.path.dirname(__file__), name + ".count")
+    count = 1
+    if os.path.exists(counter_file):
+        with open(counter_file) as f:
+            count = int(f.read()) + 1
+    with open(counter_file, "w") as f:
+        f.write(str(count))
+    return count
+
+def _record_rerun_interval(name):
+    start_time = time.time()
+    time.sleep(2)
+    with open(os.path.join(os.path.dirname(__file__), name + ".interval"), "w") as f:
+        f.write("{} {} {}".format(start_time, time.time(), os.environ["PYTEST_XDIST_WORKER"]))
+"""
+
+
+def test_reruns_are_scheduled_by_the_controller(testdir):
+    testdir.makepyfile(
+        COUNT_ATTEMPT_FUNCTION
+        + """
+        @pytest.mark.dynamicrerun(attempts=3, schedule="* * * * * *")
+        def test_flaky():
+            assert _count_attempt("flaky") == 2
+
+        @pytest.mark.dynamicrerun(attempts=2, schedule="* * * * * *", triggers="foo")
+        def test_always_triggers():
+            _count_attempt("always_triggers")
+            print("foo")
+
+        def test_passes():
+            assert True
+        """.replace(
+            "\n        ", "\n"
+        )
+    )
+
+    result = testdir.runpytest("-n", "2", "-v")
+
+    assert result.ret == pytest.ExitCode.TESTS_FAILED
+    _assert_result_outcomes(result, dynamic_rerun=3, passed=2, failed=1)
+    # the summary lists reruns in the order workers report them, so only their counts are stable
+    summary_lines = (
+        result.stdout.str().split("Dynamically rerun tests")[-1].splitlines()
+    )
+    assert (
+        summary_lines.count(
+            "test_reruns_are_scheduled_by_the_controller.py::test_flaky"
+        )
+        == 1
+    )
+    assert (
+        summary_lines.count(
+            "test_reruns_are_scheduled_by_the_controller.py::test_always_triggers"
+        )
+        == 2
+    )
+
+    # the attempt limit holds across workers
+    assert testdir.tmpdir.join("flaky.count").read() == "2"
+    assert testdir.tmpdir.join("always_triggers.count").read() == "3"
+
+
+def test_due_reruns_are_handed_to_idle_workers(testdir):
+    # xdist sends both flaky tests to the same worker. Their reruns should run on both workers at the same time
+    testdir.makepyfile(
+        COUNT_ATTEMPT_FUNCTION
+        + """
+        @pytest.mark.dynamicrerun(schedule="* * * * * *")
+        def test_flaky_a():
+            if _count_attempt("a") == 1:
+                assert False
+            _record_rerun_interval("a")
+
+        @pytest.mark.dynamicrerun(schedule="* * * * * *")
+        def test_flaky_b():
+            if _count_attempt("b") == 1:
+                assert False
+            _record_rerun_interval("b")
+
+        def test_passes_a():
+            assert True
+
+        def test_passes_b():
+            assert True
+        """.replace(
+            "\n        ", "\n"
+        )
+    )
+
+    result = testdir.runpytest("-n", "2", "-v")
+
+    assert result.ret == pytest.ExitCode.OK
+    _assert_result_outcomes(result, dynamic_rerun=2, passed=4)
+
+    start_a, end_a, worker_a = testdir.tmpdir.join("a.interval").read().split()
+    start_b, end_b, worker_b = testdir.tmpdir.join("b.interval").read().split()
+    assert worker_a != worker_b
+    assert float(start_a) < float(end_b) and float(start_b) < float(end_a)
+
+
+def test_many_due_reruns_are_handed_to_a_few_workers(testdir):
+    testdir.makepyfile(
+        COUNT_ATTEMPT_FUNCTION
+        + """
+        @pytest.mark.parametrize("i", range(300))
+        @pytest.mark.dynamicrerun(schedule="delay:10ms")
+        def test_flaky(i):
+            assert _count_attempt("flaky{}".format(i)) == 2
+        """.replace(
+            "\n        ", "\n"
+        )
+    )
+
+    result = testdir.runpytest("-n", "2")
+
+    assert result.ret == pytest.ExitCode.OK
+    _assert_result_outcomes(result, dynamic_rerun=300, passed=300)
+
+
+def test_plugin_works_with_other_xdist_distribution_modes(testdir):
+    testdir.makepyfile(
+        COUNT_ATTEMPT_FUNCTION
+        + """
+        @pytest.mark.dynamicrerun(attempts=2, schedule="* * * * * *")
+        def test_flaky():
+            assert _count_attempt("flaky") == 2
+        """.replace(
+            "\n        ", "\n"
+        )
+    )
+
+    result = testdir.runpytest("-n", "2", "--dist", "loadfile", "-v")
+
+    assert result.ret == pytest.ExitCode.OK
+    _assert_result_outcomes(result, dynamic_rerun=1, passed=1)
+
+
+def test_history_recorded_by_the_controller(testdir):
+    testdir.makepyfile(
+        COUNT_ATTEMPT_FUNCTION
+        + """
+        @pytest.mark.dynamicrerun(schedule="delay:10ms")
+        def test_broken():
+            assert False
+
+        @pytest.mark.dynamicrerun(schedule="delay:10ms")
+        def test_flaky():
+            assert _count_attempt("flaky") % 2 == 0
+        """.replace(
+            "\n        ", "\n"
+        )
+    )
+    args = [
+        "-n",
+        "2",
+        "-v",
+        "--dynamic-rerun-history-file=history.jsonl",
+        "--dynamic-rerun-suppress-deterministic=1",
+    ]
+
+    result = testdir.runpytest(*args)
+
+    _assert_result_outcomes(result, dynamic_rerun=2, passed=1, failed=1)
+    history_records = {
+        record["nodeid"].split("::")[1]: record
+        for record in map(json.loads, testdir.tmpdir.join("history.jsonl").readlines())
+    }
+    assert sorted(history_records) == ["test_broken", "test_flaky"]
+    assert history_records["test_flaky"]["attempts"] == 2
+    assert history_records["test_flaky"]["passed"] is True
+    assert len(history_records["test_flaky"]["durations"]) == 2
+    assert history_records["test_broken"]["attempts"] == 2
+    assert history_records["test_broken"]["passed"] is False
+
+    # workers read the history the controller recorded, so the broken test isn't rerun anymore
+    result = testdir.runpytest(*args)
+
+    assert result.ret == pytest.ExitCode.TESTS_FAILED
+    _assert_result_outcomes(result, dynamic_rerun=1, passed=1, failed=1)
+    assert (
+        "DYNAMIC_RERUN test_history_recorded_by_the_controller.py::test_broken"
+        not in (result.stdout.str())
+    )
+    assert len(testdir.tmpdir.join("history.jsonl").readlines()) == 4
+
+
+@pytest.mark.parametrize(
+    "parameter_pass_level", [ParameterPassLevel.FLAG, ParameterPassLevel.INI_KEY]
+)
+def test_xdist_scheduler_kept_when_plugin_disabled(testdir, parameter_pass_level):
+    testdir.makepyfile(
+        """
+        def test_passes():
+            assert True
+        """
+    )
+
+    args = ["-n", "2", "-v"]
+    if parameter_pass_level == ParameterPassLevel.FLAG:
+        args.append("--dynamic-rerun-disabled=True")
+    else:  # ParameterPassLevel.INI_KEY
+        testdir.makeini(
+            """
+            [pytest]
+            dynamic_rerun_disabled = True
+        """
+        )
+
+    result = testdir.runpytest(*args)
+
+    assert result.ret == pytest.ExitCode.OK
+    _assert_result_outcomes(result, passed=1)
+    result.stdout.fnmatch_lines(["*scheduling tests via LoadScheduling*"])
+    assert "DynamicRerunXdistScheduling" not in result.stdout.str()
+
+
+def test_attempt_timing_written_to_junitxml(testdir):
+    testdir.makepyfile(
+        COUNT_ATTEMPT_FUNCTION
+        + """
+        @pytest.mark.dynamicrerun(attempts=2, schedule="delay:300ms")
+        def test_flaky():
+            time.sleep(0.1)
+            assert _count_attempt("flaky") == 3
+        """.replace(
+            "\n        ", "\n"
+        )
+    )
+
+    result = testdir.runpytest("-n", "2", "-v", "--junitxml=junit.xml")
+
+    assert result.ret == pytest.ExitCode.OK
+    _assert_result_outcomes(result, dynamic_rerun=2, passed=1)
+
+    # every attempt shows up as its own test case, holding the timing of that attempt
+    testcases = ElementTree.parse(str(testdir.tmpdir.join("junit.xml"))).findall(
+        ".//testcase"
+    )
+    assert len(testcases) == 3
+    for attempt, testcase in enumerate(testcases, 1):
+        properties = {
+            element.get("name"): float(element.get("value"))
+            for element in testcase.iter("property")
+        }
+        assert set(properties) == {
+            "dynamic_rerun_setup_duration",
+            "dynamic_rerun_call_duration",
+            "dynamic_rerun_teardown_duration",
+            "dynamic_rerun_attempt",
+            "dynamic_rerun_wait_time",
+        }
+        assert properties["dynamic_rerun_attempt"] == attempt
+        assert 0.1 <= properties["dynamic_rerun_call_duration"] < 0.3
+        if attempt == 1:
+            assert properties["dynamic_rerun_wait_time"] == 0
+        else:
+            assert 0 < properties["dynamic_rerun_wait_time"] < 0.3
+
+
+def test_controller_logs_rerun_decisions(testdir):
+    testdir.makepyfile(
+        COUNT_ATTEMPT_FUNCTION
+        + """
+        @pytest.mark.dynamicrerun(attempts=2, schedule="delay:10ms")
+        def test_flaky():
+            assert _count_attempt("flaky") == 2
+        """.replace(
+            "\n        ", "\n"
+        )
+    )
+
+    result = testdir.runpytest("-n", "2", "-v", "--dynamic-rerun-log=events.jsonl")
+
+    assert result.ret == pytest.ExitCode.OK
+    _assert_result_outcomes(result, dynamic_rerun=1, passed=1)
+
+    # workers leave logging to the controller
+    assert not testdir.tmpdir.listdir("events.jsonl.*")
+    events = [
+        json.loads(line) for line in testdir.tmpdir.join("events.jsonl").readlines()
+    ]
+    assert [(event["event"], event["attempt"]) for event in events] == [
+        ("attempt_started", 1),
+        ("trigger_evaluated", 1),
+        ("trigger_evaluated", 1),
+        ("rerun_scheduled", 1),
+        ("trigger_evaluated", 1),
+        ("attempt_finished", 1),
+        ("attempt_started", 2),
+        ("trigger_evaluated", 2),
+        ("trigger_evaluated", 2),
+        ("trigger_evaluated", 2),
+        ("attempt_finished", 2),
+        ("item_terminated", 2),
+    ]
+    assert events[5]["passed"] is False
+    assert events[10]["passed"] is True
+
+
+def test_workers_log_their_own_reruns_with_other_distribution_modes(testdir):
+    testdir.makepyfile(
+        COUNT_ATTEMPT_FUNCTION
+        + """
+        @pytest.mark.dynamicrerun(attempts=2, schedule="delay:10ms")
+        def test_flaky():
+            assert _count_attempt("flaky") == 2
+        """.replace(
+            "\n        ", "\n"
+        )
+    )
+
+    result = testdir.runpytest(
+        "-n", "2", "--dist", "loadfile", "-v", "--dynamic-rerun-log=events.jsonl"
+    )
+
+    assert result.ret == pytest.ExitCode.OK
+    events = [
+        json.loads(line)
+        for worker_log in testdir.tmpdir.listdir("events.jsonl.*")
+        for line in worker_log.readlines()
+    ]
+    assert [event["event"] for event in events].count("rerun_scheduled") == 1
+    assert events[-1]["event"] == "item_terminated"
+
+
+def test_controller_follows_trigger_file_signatures(testdir):
+    testdir.makefile(
+        ".json",
+        signatures=json.dumps(
+            {"signatures": [{"trigger": "ConnectionResetError", "attempts": 2}]}
+        ),
+    )
+    testdir.makepyfile(
+        COUNT_ATTEMPT_FUNCTION
+        + """
+        @pytest.mark.dynamicrerun(schedule="delay:10ms")
+        def test_connection_reset():
+            _count_attempt("connection_reset")
+            raise ConnectionResetError()
+
+        @pytest.mark.dynamicrerun(schedule="delay:10ms")
+        def test_broken():
+            assert False
+        """.replace(
+            "\n        ", "\n"
+        )
+    )
+
+    result = testdir.runpytest(
+        "-n", "2", "-v", "--dynamic-rerun-trigger-file=signatures.json"
+    )
+
+    assert result.ret == pytest.ExitCode.TESTS_FAILED
+    _assert_result_outcomes(result, dynamic_rerun=2, failed=2)
+    assert testdir.tmpdir.join("connection_reset.count").read() == "3"
@@ -1,5 +1,6 @@
 import time
 from datetime import datetime
+from xml.etree import ElementTree
 
 import pytest
 from helpers import _assert_result_outcomes
@@ -12,12 +13,32 @@ def test_help_text_contains_plugin_options(testdir):
             "dynamicrerun:",
             "*--dynamic-rerun-attempts=DYNAMIC_RERUN_ATTEMPTS",
             "*--dynamic-rerun-disabled=DYNAMIC_RERUN_DISABLED",
+            "*--dynamic-rerun-front-load=DYNAMIC_RERUN_FRONT_LOAD",
+            "*--dynamic-rerun-history-file=DYNAMIC_RERUN_HISTORY_FILE",
+            "*--dynamic-rerun-interleave=DYNAMIC_RERUN_INTERLEAVE",
+            "*--dynamic-rerun-log=DYNAMIC_RERUN_LOG",
+            "*--dynamic-rerun-mode=DYNAMIC_RERUN_MODE",
+            "*--dynamic-rerun-scan-window=*",
             "*--dynamic-rerun-schedule=DYNAMIC_RERUN_SCHEDULE",
+            "*--dynamic-rerun-suppress-deterministic=*",
+            "*--dynamic-rerun-time-budget=DYNAMIC_RERUN_TIME_BUDGET",
+            "*--dynamic-rerun-trigger-file=DYNAMIC_RERUN_TRIGGER_FILE",
             "*--dynamic-rerun-triggers=DYNAMIC_RERUN_TRIGGERS",
+            "*--dynamic-rerun-workers=DYNAMIC_RERUN_WORKERS",
             "*dynamic_rerun_attempts (string):",
             "*dynamic_rerun_disabled (string):",
+            "*dynamic_rerun_front_load (string):",
+            "*dynamic_rerun_history_file (string):",
+            "*dynamic_rerun_interleave (string):",
+            "*dynamic_rerun_log (string):",
+            "*dynamic_rerun_mode (string):",
+            "*dynamic_rerun_scan_window (string):",
             "*dynamic_rerun_schedule (string):",
+            "*dynamic_rerun_suppress_deterministic (string):",
+            "*dynamic_rerun_time_budget (string):",
+            "*dynamic_rerun_trigger_file (string):",
             "*dynamic_rerun_triggers (linelist):",
+            "*dynamic_rerun_workers (string):",
         ]
     )
     assert result.ret == 0
@@ -27,10 +48,13 @@ def test_markers_flag_shows_dynamicrerun_marker(testdir):
     result = testdir.runpytest("--markers")
     result.stdout.fnmatch_lines(
         [
-            "@pytest.mark.dynamicrerun(attempts=N, disabled=[True|False], schedule=S, triggers=[REGEX]): "
+            "@pytest.mark.dynamicrerun(attempts=N, disabled=[True|False], mode=[deferred|immediate], "
+            "parallel_safe=[True|False], schedule=S, triggers=[REGEX]): "
             "mark test as dynamically re-runnable. "
             "Attempt a rerun up to N times on anything that matches a regex in the list [REGEX], "
-            "following cron formatted schedule S. Set disabled to False to stop this plugin from running."
+            "following cron formatted schedule S. Set disabled to False to stop this plugin from running. "
+            "Set mode=immediate to rerun right after the failing attempt instead of once the last test has run. "
+            "Set parallel_safe=True to allow reruns to run in parallel worker processes."
         ]
     )
     assert result.ret == 0
@@ -612,3 +636,204 @@ def test_plugin_doesnt_reread_old_sections_on_rerun(testdir):
     assert result.ret == pytest.ExitCode.TESTS_FAILED
 
     _assert_result_outcomes(result, dynamic_rerun=4, failed=1)
+
+
+def test_item_settings_resolved_at_collection_and_shared(testdir):
+    testdir.makeini(
+        """
+        [pytest]
+        dynamic_rerun_attempts = 2
+        dynamic_rerun_schedule = * * * * * *
+    """
+    )
+
+    testdir.makepyfile(
+        """
+        import pytest
+
+        def test_uses_ini_a():
+            pass
+
+        def test_uses_ini_b():
+            pass
+
+        @pytest.mark.dynamicrerun(attempts="not a number")
+        def test_invalid_marker_a():
+            pass
+
+        @pytest.mark.dynamicrerun(attempts="not a number")
+        def test_invalid_marker_b():
+            pass
+        """
+    )
+
+    testdir.makeconftest(
+        """
+        def pytest_collection_finish(session):
+            items = {item.name: item for item in session.items}
+            settings = {name: item.dynamic_rerun_settings for name, item in items.items()}
+
+            assert settings["test_uses_ini_a"] is settings["test_uses_ini_b"]
+            assert settings["test_invalid_marker_a"] is settings["test_invalid_marker_b"]
+            assert settings["test_uses_ini_a"] is not settings["test_invalid_marker_a"]
+            assert len(session.dynamic_rerun_settings_cache) == 2
+
+            assert items["test_uses_ini_a"].max_allowed_dynamic_rerun_attempts == 2
+            assert items["test_invalid_marker_a"].max_allowed_dynamic_rerun_attempts == 1
+    """
+    )
+
+    result = testdir.runpytest("-v")
+
+    assert result.ret == pytest.ExitCode.OK
+    _assert_result_outcomes(result, passed=4)
+    assert (
+        result.stdout.str().count(
+            "Rerun attempts must be a positive integer. Using default value '1'"
+        )
+        == 1
+    )
+
+
+def test_plugin_doesnt_reread_old_sections_when_new_sections_are_added(testdir):
+    testdir.makepyfile(
+        """
+        COUNTER = 0
+
+        def test_prints_foo_then_bar():
+            global COUNTER
+            COUNTER = COUNTER + 1
+
+            if COUNTER == 3:
+                print("bar")
+            else:
+                print("foo")
+        """
+    )
+
+    result = testdir.runpytest(
+        "-v",
+        "--dynamic-rerun-attempts=10",
+        "--dynamic-rerun-schedule='* * * * * *'",
+        "--dynamic-rerun-triggers=foo",
+    )
+
+    assert result.ret == pytest.ExitCode.OK
+
+    _assert_result_outcomes(result, dynamic_rerun=2, passed=1)
+
+
+def test_due_reruns_grouped_by_module(testdir):
+    module_body = """
+        import time
+
+        import pytest
+
+        COUNTER = {{}}
+
+        @pytest.fixture(scope="module")
+        def module_fixture():
+            print("module {name} setup")
+
+        @pytest.mark.parametrize("i", [1, 2])
+        def test_flaky(module_fixture, i):
+            # outlast the rerun delay so that all reruns are due in the same batch
+            time.sleep(0.1)
+            COUNTER[i] = COUNTER.get(i, 0) + 1
+            assert COUNTER[i] > 1
+        """
+    testdir.makepyfile(
+        test_a=module_body.format(name="a"), test_b=module_body.format(name="b")
+    )
+
+    # run the modules' tests alternately, like test order randomizing plugins do
+    testdir.makeconftest(
+        """
+        def pytest_collection_modifyitems(items):
+            items[:] = [items[0], items[2], items[1], items[3]]
+        """
+    )
+
+    result = testdir.runpytest("-v", "-s", "--dynamic-rerun-schedule=delay:10ms")
+
+    result.stdout.fnmatch_lines(
+        [
+            "*Dynamically rerun tests*",
+            "test_a.py::test_flaky[1]",
+            "test_b.py::test_flaky[1]",
+            "test_a.py::test_flaky[2]",
+            "test_b.py::test_flaky[2]",
+        ]
+    )
+    result.stdout.fnmatch_lines(
+        [
+            "test_a.py::test_flaky?1? module a setup",
+            "PASSED",
+            "test_a.py::test_flaky?2? PASSED",
+            "test_b.py::test_flaky?1? module b setup",
+            "PASSED",
+            "test_b.py::test_flaky?2? PASSED",
+        ]
+    )
+
+    # every first attempt sets up its module fixture, then the rerun batch sets up each module fixture once
+    assert result.stdout.str().count("module a setup") == 3
+    assert result.stdout.str().count("module b setup") == 3
+    assert result.ret == pytest.ExitCode.OK
+    _assert_result_outcomes(result, dynamic_rerun=4, passed=4)
+
+
+def test_attempt_timing_written_to_junitxml(testdir):
+    testdir.makepyfile(
+        """
+        import time
+
+        import pytest
+
+        COUNTER = 0
+
+        @pytest.mark.dynamicrerun(attempts=2, schedule="delay:300ms")
+        def test_flaky():
+            global COUNTER
+            COUNTER = COUNTER + 1
+            time.sleep(0.1)
+            assert COUNTER == 3
+        """
+    )
+
+    result = testdir.runpytest("-v", "--junitxml=junit.xml")
+
+    assert result.ret == pytest.ExitCode.OK
+    _assert_result_outcomes(result, dynamic_rerun=2, passed=1)
+
+    # the attempts share a single test case, holding the timing of every attempt
+    testcases = ElementTree.parse(str(testdir.tmpdir.join("junit.xml"))).findall(
+        ".//testcase"
+    )
+    assert len(testcases) == 1
+    properties = [
+        (element.get("name"), float(element.get("value")))
+        for element in testcases[0].iter("property")
+    ]
+    assert [name for name, value in properties] == [
+        "dynamic_rerun_setup_duration",
+        "dynamic_rerun_call_duration",
+        "dynamic_rerun_teardown_duration",
+        "dynamic_rerun_attempt",
+        "dynamic_rerun_wait_time",
+    ] * 3
+
+    attempts = [value for name, value in properties if name == "dynamic_rerun_attempt"]
+    assert attempts == [1, 2, 3]
+
+    call_durations = [
+        value for name, value in properties if name == "dynamic_rerun_call_duration"
+    ]
+    assert all(0.1 <= call_duration < 0.3 for call_duration in call_durations)
+
+    # reruns are scheduled from the start of the previous attempt, which spent ~0.1s running
+    wait_times = [
+        value for name, value in properties if name == "dynamic_rerun_wait_time"
+    ]
+    assert wait_times[0] == 0
+    assert all(0.1 <= wait_time < 0.3 for wait_time in wait_times[1:])